@@ -0,0 +1,94 @@
+#  Created byMartin.cz
+#  Copyright (c) Martin Strohalm. All rights reserved.
+
+# Measures catalog loading: decoding cached JSON into brickse.Collection
+# objects against opening memory-mapped brickse.Catalog snapshot, plus lookup
+# speed by set ID and number.
+#
+# Usage: python bench_catalog.py [--sets 20000] [--output results.json]
+
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import brickse
+from brickse import catalog
+from common import make_set, measure, summarize, write_results
+
+
+def bench_json(path, repeat):
+    """Measures loading all sets from JSON."""
+    
+    def load():
+        with open(path, 'rb') as f:
+            return [brickse.Collection.create(x) for x in json.load(f)['sets']]
+    
+    return summarize(measure(load, repeat))
+
+
+def bench_open(path, repeat):
+    """Measures opening the snapshot."""
+    
+    def load():
+        brickse.Catalog(path).close()
+    
+    return summarize(measure(load, repeat))
+
+
+def bench_lookup(path, count, calls):
+    """Measures lookup by set ID and number."""
+    
+    ids = [random.randint(1, count) for i in range(calls)]
+    numbers = [str(10000 + i - 1) for i in ids]
+    
+    with brickse.Catalog(path) as snapshot:
+        
+        start = time.perf_counter()
+        for set_id in ids:
+            snapshot.get(set_id)
+        by_id = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for number in numbers:
+            snapshot.find(number)
+        by_number = time.perf_counter() - start
+    
+    return {
+        'by_id_us': 1e6 * by_id / calls,
+        'by_number_us': 1e6 * by_number / calls}
+
+
+def main():
+    """Runs all benchmarks."""
+    
+    parser = argparse.ArgumentParser(description="Brickse catalog snapshot benchmark.")
+    parser.add_argument("--sets", type=int, default=20000, help="number of sets")
+    parser.add_argument("--output", default=None, help="results JSON file path")
+    args = parser.parse_args()
+    
+    data = [make_set(i) for i in range(args.sets)]
+    
+    with tempfile.TemporaryDirectory() as folder:
+        
+        json_path = os.path.join(folder, "sets.json")
+        with open(json_path, 'w', encoding='utf8') as f:
+            json.dump({'status': 'success', 'matches': len(data), 'sets': data}, f)
+        
+        snapshot_path = os.path.join(folder, "sets.bin")
+        catalog.write_catalog(snapshot_path, [brickse.Collection.create(x) for x in data])
+        
+        results = {
+            'sets': args.sets,
+            'json_bytes': os.path.getsize(json_path),
+            'snapshot_bytes': os.path.getsize(snapshot_path),
+            'load_json': bench_json(json_path, 5),
+            'open_snapshot': bench_open(snapshot_path, 100),
+            'lookup': bench_lookup(snapshot_path, args.sets, 10000)}
+    
+    write_results(args.output, "catalog", results)
+
+
+if __name__ == "__main__":
+    main()
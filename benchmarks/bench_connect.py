@@ -0,0 +1,121 @@
+#  Created byMartin.cz
+#  Copyright (c) Martin Strohalm. All rights reserved.
+
+# Measures connection setup costs against local HTTPS mock server: latency of
+# the first request after client creation with and without prewarming and
+# latency of requests needing new connection with full TLS handshake, with
+# resumed TLS session and with kept-alive connection.
+#
+# Usage: python bench_connect.py [--calls 200] [--startup 0.05] [--output results.json]
+
+import os
+import ssl
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+import brickse
+from brickse import config, pool, request
+from common import make_catalog, measure, summarize, write_results
+
+
+def start_server(folder):
+    """Starts HTTPS mock server with self-signed certificate."""
+    
+    cert = os.path.join(folder, "cert.pem")
+    key = os.path.join(folder, "key.pem")
+    
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+        check=True, capture_output=True)
+    
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    
+    server = brickse.MockServer(make_catalog(100), host="localhost")
+    server._server.socket = context.wrap_socket(server._server.socket, server_side=True)
+    
+    thread = threading.Thread(target=server._server.serve_forever, daemon=True)
+    thread.start()
+    
+    port = server._server.server_address[1]
+    return server, "https://localhost:%d/api/v3.asmx/" % port
+
+
+def bench_first(calls, startup, prewarm):
+    """Measures first request latency after client creation."""
+    
+    config.PREWARM = 1 if prewarm else 0
+    durations = []
+    
+    for i in range(calls):
+        
+        pool.get_pool().clear()
+        
+        client = brickse.Brickse()
+        time.sleep(startup)
+        
+        start = time.perf_counter()
+        client.get_themes()
+        durations.append(time.perf_counter() - start)
+    
+    config.PREWARM = 0
+    
+    return summarize(durations)
+
+
+def bench_reconnect(calls, pool_size, resume):
+    """Measures request latency with given connection reuse."""
+    
+    config.POOL_SIZE = pool_size
+    url = config.API_URL + "getThemes"
+    
+    pool.get_pool().clear()
+    request.request(url).read()
+    
+    def call():
+        if not resume:
+            pool.get_pool().clear()
+        request.request(url).read()
+    
+    before = pool.get_pool().stats()
+    durations = measure(call, calls)
+    after = pool.get_pool().stats()
+    
+    results = summarize(durations)
+    results.update({k: after[k] - before[k] for k in ('opened', 'resumed', 'reused')})
+    
+    return results
+
+
+def main():
+    """Runs all benchmarks."""
+    
+    parser = argparse.ArgumentParser(description="Brickse connection setup benchmark.")
+    parser.add_argument("--calls", type=int, default=200, help="number of calls")
+    parser.add_argument("--startup", type=float, default=0.05, help="time in seconds between client creation and first request")
+    parser.add_argument("--output", default=None, help="results JSON file path")
+    args = parser.parse_args()
+    
+    config.REQUEST_DELAY = 0
+    brickse.init("key")
+    
+    with tempfile.TemporaryDirectory() as folder:
+        
+        server, config.API_URL = start_server(folder)
+        
+        results = {
+            'first_request': bench_first(args.calls, args.startup, False),
+            'first_request_prewarm': bench_first(args.calls, args.startup, True),
+            'reconnect_full_handshake': bench_reconnect(args.calls, 0, False),
+            'reconnect_resumed_session': bench_reconnect(args.calls, 0, True),
+            'keep_alive': bench_reconnect(args.calls, 10, True)}
+        
+        server._server.shutdown()
+    
+    write_results(args.output, "connect", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#  Created byMartin.cz
+#  Copyright (c) Martin Strohalm. All rights reserved.
+
+# Measures cold start cost of brickse in fresh interpreters: bare "import
+# brickse", first access of the Brickse class and first request against local
+# mock server, each compared to empty interpreter start. The first use cost
+# (class access minus bare import) is reported separately, as lazy import
+# only moves the work there.
+#
+# Usage: python bench_import.py [--repeat 20] [--output results.json]
+
+import sys
+import argparse
+import subprocess
+from common import Server, summarize, write_results
+
+# define measured snippets
+SNIPPETS = {
+    'empty': "pass",
+    'import': "import brickse",
+    'class': "import brickse; brickse.Brickse",
+    'request': "import brickse; brickse.init('benchmark'); brickse.config.API_URL = %(url)r; brickse.Brickse().get_themes()"}
+
+# define modules snippet
+MODULES = "import sys; b = set(sys.modules); import brickse; print(len(set(sys.modules) - b))"
+
+
+def run(code, repeat):
+    """Measures interpreter run time of given code in fresh processes."""
+    
+    timer = "import time; _t = time.perf_counter(); %s; print(time.perf_counter() - _t)" % code
+    durations = []
+    
+    for i in range(repeat):
+        output = subprocess.check_output([sys.executable, "-c", timer])
+        durations.append(float(output.decode().split()[-1]))
+    
+    return durations
+
+
+def count_modules():
+    """Counts modules loaded by import brickse."""
+    
+    output = subprocess.check_output([sys.executable, "-c", MODULES])
+    return int(output.decode().split()[-1])
+
+
+def main():
+    """Runs all benchmarks."""
+    
+    parser = argparse.ArgumentParser(description="Brickse import time benchmark.")
+    parser.add_argument("--repeat", type=int, default=20, help="number of fresh interpreters per snippet")
+    parser.add_argument("--output", default=None, help="results JSON file path")
+    args = parser.parse_args()
+    
+    results = {'modules': count_modules()}
+    
+    with Server(10) as server:
+        
+        for name, code in SNIPPETS.items():
+            results[name] = summarize(run(code % {'url': server.url}, args.repeat))
+    
+    # get first use cost
+    results['first_use_ms'] = results['class']['p50_ms'] - results['import']['p50_ms']
+    
+    write_results(args.output, "import", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#  Created byMartin.cz
+#  Copyright (c) Martin Strohalm. All rights reserved.
+
+# Measures bulk catalog ingestion of stored getSets pages: sequential decoding
+# into brickse.Collection objects against brickse.ingest in process pool.
+#
+# Usage: python bench_ingest.py [--sets 100000] [--page 500] [--workers 4] [--output results.json]
+
+import json
+import time
+import argparse
+import brickse
+from brickse import ingest
+from common import make_pages, write_results
+
+
+def bench_sequential(pages):
+    """Measures sequential decoding and objects creation."""
+    
+    start = time.perf_counter()
+    
+    sets = []
+    for body in pages:
+        sets.extend(brickse.Collection.create(item) for item in json.loads(body)['sets'])
+    
+    return len(sets), time.perf_counter() - start
+
+
+def bench_ingest(pages, workers):
+    """Measures ingestion by process pool."""
+    
+    start = time.perf_counter()
+    rows = ingest.ingest(pages, workers=workers)
+    
+    return len(rows), time.perf_counter() - start
+
+
+def main():
+    """Runs all benchmarks."""
+    
+    parser = argparse.ArgumentParser(description="Brickse bulk ingestion benchmark.")
+    parser.add_argument("--sets", type=int, default=100000, help="number of sets")
+    parser.add_argument("--page", type=int, default=500, help="number of sets per page")
+    parser.add_argument("--workers", default="1,2,4", help="numbers of worker processes")
+    parser.add_argument("--output", default=None, help="results JSON file path")
+    args = parser.parse_args()
+    
+    pages = make_pages(args.sets, args.page)
+    results = {'pages': len(pages), 'bytes': sum(len(x) for x in pages)}
+    
+    count, duration = bench_sequential(pages)
+    results['sequential'] = {'sets': count, 'duration_s': duration, 'sets_per_s': count / duration}
+    
+    results['ingest'] = {}
+    for workers in args.workers.split(","):
+        count, duration = bench_ingest(pages, int(workers))
+        results['ingest'][workers] = {'sets': count, 'duration_s': duration, 'sets_per_s': count / duration}
+    
+    write_results(args.output, "ingest", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#  Created byMartin.cz
+#  Copyright (c) Martin Strohalm. All rights reserved.
+
+# Measures memory held by sets decoded from synthetic getSets pages with and
+# without shared strings interning.
+#
+# Usage: python bench_memory.py [--sets 100000] [--output results.json]
+
+import gc
+import json
+import argparse
+import tracemalloc
+import brickse
+from brickse import objects
+from common import make_pages, write_results
+
+
+def bench_load(pages, intern_size):
+    """Measures memory held by decoded sets."""
+    
+    brickse.config.INTERN_SIZE = intern_size
+    objects.clear_interned()
+    gc.collect()
+    
+    tracemalloc.start()
+    
+    sets = []
+    for body in pages:
+        sets.extend(brickse.Collection.create(x) for x in json.loads(body)['sets'])
+    
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        'sets': len(sets),
+        'memory_mb': current / 1024 / 1024,
+        'bytes_per_set': current / len(sets)}
+
+
+def main():
+    """Runs all benchmarks."""
+    
+    parser = argparse.ArgumentParser(description="Brickse strings interning benchmark.")
+    parser.add_argument("--sets", type=int, default=100000, help="number of sets")
+    parser.add_argument("--output", default=None, help="results JSON file path")
+    args = parser.parse_args()
+    
+    pages = make_pages(args.sets)
+    
+    plain = bench_load(pages, 0)
+    interned = bench_load(pages, 10000)
+    
+    results = {
+        'plain': plain,
+        'interned': interned,
+        'saved_mb': plain['memory_mb'] - interned['memory_mb'],
+        'saved_ratio': 1 - interned['memory_mb'] / plain['memory_mb']}
+    
+    write_results(args.output, "memory", results)
+
+
+if __name__ == "__main__":
+    main()
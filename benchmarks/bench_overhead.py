@@ -0,0 +1,123 @@
+#  Created byMartin.cz
+#  Copyright (c) Martin Strohalm. All rights reserved.
+
+# Measures brickse own overhead against local mock server: request latency with
+# and without rate limiter, JSON decoding, entities creation and full get_sets
+# crawl time and peak memory for synthetic catalogs.
+#
+# Usage: python bench_overhead.py [--sizes 1000,10000,100000] [--output results.json]
+
+import json
+import time
+import argparse
+import tracemalloc
+import brickse
+from brickse import request
+from common import Server, make_set, make_instructions, measure, summarize, write_results
+
+
+def bench_request(calls, delay):
+    """Measures request.request latency."""
+    
+    brickse.config.REQUEST_DELAY = delay
+    url = brickse.config.API_URL + "getThemes"
+    
+    def call():
+        request.request(url).read()
+    
+    return summarize(measure(call, calls))
+
+
+def bench_decode(page_sizes, repeat):
+    """Measures JSON decoding cost per getSets page."""
+    
+    results = {}
+    
+    for size in page_sizes:
+        
+        body = json.dumps({'status': 'success', 'matches': size, 'sets': [make_set(i) for i in range(size)]}).encode('utf8')
+        
+        durations = measure(lambda: json.loads(body), repeat)
+        results[str(size)] = dict(summarize(durations), bytes=len(body))
+    
+    return results
+
+
+def bench_create(count):
+    """Measures entities creation throughput."""
+    
+    sets = [make_set(i) for i in range(count)]
+    instructions = [x for i in range(count) for x in make_instructions(i)]
+    
+    start = time.perf_counter()
+    for item in sets:
+        brickse.Collection.create(item)
+    collections = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for item in instructions:
+        brickse.Instructions.create(item)
+    manuals = time.perf_counter() - start
+    
+    return {
+        'collection_per_s': count / collections,
+        'instructions_per_s': len(instructions) / manuals}
+
+
+def bench_crawl(size):
+    """Measures full catalog crawl by Brickse.get_sets."""
+    
+    brickse.config.REQUEST_DELAY = 0
+    
+    with Server(size):
+        
+        tool = brickse.Brickse()
+        
+        tracemalloc.start()
+        start = time.perf_counter()
+        
+        sets = tool.get_sets()
+        
+        duration = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    
+    return {
+        'sets': len(sets),
+        'duration_s': duration,
+        'sets_per_s': len(sets) / duration,
+        'peak_memory_mb': peak / 1024 / 1024}
+
+
+def main():
+    """Runs all benchmarks."""
+    
+    parser = argparse.ArgumentParser(description="Brickse overhead benchmark.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="catalog sizes for crawl benchmark")
+    parser.add_argument("--calls", type=int, default=200, help="number of requests for latency benchmark")
+    parser.add_argument("--delay", type=float, default=0.01, help="rate limiter delay in seconds")
+    parser.add_argument("--output", default=None, help="results JSON file path")
+    args = parser.parse_args()
+    
+    brickse.init("benchmark")
+    results = {}
+    
+    # request latency
+    with Server(100):
+        results['request_no_limiter'] = bench_request(args.calls, 0)
+        results['request_limiter'] = dict(bench_request(args.calls, args.delay), delay_s=args.delay)
+    
+    # parsing
+    results['decode_per_page'] = bench_decode((20, 100, 500), 50)
+    results['create'] = bench_create(20000)
+    
+    # crawl
+    results['crawl'] = {}
+    for size in args.sizes.split(","):
+        results['crawl'][size] = bench_crawl(int(size))
+    
+    write_results(args.output, "overhead", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#  Created byMartin.cz
+#  Copyright (c) Martin Strohalm. All rights reserved.
+
+# Measures serialization throughput and size of brickse entities using
+# default pickling, opt-in compact pickling (brickse.codec.pickle_dumps), JSON
+# and msgpack codec (if installed). Every format is checked to round-trip all
+# values.
+#
+# Usage: python bench_serialize.py [--sets 20000] [--repeat 5] [--output results.json]
+
+import json
+import time
+import pickle
+import argparse
+import brickse
+from brickse import objects, codec
+from common import make_set, make_instructions, write_results
+
+
+def make_entities(count):
+    """Creates mixed list of entities."""
+    
+    entities = []
+    
+    for i in range(count):
+        
+        entities.append(brickse.Collection.create(make_set(i)))
+        
+        if i % 10 == 0:
+            entities.extend(brickse.Instructions.create(x) for x in make_instructions(i))
+        
+        if i % 20 == 0:
+            entities.append(brickse.Theme(name="Theme %d" % i, subthemes=3, sets=100, year_from=1990, year_to=2020))
+        
+        if i % 50 == 0:
+            entities.append(objects.Minifig(minifig_id="sw%04d" % i, name="Minifig %d" % i, category="Star Wars", owned_in_sets=1, owned_loose=0, owned_total=1, wanted=False))
+    
+    return entities
+
+
+def json_dumps(entities):
+    """Serializes entities as JSON."""
+    
+    return json.dumps([(x.__class__.__name__, vars(x)) for x in entities]).encode('utf8')
+
+
+def json_loads(data):
+    """Deserializes entities from JSON."""
+    
+    return [getattr(objects, name)(**attrs) for name, attrs in json.loads(data)]
+
+
+def check(entities, restored):
+    """Checks all entities round-trip."""
+    
+    assert len(entities) == len(restored)
+    
+    for a, b in zip(entities, restored):
+        assert a.__class__ is b.__class__, (a, b)
+        assert vars(a) == vars(b), (a, b)
+
+
+def bench(entities, dumps, loads, repeat):
+    """Measures serialization and deserialization."""
+    
+    data = dumps(entities)
+    check(entities, loads(data))
+    
+    start = time.perf_counter()
+    for i in range(repeat):
+        dumps(entities)
+    dump_time = (time.perf_counter() - start) / repeat
+    
+    start = time.perf_counter()
+    for i in range(repeat):
+        loads(data)
+    load_time = (time.perf_counter() - start) / repeat
+    
+    return {
+        'bytes': len(data),
+        'bytes_per_entity': len(data) / len(entities),
+        'dumps_ms': 1000 * dump_time,
+        'loads_ms': 1000 * load_time,
+        'dumps_per_s': len(entities) / dump_time,
+        'loads_per_s': len(entities) / load_time}
+
+
+def main():
+    """Runs all benchmarks."""
+    
+    parser = argparse.ArgumentParser(description="Brickse entities serialization benchmark.")
+    parser.add_argument("--sets", type=int, default=20000, help="number of sets")
+    parser.add_argument("--repeat", type=int, default=5, help="number of repetitions")
+    parser.add_argument("--output", default=None, help="results JSON file path")
+    args = parser.parse_args()
+    
+    entities = make_entities(args.sets)
+    protocol = pickle.HIGHEST_PROTOCOL
+    
+    results = {'entities': len(entities)}
+    
+    results['pickle_default'] = bench(entities, lambda x: pickle.dumps(x, protocol), pickle.loads, args.repeat)
+    results['pickle_compact'] = bench(entities, lambda x: codec.pickle_dumps(x, protocol), pickle.loads, args.repeat)
+    results['json'] = bench(entities, json_dumps, json_loads, args.repeat)
+    
+    try:
+        results['msgpack'] = bench(entities, codec.dumps, codec.loads, args.repeat)
+    except ImportError:
+        results['msgpack'] = None
+    
+    write_results(args.output, "serialize", results)
+
+
+if __name__ == "__main__":
+    main()
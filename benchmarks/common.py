@@ -0,0 +1,158 @@
+#  Created byMartin.cz
+#  Copyright (c) Martin Strohalm. All rights reserved.
+
+import sys
+import json
+import time
+import platform
+import multiprocessing
+import brickse
+
+# define catalog constants
+THEMES = 120
+SUBTHEMES = 6
+YEARS = (1970, 2025)
+CATEGORIES = ("Normal", "Gear", "Collection", "Book", "Random", "Extended", "Other")
+
+
+def make_set(i):
+    """Creates raw data of i-th synthetic set."""
+    
+    theme = i % THEMES
+    
+    return {
+        'setID': i + 1,
+        'number': str(10000 + i),
+        'numberVariant': 1,
+        'name': "Synthetic Set %d" % i,
+        'year': YEARS[0] + i % (YEARS[1] - YEARS[0]),
+        'theme': "Theme %d" % theme,
+        'themeGroup': "Group %d" % (theme % 12),
+        'subtheme': "Subtheme %d-%d" % (theme, i % SUBTHEMES),
+        'category': CATEGORIES[i % len(CATEGORIES)],
+        'released': True,
+        'pieces': 100 + i % 900,
+        'minifigs': i % 5,
+        'image': {
+            'thumbnailURL': "https://images.brickset.com/sets/small/%d-1.jpg" % (10000 + i),
+            'imageURL': "https://images.brickset.com/sets/images/%d-1.jpg" % (10000 + i)},
+        'collection': {}}
+
+
+def make_instructions(i):
+    """Creates raw instructions data of i-th synthetic set."""
+    
+    return [{
+        'URL': "https://www.lego.com/biassets/bi/%d%d.pdf" % (6000000 + i, part),
+        'description': "BI 3017 / 60 - 65/115 - %d V%d %d/2" % (10000 + i, 29 + part, part)}
+        for part in (1, 2)]
+
+
+def make_pages(count, page_size=500):
+    """Creates raw getSets page bodies of synthetic sets."""
+    
+    pages = []
+    
+    for start in range(0, count, page_size):
+        sets = [make_set(i) for i in range(start, min(count, start + page_size))]
+        pages.append(json.dumps({'status': 'success', 'matches': count, 'sets': sets}).encode('utf8'))
+    
+    return pages
+
+
+def make_catalog(count):
+    """Creates synthetic catalog fixtures."""
+    
+    return {
+        'sets': [make_set(i) for i in range(count)],
+        'instructions': {str(i + 1): make_instructions(i) for i in range(min(count, 1000))}}
+
+
+def _serve(count, latency, queue):
+    """Runs mock server in child process."""
+    
+    server = brickse.MockServer(make_catalog(count), latency=latency)
+    queue.put(server.url)
+    server.serve()
+
+
+class Server(object):
+    """Runs mock server with synthetic catalog in separate process."""
+    
+    
+    def __init__(self, count, latency=0):
+        """Initializes a new instance of Server."""
+        
+        self.count = count
+        self.latency = latency
+        self.url = None
+        self._process = None
+    
+    
+    def __enter__(self):
+        """Starts server and sets its url as config.API_URL."""
+        
+        queue = multiprocessing.Queue()
+        self._process = multiprocessing.Process(target=_serve, args=(self.count, self.latency, queue), daemon=True)
+        self._process.start()
+        self.url = queue.get()
+        
+        brickse.config.API_URL = self.url
+        
+        return self
+    
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Stops server."""
+        
+        self._process.terminate()
+        self._process.join()
+
+
+def measure(func, repeat):
+    """Calls given function repeatedly and returns list of durations."""
+    
+    durations = []
+    
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    
+    return durations
+
+
+def summarize(durations):
+    """Creates summary of given durations in milliseconds."""
+    
+    values = sorted(durations)
+    count = len(values)
+    
+    return {
+        'count': count,
+        'mean_ms': 1000 * sum(values) / count,
+        'p50_ms': 1000 * values[count // 2],
+        'p90_ms': 1000 * values[min(count - 1, int(count * 0.9))],
+        'p99_ms': 1000 * values[min(count - 1, int(count * 0.99))],
+        'min_ms': 1000 * values[0],
+        'max_ms': 1000 * values[-1]}
+
+
+def write_results(path, name, results):
+    """Writes results as JSON together with environment info."""
+    
+    data = {
+        'benchmark': name,
+        'brickse': ".".join(str(x) for x in brickse.version),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'results': results}
+    
+    text = json.dumps(data, indent=2)
+    
+    if path:
+        with open(path, 'w', encoding='utf8') as f:
+            f.write(text)
+    
+    print(text)
@@ -4,12 +4,94 @@
 # set version
 version = (0, 2, 0)
 
-import json
+import importlib
 from . import config
-from . import api_lego as lego
-from . import api_users as users
-from . objects import Collection, Theme, Instructions
-from . brickse import Brickse
+
+# define lazily imported attributes
+_LAZY = {
+    'auth': (".auth", None),
+    'metrics': (".metrics", None),
+    'ingest': (".ingest", None),
+    'export': (".export", None),
+    'catalog': (".catalog", None),
+    'codec': (".codec", None),
+    'scheduler': (".scheduler", None),
+    'tracing': (".tracing", None),
+    'breaker': (".breaker", None),
+    'objects': (".objects", None),
+    'request': (".request", None),
+    'cache': (".cache", None),
+    'index': (".index", None),
+    'sync': (".sync", None),
+    'replay': (".replay", None),
+    'server': (".server", None),
+    'warmer': (".warmer", None),
+    'pool': (".pool", None),
+    'lego': (".api_lego", None),
+    'users': (".api_users", None),
+    'Cache': (".cache", "Cache"),
+    'CacheWarmer': (".warmer", "CacheWarmer"),
+    'SetIndex': (".index", "SetIndex"),
+    'InstructionsIndex': (".index", "InstructionsIndex"),
+    'Catalog': (".catalog", "Catalog"),
+    'SnapshotStore': (".sync", "SnapshotStore"),
+    'SyncResult': (".sync", "SyncResult"),
+    'TokenCache': (".auth", "TokenCache"),
+    'AuthError': (".auth", "AuthError"),
+    'deadline': (".request", "deadline"),
+    'prewarm': (".request", "prewarm"),
+    'DeadlineExceeded': (".request", "DeadlineExceeded"),
+    'CircuitOpen': (".breaker", "CircuitOpen"),
+    'track_stale': (".breaker", "track_stale"),
+    'Scheduler': (".scheduler", "Scheduler"),
+    'priority': (".scheduler", "priority"),
+    'Recorder': (".replay", "Recorder"),
+    'Player': (".replay", "Player"),
+    'MockServer': (".server", "MockServer"),
+    'Collection': (".objects", "Collection"),
+    'Theme': (".objects", "Theme"),
+    'Year': (".objects", "Year"),
+    'Instructions': (".objects", "Instructions"),
+    'Image': (".objects", "Image"),
+    'Review': (".objects", "Review"),
+    'Brickse': (".brickse", "Brickse")}
+
+__all__ = ['version', 'config', 'init'] + list(_LAZY)
+
+
+def __getattr__(name):
+    """
+    Imports public modules and classes on first access, so that importing
+    brickse itself costs close to nothing until it is actually used.
+    """
+    
+    # import other submodule
+    if name not in _LAZY:
+        
+        try:
+            module = importlib.import_module("." + name, __name__)
+        
+        except ModuleNotFoundError as e:
+            if e.name != "%s.%s" % (__name__, name):
+                raise
+            raise AttributeError("module 'brickse' has no attribute '%s'" % name) from None
+        
+        globals()[name] = module
+        return module
+    
+    module_name, attr = _LAZY[name]
+    module = importlib.import_module(module_name, __name__)
+    value = module if attr is None else getattr(module, attr)
+    
+    globals()[name] = value
+    
+    return value
+
+
+def __dir__():
+    """Gets available attributes including lazy ones."""
+    
+    return sorted(set(globals()) | set(_LAZY))
 
 
 def init(*args):
@@ -22,8 +104,16 @@ def init(*args):
     arguments are provided they are considered as API_KEY and USER_TOKEN.
     Finally, if three arguments are provided they are considered as API_KEY,
     username and password to retrieve USER_TOKEN from the server.
+    
+    If config.PREWARM is set, connections to the API host are opened in
+    background so that the first request does not have to wait for them.
     """
     
+    # open connections in advance
+    if config.PREWARM and 1 <= len(args) <= 3:
+        from . import request
+        request.prewarm()
+    
     # set API KEY
     if len(args) == 1:
         config.API_KEY = str(args[0])
@@ -36,13 +126,11 @@ def init(*args):
     # set API KEY and retrieve USER TOKEN
     elif len(args) == 3:
         
-        config.API_KEY = str(args[0])
-        response = users.get_token(args[1], args[2])
-        data = json.loads(response.read())
-        config.USER_TOKEN = data.get('hash', None)
+        from . import auth
         
-        if data.get('status', None) == 'error':
-            raise ValueError(data.get('message'))
+        config.API_KEY = str(args[0])
+        config.USER_TOKEN = None
+        config.USER_TOKEN = auth.login(args[1], args[2])
     
     # show help
     else:
@@ -0,0 +1,7 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import sys
+from . cli import main
+
+sys.exit(main())
@@ -0,0 +1,348 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import os
+import json
+import time
+import hashlib
+import threading
+import collections
+from . import config
+from . import api_users as users
+from . request import decode
+
+# define error messages of invalid credentials
+INVALID_TOKEN = "invalid user hash"
+INVALID_LOGIN = "invalid username or password"
+
+# define number of login key hashing iterations
+LOGIN_KEY_ITERATIONS = 100000
+
+# init default cache
+_tokens = None
+_tokens_lock = threading.Lock()
+
+
+class AuthError(ValueError):
+    """Raised when BrickSet rejects login or token check."""
+    
+    
+    def __init__(self, message, invalid=False):
+        """
+        Initializes a new instance of brickse.AuthError.
+        
+        Args:
+            message: str
+                Error message returned by BrickSet.
+            
+            invalid: bool
+                True if the credentials were rejected as invalid, False if
+                the request failed for other reason (e.g. invalid API key or
+                exceeded limits).
+        """
+        
+        super().__init__(message)
+        self.invalid = invalid
+
+
+class TokenCache(object):
+    """Provides a cache of user token validations and login results."""
+    
+    
+    def __init__(self, path=None, ttl=None, negative_ttl=None):
+        """
+        Initializes a new instance of brickse.TokenCache.
+        
+        Args:
+            path: str or None
+                Login results file path. If set to None, login results are
+                kept in memory only.
+            
+            ttl: float or None
+                Time in seconds for which valid tokens are remembered. If set
+                to None, the value of config.TOKEN_TTL is used.
+            
+            negative_ttl: float or None
+                Time in seconds for which invalid tokens are remembered. If set
+                to None, the value of config.TOKEN_NEGATIVE_TTL is used.
+        """
+        
+        super().__init__()
+        
+        self._path = path
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._tokens = collections.OrderedDict()
+        self._logins = {}
+        self._salt = os.urandom(16).hex()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        
+        # load logins (files without salt are ignored)
+        if path and os.path.exists(path):
+            
+            with open(path, 'r', encoding='utf8') as f:
+                data = json.load(f)
+            
+            if 'salt' in data:
+                self._salt = data['salt']
+                self._logins = data.get('logins', {})
+    
+    
+    @property
+    def path(self):
+        """Gets login results file path."""
+        
+        return self._path
+    
+    
+    def get(self, token):
+        """
+        Gets cached validation result of given token.
+        
+        Args:
+            token: str
+                BrickSet user token.
+        
+        Returns:
+            bool or None
+                Cached validation result or None if unknown.
+        """
+        
+        with self._lock:
+            
+            item = self._tokens.get(token, None)
+            
+            if item is None or item[1] <= time.time():
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            return item[0]
+    
+    
+    def set(self, token, valid):
+        """
+        Stores validation result of given token.
+        
+        Args:
+            token: str
+                BrickSet user token.
+            
+            valid: bool
+                Validation result.
+        """
+        
+        if valid:
+            ttl = self._ttl if self._ttl is not None else config.TOKEN_TTL
+        else:
+            ttl = self._negative_ttl if self._negative_ttl is not None else config.TOKEN_NEGATIVE_TTL
+        
+        now = time.time()
+        
+        with self._lock:
+            
+            self._tokens.pop(token, None)
+            
+            # remove expired
+            if len(self._tokens) >= config.TOKEN_CACHE_SIZE:
+                self._tokens = collections.OrderedDict((k, v) for k, v in self._tokens.items() if v[1] > now)
+            
+            # remove oldest
+            while self._tokens and len(self._tokens) >= config.TOKEN_CACHE_SIZE:
+                self._tokens.popitem(last=False)
+            
+            self._tokens[token] = (valid, now + ttl)
+    
+    
+    def get_login(self, username, password):
+        """
+        Gets stored login result.
+        
+        Args:
+            username: str
+                BrickSet login username or email.
+            
+            password: str
+                BrickSet login password.
+        
+        Returns:
+            str or None
+                Stored user token or None if unknown.
+        """
+        
+        key = make_login_key(username, password, self._salt)
+        
+        with self._lock:
+            return self._logins.get(key, None)
+    
+    
+    def set_login(self, username, password, token):
+        """
+        Stores login result.
+        
+        Args:
+            username: str
+                BrickSet login username or email.
+            
+            password: str
+                BrickSet login password.
+            
+            token: str or None
+                Retrieved user token or None to remove the login.
+        """
+        
+        key = make_login_key(username, password, self._salt)
+        
+        with self._lock:
+            
+            if token:
+                self._logins[key] = token
+            else:
+                self._logins.pop(key, None)
+            
+            if not self._path:
+                return
+            
+            temp = "%s.%d.tmp" % (self._path, threading.get_ident())
+            
+            with open(temp, 'w', encoding='utf8') as f:
+                json.dump({'salt': self._salt, 'logins': self._logins}, f)
+            
+            os.replace(temp, self._path)
+
+
+def check_token(token, api_key=None):
+    """
+    Checks whether given user token is valid. Results are cached by default
+    token cache, so that repeated checks do not contact the server.
+    
+    Args:
+        token: str
+            BrickSet user token.
+        
+        api_key: str or None
+            BrickSet API access key. If set to None the one set by
+            brickse.init() is used.
+    
+    Returns:
+        bool
+            True if token is valid.
+    
+    Raises:
+        brickse.AuthError
+            If the check failed for other reason than invalid token.
+    """
+    
+    cache = get_tokens()
+    
+    # use cached result
+    valid = cache.get(token)
+    if valid is not None:
+        return valid
+    
+    # send request
+    response = users.check_token(token, api_key=api_key)
+    data = decode(response)
+    
+    # check error
+    if data.get('status', None) != 'success':
+        
+        message = data.get('message', None) or "Token check failed."
+        if INVALID_TOKEN not in message.lower():
+            raise AuthError(message)
+        
+        cache.set(token, False)
+        return False
+    
+    # store result
+    cache.set(token, True)
+    
+    return True
+
+
+def login(username, password, api_key=None):
+    """
+    Retrieves user token for given credentials. Successful logins are stored
+    by default token cache and persisted into config.LOGIN_PATH if set.
+    
+    Args:
+        username: str
+            BrickSet login username or email.
+        
+        password: str
+            BrickSet login password.
+        
+        api_key: str or None
+            BrickSet API access key. If set to None the one set by
+            brickse.init() is used.
+    
+    Returns:
+        str
+            User token.
+    
+    Raises:
+        brickse.AuthError
+            If the login failed.
+    """
+    
+    cache = get_tokens()
+    
+    # use stored login
+    token = cache.get_login(username, password)
+    if token and cache.get(token) is not False:
+        return token
+    
+    # send request
+    response = users.get_token(username, password, api_key=api_key)
+    data = decode(response)
+    
+    # check error
+    if data.get('status', None) == 'error':
+        
+        message = data.get('message', None) or "Login failed."
+        invalid = INVALID_LOGIN in message.lower()
+        
+        if invalid:
+            cache.set_login(username, password, None)
+        
+        raise AuthError(message, invalid)
+    
+    # store result
+    token = data.get('hash', None)
+    cache.set_login(username, password, token)
+    
+    if token:
+        cache.set(token, True)
+    
+    return token
+
+
+def make_login_key(username, password, salt):
+    """Creates salted login key without exposing the credentials."""
+    
+    data = "%s\0%s" % (username, password)
+    key = hashlib.pbkdf2_hmac('sha256', data.encode('utf8'), bytes.fromhex(salt), LOGIN_KEY_ITERATIONS)
+    
+    return key.hex()
+
+
+def get_tokens():
+    """
+    Gets default token cache with login results stored at config.LOGIN_PATH.
+    
+    Returns:
+        brickse.TokenCache
+            Default token cache.
+    """
+    
+    global _tokens
+    
+    with _tokens_lock:
+        
+        if _tokens is None or _tokens.path != config.LOGIN_PATH:
+            _tokens = TokenCache(config.LOGIN_PATH)
+        
+        return _tokens
@@ -0,0 +1,213 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import time
+import threading
+import contextlib
+import contextvars
+import urllib.error
+from . import config
+
+# define states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# init breakers
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+# init current stale tracker
+_tracker = contextvars.ContextVar("brickse_stale", default=None)
+
+
+class CircuitOpen(urllib.error.URLError):
+    """Raised when request is rejected because the endpoint circuit is open."""
+    
+    
+    def __init__(self, endpoint):
+        """
+        Initializes a new instance of brickse.CircuitOpen.
+        
+        Args:
+            endpoint: str
+                API endpoint name.
+        """
+        
+        super().__init__("Circuit open for endpoint: %s" % endpoint)
+        self.endpoint = endpoint
+
+
+class CircuitBreaker(object):
+    """
+    Provides circuit breaker of a single endpoint. After config.BREAKER_THRESHOLD
+    consecutive failures the circuit opens and requests are rejected
+    immediately. After config.BREAKER_TIMEOUT a single probe request is let
+    through (half-open state), closing the circuit on success or opening it
+    again on failure.
+    """
+    
+    
+    def __init__(self):
+        """Initializes a new instance of brickse.breaker.CircuitBreaker."""
+        
+        super().__init__()
+        
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    
+    def allow(self):
+        """
+        Checks whether request can be sent.
+        
+        Returns:
+            bool
+                True if request can be sent, False if it should be rejected.
+        """
+        
+        with self._lock:
+            
+            if self.state == CLOSED:
+                return True
+            
+            # keep open
+            if self.state == OPEN:
+                
+                if time.time() - self.opened < config.BREAKER_TIMEOUT:
+                    return False
+                
+                self.state = HALF_OPEN
+                self._probing = False
+            
+            # allow single probe
+            if self._probing:
+                return False
+            
+            self._probing = True
+            return True
+    
+    
+    def success(self):
+        """Records successful request."""
+        
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+    
+    
+    def failure(self):
+        """Records failed request."""
+        
+        with self._lock:
+            
+            self.failures += 1
+            self._probing = False
+            
+            if self.state == HALF_OPEN or self.failures >= config.BREAKER_THRESHOLD:
+                self.state = OPEN
+                self.opened = time.time()
+    
+    
+    def cancel(self):
+        """Records request finished without telling the server state."""
+        
+        with self._lock:
+            self._probing = False
+
+
+class StaleTracker(object):
+    """Collects endpoints served by stale data within tracking context."""
+    
+    
+    def __init__(self):
+        """Initializes a new instance of brickse.breaker.StaleTracker."""
+        
+        super().__init__()
+        
+        self.endpoints = set()
+    
+    
+    @property
+    def stale(self):
+        """Checks whether any stale data were served."""
+        
+        return bool(self.endpoints)
+
+
+def get_breaker(endpoint):
+    """
+    Gets circuit breaker of given endpoint.
+    
+    Args:
+        endpoint: str
+            API endpoint name.
+    
+    Returns:
+        brickse.breaker.CircuitBreaker or None
+            Endpoint circuit breaker or None if disabled by
+            config.BREAKER_THRESHOLD.
+    """
+    
+    if not config.BREAKER_THRESHOLD:
+        return None
+    
+    with _breakers_lock:
+        
+        if endpoint not in _breakers:
+            _breakers[endpoint] = CircuitBreaker()
+        
+        return _breakers[endpoint]
+
+
+def get_states():
+    """
+    Gets current state of all circuits.
+    
+    Returns:
+        {str: str}
+            Circuit state by endpoint.
+    """
+    
+    with _breakers_lock:
+        return {k: v.state for k, v in _breakers.items()}
+
+
+def reset():
+    """Closes all circuits."""
+    
+    with _breakers_lock:
+        _breakers.clear()
+
+
+@contextlib.contextmanager
+def track_stale():
+    """
+    Tracks stale responses served within the context, including its worker
+    threads.
+    
+    Yields:
+        brickse.breaker.StaleTracker
+            Tracker of stale responses.
+    """
+    
+    tracker = StaleTracker()
+    token = _tracker.set(tracker)
+    
+    try:
+        yield tracker
+    finally:
+        _tracker.reset(token)
+
+
+def mark_stale(endpoint):
+    """Marks stale response served for given endpoint."""
+    
+    tracker = _tracker.get()
+    if tracker is not None:
+        tracker.endpoints.add(endpoint)
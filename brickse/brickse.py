@@ -1,20 +1,41 @@
 # Created byMartin.cz
 # Copyright (c) Martin Strohalm. All rights reserved.
 
-import json
+import os.path
+import time
+import http.client
+import functools
+import contextvars
+import urllib.parse
 import urllib.request
 import urllib.error
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from . import config
 from . import api_lego as lego
 from . import api_users as users
+from . request import decode, download, urlopen, prewarm, deadline, assert_user_token, DeadlineExceeded
+from . tracing import span, traced
+from . scheduler import priority
 from . objects import *
 
 
+def bounded(func):
+    """Decorates tool method to run within the tool time budget and priority."""
+    
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        
+        with deadline(self._timeout), priority(self._priority):
+            return func(self, *args, **kwargs)
+    
+    return wrapper
+
+
 class Brickse(object):
     """Brickse tool."""
     
     
-    def __init__(self, api_key=None, user_token=None, silent=False):
+    def __init__(self, api_key=None, user_token=None, silent=False, timeout=None, priority=None):
         """
         Initializes a new instance of brickse.Brickse class.
         
@@ -31,6 +52,20 @@ class Brickse(object):
                 If set to True, all HTTP errors will be silenced and methods
                 return None. If set to False, all HTTP errors are raised
                 normally.
+            
+            timeout: float or None
+                Time budget in seconds for every tool call, shared by all its
+                requests, pagination, retries and rate limit waiting. If
+                exceeded, brickse.DeadlineExceeded is raised with partial
+                results available as its 'partial' attribute. If set to None,
+                calls are not limited.
+            
+            priority: str or None
+                Request priority class of the tool calls ('interactive',
+                'batch' or 'idle'). Free request slots are given to higher
+                classes first, so e.g. a tool used for background crawling
+                should use 'batch'. If set to None, the value of
+                config.PRIORITY is used.
         """
         
         super().__init__()
@@ -38,8 +73,18 @@ class Brickse(object):
         self._api_key = api_key
         self._user_token = user_token
         self._silent = silent
+        self._timeout = timeout
+        self._priority = priority
+        
+        self._theme_tree = None
+        
+        # open connections in advance
+        if config.PREWARM:
+            prewarm()
     
     
+    @traced
+    @bounded
     def login(self, username, password):
         """
         Retrieves user login token, which is used to access user account
@@ -57,9 +102,11 @@ class Brickse(object):
                 Returns user token or None if login failed.
         """
         
+        from . import auth
+        
         # send request
         try:
-            response = users.get_token(
+            self._user_token = auth.login(
                 username = username,
                 password = password,
                 api_key = self._api_key)
@@ -68,15 +115,45 @@ class Brickse(object):
             self._on_error(e)
             return None
         
-        # get response data
-        data = json.loads(response.read())
-        
-        # set token
-        self._user_token = data.get('hash', None)
+        except auth.AuthError:
+            self._user_token = None
         
         return self._user_token
     
     
+    @traced
+    @bounded
+    def check_token(self, user_token=None):
+        """
+        Checks whether user token is valid. Results are cached for
+        config.TOKEN_TTL seconds (config.TOKEN_NEGATIVE_TTL for invalid
+        tokens), so that repeated checks do not contact the server.
+        
+        Args:
+            user_token: str or None
+                BrickSet user token. If set to None, current tool token is
+                checked.
+        
+        Returns:
+            bool or None
+                True if token is valid, None if check failed.
+        """
+        
+        from . import auth
+        
+        # send request
+        try:
+            return auth.check_token(
+                token = assert_user_token(user_token or self._user_token),
+                api_key = self._api_key)
+        
+        except (urllib.error.HTTPError, auth.AuthError) as e:
+            self._on_error(e)
+            return None
+    
+    
+    @traced
+    @bounded
     def get_sets(self, query=None, set_id=None, set_number=None, theme=None, subtheme=None, year=None):
         """
         Retrieves a list of sets according to search params.
@@ -105,45 +182,185 @@ class Brickse(object):
                 Sets details.
         """
         
+        from . index import get_index
+        
         sets = []
         page = 1
         
-        while True:
+        try:
             
-            # send request
-            try:
-                response = lego.get_sets(
-                    query = query,
-                    set_id = set_id,
-                    set_number = set_number,
-                    theme = theme,
-                    subtheme = subtheme,
-                    year = year,
-                    extended_data = True,
-                    page = page,
-                    api_key = self._api_key)
+            while True:
+                
+                with span("brickse.page", endpoint="getSets", page=page):
+                    
+                    # send request
+                    try:
+                        response = lego.get_sets(
+                            query = query,
+                            set_id = set_id,
+                            set_number = set_number,
+                            theme = theme,
+                            subtheme = subtheme,
+                            year = year,
+                            extended_data = True,
+                            page = page,
+                            api_key = self._api_key)
+                    
+                    except urllib.error.HTTPError as e:
+                        self._on_error(e)
+                        return None
+                    
+                    # get response data
+                    data = decode(response)
+                    
+                    # create collections
+                    page_sets = [Collection.create(item) for item in data['sets']]
+                    get_index().add(page_sets)
+                    sets.extend(page_sets)
+                    
+                    # check next page
+                    if data['matches'] <= len(sets):
+                        break
+                
+                # get next page
+                page += 1
+        
+        except DeadlineExceeded as e:
+            e.partial = sets
+            raise
+        
+        return sets
+    
+    
+    def iter_sets(self, query=None, set_id=None, set_number=None, theme=None, subtheme=None, year=None):
+        """
+        Iterates over sets according to search params. The pages are retrieved
+        lazily as the sets are consumed, so that only a single page is kept in
+        memory. The tool time budget applies to each page separately.
+        
+        Args:
+            query: str
+                Search term for set number, name, theme and subtheme.
             
-            except urllib.error.HTTPError as e:
-                self._on_error(e)
-                return None
+            set_id: int
+                BrickSet internal set ID.
             
-            # get response data
-            data = json.loads(response.read())
+            set_number: int
+                Full set number including variant.
             
-            # create collections
-            for item in data['sets']:
-                sets.append(Collection.create(item))
+            theme: str, int or (int,)
+                Theme name or ID(s).
+            
+            theme: str, int or (int,)
+                Sub-theme name or ID(s).
+            
+            year: int or (int,)
+                Release year(s).
+        
+        Yields:
+            brickse.Collection
+                Set details.
+        """
+        
+        from . index import get_index
+        
+        count = 0
+        page = 1
+        
+        while True:
+            
+            with deadline(self._timeout), priority(self._priority), span("brickse.page", endpoint="getSets", page=page):
+                
+                # send request
+                try:
+                    response = lego.get_sets(
+                        query = query,
+                        set_id = set_id,
+                        set_number = set_number,
+                        theme = theme,
+                        subtheme = subtheme,
+                        year = year,
+                        extended_data = True,
+                        page = page,
+                        api_key = self._api_key)
+                
+                except urllib.error.HTTPError as e:
+                    self._on_error(e)
+                    return
+                
+                # get response data
+                data = decode(response)
+                
+                # create collections
+                page_sets = [Collection.create(item) for item in data['sets']]
+                get_index().add(page_sets)
+            
+            # yield sets
+            yield from page_sets
+            count += len(page_sets)
             
             # check next page
-            if data['matches'] <= len(sets):
+            if not page_sets or data['matches'] <= count:
                 break
             
             # get next page
             page += 1
+    
+    
+    @traced
+    def export_sets(self, output, format=None, query=None, set_id=None, set_number=None, theme=None, subtheme=None, year=None):
+        """
+        Streams sets according to search params into a file. Pages are
+        retrieved while previous sets are being written, using constant memory
+        regardless of the number of sets.
         
-        return sets
+        Args:
+            output: str
+                Output file path.
+            
+            format: str or None
+                Output format ('jsonl', 'csv' or 'parquet'). If set to None,
+                the format is determined by file extension. Parquet requires
+                pyarrow to be installed.
+            
+            query: str
+                Search term for set number, name, theme and subtheme.
+            
+            set_id: int
+                BrickSet internal set ID.
+            
+            set_number: int
+                Full set number including variant.
+            
+            theme: str, int or (int,)
+                Theme name or ID(s).
+            
+            theme: str, int or (int,)
+                Sub-theme name or ID(s).
+            
+            year: int or (int,)
+                Release year(s).
+        
+        Returns:
+            int
+                Number of exported sets.
+        """
+        
+        from . export import export
+        
+        sets = self.iter_sets(
+            query = query,
+            set_id = set_id,
+            set_number = set_number,
+            theme = theme,
+            subtheme = subtheme,
+            year = year)
+        
+        return export(sets, output, format=format)
     
     
+    @traced
+    @bounded
     def get_set(self, set_id=None, set_number=None):
         """
         Retrieves details about specific set.
@@ -160,6 +377,8 @@ class Brickse(object):
                 Set details.
         """
         
+        from . index import get_index
+        
         # send request
         try:
             response = lego.get_set(
@@ -172,14 +391,19 @@ class Brickse(object):
             return None
         
         # get response data
-        data = json.loads(response.read()).get('sets', None)
+        data = decode(response).get('sets', None)
         if not data:
             return None
         
         # create set
-        return Collection.create(data[0])
+        collection = Collection.create(data[0])
+        get_index().add([collection])
+        
+        return collection
     
     
+    @traced
+    @bounded
     def get_set_instructions(self, set_id=None, set_number=None):
         """
         Retrieves a list of instructions for the specified set.
@@ -196,20 +420,147 @@ class Brickse(object):
                 Set instructions.
         """
         
+        from . index import get_instructions_index
+        
         instructions = []
         
         # get internal ID
+        set_id = self._resolve_set_id(set_id, set_number)
         if set_id is None:
+            return None
+        
+        # send request
+        try:
+            response = lego.get_set_instructions(
+                set_id = set_id,
+                api_key = self._api_key)
+        
+        except urllib.error.HTTPError as e:
+            self._on_error(e)
+            return None
+        
+        # get response data
+        data = decode(response).get('instructions', None)
+        
+        # create instructions
+        for item in data or ():
+            instructions.append(Instructions.create(item))
+        
+        get_instructions_index().add(set_id, instructions)
+        
+        return instructions or None
+    
+    
+    @traced
+    @bounded
+    def get_set_manual(self, set_id=None, set_number=None, region=None):
+        """
+        Retrieves the latest complete manual for the specified set. All parts
+        of multi-part manual are included in order. Instructions are retrieved
+        only if the set is not yet known to the default instructions index.
+        
+        Args:
+            set_id: int
+                BrickSet internal set ID.
             
-            collection = self.get_set(set_number=set_number)
-            if collection is None:
-                return None
+            set_number: int
+                Full set number including variant.
+            
+            region: str or None
+                Region code (e.g. 'NA' or 'IN'). If no manual is available for
+                the region, global manual is used.
+        
+        Returns:
+            (brickse.Instructions,) or None
+                Manual parts.
+        """
+        
+        from . index import get_instructions_index
+        
+        # get internal ID
+        set_id = self._resolve_set_id(set_id, set_number)
+        if set_id is None:
+            return None
+        
+        # retrieve instructions
+        index = get_instructions_index()
+        if set_id not in index:
+            self.get_set_instructions(set_id=set_id)
+        
+        # get manual
+        manual = index.get(set_id, region)
+        if not manual:
+            return None
+        
+        return list(manual)
+    
+    
+    @traced
+    @bounded
+    def get_sets_manuals(self, set_ids, region=None, workers=None):
+        """
+        Retrieves the latest complete manuals for multiple sets concurrently.
+        Duplicate IDs are requested only once.
+        
+        Args:
+            set_ids: (int,)
+                BrickSet internal set IDs.
+            
+            region: str or None
+                Region code (e.g. 'NA' or 'IN'). If no manual is available for
+                the region, global manual is used.
             
-            set_id = collection.set_id
+            workers: int or None
+                Maximum number of concurrent requests. If set to None, the
+                value of config.MAX_WORKERS is used.
+        
+        Returns:
+            {int: (brickse.Instructions,) or None}
+                Manual parts by set ID.
+        """
+        
+        def fetch(set_id):
+            return self.get_set_manual(set_id=set_id, region=region)
+        
+        set_ids = list(dict.fromkeys(set_ids))
+        try:
+            results = self._map(fetch, set_ids, workers)
+        
+        except DeadlineExceeded as e:
+            e.partial = dict(zip(set_ids, e.partial))
+            raise
+        
+        return dict(zip(set_ids, results))
+    
+    
+    @traced
+    @bounded
+    def get_set_images(self, set_id=None, set_number=None):
+        """
+        Retrieves a list of additional images for the specified set.
+        
+        Args:
+            set_id: int
+                BrickSet internal set ID.
+            
+            set_number: int
+                Full set number including variant.
+        
+        Returns:
+            (brickse.Image,) or None
+                Set images.
+        """
+        
+        images = []
+        
+        # get internal ID
+        set_id = self._resolve_set_id(set_id, set_number)
+        if set_id is None:
+            return None
         
         # send request
         try:
-            response = lego.get_set_instructions(
+            response = lego.get_set_images(
                 set_id = set_id,
                 api_key = self._api_key)
         
@@ -218,17 +569,128 @@ class Brickse(object):
             return None
         
         # get response data
-        data = json.loads(response.read()).get('instructions', None)
+        data = decode(response).get('additionalImages', None)
         if not data:
             return None
         
-        # create instructions
+        # create images
         for item in data:
-            instructions.append(Instructions.create(item))
+            images.append(Image.create(item))
         
-        return instructions
+        return images
+    
     
+    @traced
+    @bounded
+    def get_sets_images(self, set_ids, workers=None):
+        """
+        Retrieves additional images for multiple sets concurrently. Duplicate
+        IDs are requested only once.
+        
+        Args:
+            set_ids: (int,)
+                BrickSet internal set IDs.
+            
+            workers: int or None
+                Maximum number of concurrent requests. If set to None, the
+                value of config.MAX_WORKERS is used.
+        
+        Returns:
+            {int: (brickse.Image,) or None}
+                Set images by set ID.
+        """
+        
+        set_ids = list(dict.fromkeys(set_ids))
+        try:
+            results = self._map(self.get_set_images, set_ids, workers)
+        
+        except DeadlineExceeded as e:
+            e.partial = dict(zip(set_ids, e.partial))
+            raise
+        
+        return dict(zip(set_ids, results))
     
+    
+    @traced
+    @bounded
+    def get_set_reviews(self, set_id=None, set_number=None):
+        """
+        Retrieves a list of user reviews for the specified set.
+        
+        Args:
+            set_id: int
+                BrickSet internal set ID.
+            
+            set_number: int
+                Full set number including variant.
+        
+        Returns:
+            (brickse.Review,) or None
+                Set reviews.
+        """
+        
+        reviews = []
+        
+        # get internal ID
+        set_id = self._resolve_set_id(set_id, set_number)
+        if set_id is None:
+            return None
+        
+        # send request
+        try:
+            response = lego.get_set_reviews(
+                set_id = set_id,
+                api_key = self._api_key)
+        
+        except urllib.error.HTTPError as e:
+            self._on_error(e)
+            return None
+        
+        # get response data
+        data = decode(response).get('reviews', None)
+        if not data:
+            return None
+        
+        # create reviews
+        for item in data:
+            reviews.append(Review.create(item))
+        
+        return reviews
+    
+    
+    @traced
+    @bounded
+    def get_sets_reviews(self, set_ids, workers=None):
+        """
+        Retrieves user reviews for multiple sets concurrently. Duplicate IDs
+        are requested only once.
+        
+        Args:
+            set_ids: (int,)
+                BrickSet internal set IDs.
+            
+            workers: int or None
+                Maximum number of concurrent requests. If set to None, the
+                value of config.MAX_WORKERS is used.
+        
+        Returns:
+            {int: (brickse.Review,) or None}
+                Set reviews by set ID.
+        """
+        
+        set_ids = list(dict.fromkeys(set_ids))
+        try:
+            results = self._map(self.get_set_reviews, set_ids, workers)
+        
+        except DeadlineExceeded as e:
+            e.partial = dict(zip(set_ids, e.partial))
+            raise
+        
+        return dict(zip(set_ids, results))
+    
+    
+    @traced
+    @bounded
     def get_themes(self):
         """
         Retrieves a list of themes, with the total number of sets in each.
@@ -250,7 +712,7 @@ class Brickse(object):
             return None
         
         # get response data
-        data = json.loads(response.read()).get('themes', None)
+        data = decode(response).get('themes', None)
         if not data:
             return None
         
@@ -261,6 +723,8 @@ class Brickse(object):
         return themes
     
     
+    @traced
+    @bounded
     def get_subthemes(self, theme):
         """
         Retrieves a list of sub-themes for a given theme, with the total number
@@ -288,7 +752,7 @@ class Brickse(object):
             return None
         
         # get response data
-        data = json.loads(response.read()).get('subthemes', None)
+        data = decode(response).get('subthemes', None)
         if not data:
             return None
         
@@ -300,6 +764,129 @@ class Brickse(object):
         return themes
     
     
+    @traced
+    @bounded
+    def get_theme_years(self, theme=None):
+        """
+        Retrieves a list of years for a given theme, with the total number of
+        sets in each.
+        
+        Args:
+            theme: str or None
+                Main theme name or None for all.
+        
+        Returns:
+            (brickse.Year,) or None
+                Release years.
+        """
+        
+        years = []
+        
+        # send request
+        try:
+            response = lego.get_theme_years(
+                theme = theme,
+                api_key = self._api_key)
+        
+        except urllib.error.HTTPError as e:
+            self._on_error(e)
+            return None
+        
+        # get response data
+        data = decode(response).get('years', None)
+        if not data:
+            return None
+        
+        # create years
+        for item in data:
+            years.append(Year.create(item))
+        
+        return years
+    
+    
+    @traced
+    @bounded
+    def get_themes_years(self, themes, workers=None):
+        """
+        Retrieves release years for multiple themes concurrently. Duplicate
+        themes are requested only once.
+        
+        Args:
+            themes: (str,)
+                Main theme names.
+            
+            workers: int or None
+                Maximum number of concurrent requests. If set to None, the
+                value of config.MAX_WORKERS is used.
+        
+        Returns:
+            {str: (brickse.Year,) or None}
+                Release years by theme name.
+        """
+        
+        themes = list(dict.fromkeys(themes))
+        try:
+            results = self._map(self.get_theme_years, themes, workers)
+        
+        except DeadlineExceeded as e:
+            e.partial = dict(zip(themes, e.partial))
+            raise
+        
+        return dict(zip(themes, results))
+    
+    
+    @traced
+    @bounded
+    def get_theme_tree(self, refresh=False, workers=None):
+        """
+        Retrieves all themes together with their sub-themes and release years.
+        Sub-themes and years of individual themes are retrieved concurrently
+        while respecting the request rate limit. The tree is kept by the tool
+        and reused by subsequent calls.
+        
+        Args:
+            refresh: bool
+                If set to True, the tree is retrieved again.
+            
+            workers: int or None
+                Maximum number of concurrent requests. If set to None, the
+                value of config.MAX_WORKERS is used.
+        
+        Returns:
+            (brickse.Theme,) or None
+                Main themes with sub-themes set as children and release years
+                set as years.
+        """
+        
+        # use existing tree
+        if self._theme_tree is not None and not refresh:
+            return self._theme_tree
+        
+        # get main themes
+        themes = self.get_themes()
+        if themes is None:
+            return None
+        
+        # expand themes
+        def expand(theme):
+            theme.children = self.get_subthemes(theme.name) or []
+            theme.years = self.get_theme_years(theme.name) or []
+        
+        try:
+            self._map(expand, themes, workers)
+        
+        except DeadlineExceeded as e:
+            e.partial = themes
+            raise
+        
+        # keep tree
+        self._theme_tree = themes
+        
+        return themes
+    
+    
+    @traced
+    @bounded
     def get_users_sets(self, query=None, set_id=None, set_number=None, theme=None, subtheme=None, year=None, owned=False, wanted=False):
         """
         Retrieves a list of user sets according to search params.
@@ -331,48 +918,37 @@ class Brickse(object):
                 Sets details.
         """
         
-        sets = []
-        page = 1
+        from . index import get_index
         
-        while True:
-            
-            # send request
-            try:
-                response = users.get_sets(
-                    query = query,
-                    set_id = set_id,
-                    set_number = set_number,
-                    theme = theme,
-                    subtheme = subtheme,
-                    year = year,
-                    extended_data = True,
-                    page = page,
-                    owned = owned,
-                    wanted = wanted,
-                    api_key = self._api_key,
-                    user_token = self._user_token)
-            
-            except urllib.error.HTTPError as e:
-                self._on_error(e)
-                return None
-            
-            # get response data
-            data = json.loads(response.read())
-            
-            # create collections
-            for item in data['sets']:
-                sets.append(Collection.create(item))
-            
-            # check next page
-            if data['matches'] <= len(sets):
-                break
-            
-            # get next page
-            page += 1
+        # get data
+        try:
+            data = self._get_users_sets_data(
+                user_token = self._user_token,
+                query = query,
+                set_id = set_id,
+                set_number = set_number,
+                theme = theme,
+                subtheme = subtheme,
+                year = year,
+                owned = owned,
+                wanted = wanted)
+        
+        except DeadlineExceeded as e:
+            e.partial = [Collection.create(item) for item in e.partial]
+            raise
+        
+        if data is None:
+            return None
+        
+        # create collections
+        sets = [Collection.create(item) for item in data]
+        get_index().add(sets)
         
         return sets
     
     
+    @traced
+    @bounded
     def get_users_minifigs(self, query=None, owned=False, wanted=False):
         """
         Retrieves a list of minifigs owned/wanted by a user.
@@ -392,30 +968,179 @@ class Brickse(object):
                 Minifigs details.
         """
         
-        minifigs = []
-        
-        # send request
-        try:
-            response = users.get_minifigs(
-                api_key = self._api_key,
-                user_token = self._user_token)
+        # get data
+        data = self._get_users_minifigs_data(
+            user_token = self._user_token,
+            query = query,
+            owned = owned,
+            wanted = wanted)
         
-        except urllib.error.HTTPError as e:
-            self._on_error(e)
-            return None
-        
-        # get response data
-        data = json.loads(response.read()).get('minifigs', None)
         if not data:
             return None
         
         # create minifigs
-        for item in data:
-            minifigs.append(Minifig.create(item))
+        return [Minifig.create(item) for item in data]
+    
+    
+    def get_users_collections(self, user_tokens, owned=True, wanted=True, minifigs=True, workers=None):
+        """
+        Retrieves collections of multiple users concurrently. Each user is
+        processed using its own token only, while all the requests share the
+        same API key rate limit. Results are yielded as soon as all data of
+        particular user are available.
+        
+        Args:
+            user_tokens: (str,)
+                BrickSet user tokens. Duplicates are processed only once.
+            
+            owned: bool
+                If set to True, owned sets are retrieved.
+            
+            wanted: bool
+                If set to True, wanted sets are retrieved.
+            
+            minifigs: bool
+                If set to True, minifigs are retrieved.
+            
+            workers: int or None
+                Maximum number of users processed concurrently. If set to None,
+                the value of config.MAX_WORKERS is used.
+        
+        Yields:
+            (str, dict)
+                User token and retrieved data with available keys 'owned',
+                'wanted' and 'minifigs'. Failed parts are set to None. If
+                a user fails completely, all its parts are set to None and the
+                first such error is processed after all other users are
+                yielded.
+        """
+        
+        from . index import get_index
+        
+        user_tokens = list(dict.fromkeys(user_tokens))
+        
+        # check tokens
+        if not all(user_tokens):
+            raise ValueError("User token must be specified for every user.")
+        
+        # retrieve data
+        def fetch(user_token):
+            
+            results = {}
+            
+            if owned:
+                data = self._get_users_sets_data(user_token, owned=True)
+                results['owned'] = None if data is None else [Collection.create(x) for x in data]
+            
+            if wanted:
+                data = self._get_users_sets_data(user_token, wanted=True)
+                results['wanted'] = None if data is None else [Collection.create(x) for x in data]
+            
+            if minifigs:
+                data = self._get_users_minifigs_data(user_token)
+                results['minifigs'] = None if data is None else [Minifig.create(x) for x in data]
+            
+            get_index().add(results.get('owned', None) or [])
+            get_index().add(results.get('wanted', None) or [])
+            
+            return results
+        
+        parts = [k for k, v in (('owned', owned), ('wanted', wanted), ('minifigs', minifigs)) if v]
+        futures = {}
+        error = None
+        
+        executor = ThreadPoolExecutor(workers or config.MAX_WORKERS)
+        
+        try:
+            
+            futures = {executor.submit(contextvars.copy_context().run, fetch, token): token for token in user_tokens}
+            
+            for future in as_completed(futures):
+                
+                try:
+                    results = future.result()
+                
+                except DeadlineExceeded:
+                    raise
+                
+                except Exception as e:
+                    error = error or e
+                    results = dict.fromkeys(parts)
+                
+                yield futures[future], results
+        
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+        
+        # process first failure
+        if error is not None:
+            self._on_error(error)
+    
+    
+    @traced
+    @bounded
+    def sync_users_sets(self, owned=False, wanted=False, quick=False):
+        """
+        Retrieves changes of user sets since the last sync. The last known
+        collection is stored per user token in the default snapshot store
+        (see config.SYNC_PATH) and updated by each sync.
+        
+        By default the whole collection is downloaded and compared. In quick
+        mode only the number of sets is checked if the collection was fully
+        downloaded within config.SYNC_FULL_INTERVAL and the download is
+        skipped if it did not change. Note that such check misses any change
+        not affecting the number of sets (e.g. set both added and removed or
+        changed quantity, owned or wanted state) until the next full sync.
+        
+        Args:
+            owned: bool
+                If set to True, owned sets are synced only.
+            
+            wanted: bool
+                If set to True, wanted sets are synced only.
+            
+            quick: bool
+                If set to True, download is skipped if the number of sets did
+                not change since recent full sync.
+        
+        Returns:
+            brickse.SyncResult or None
+                Added, removed and changed sets. Raw data of changed sets are
+                provided as (old, new) pairs by SyncResult.changes.
+        """
         
-        return minifigs
+        return self._sync_users_sets(self._user_token, owned, wanted, quick)
     
     
+    @traced
+    @bounded
+    def sync_users_minifigs(self, owned=False, wanted=False):
+        """
+        Retrieves changes of user minifigs since the last sync. The last known
+        collection is stored per user token in the default snapshot store
+        (see config.SYNC_PATH) and updated by each sync.
+        
+        Args:
+            owned: bool
+                If set to True, owned minifigs are synced only.
+            
+            wanted: bool
+                If set to True, wanted minifigs are synced only.
+        
+        Returns:
+            brickse.SyncResult or None
+                Added, removed and changed minifigs. Raw data of changed
+                minifigs are provided as (old, new) pairs by
+                SyncResult.changes.
+        """
+        
+        return self._sync_users_minifigs(self._user_token, owned, wanted)
+    
+    
+    @traced
+    @bounded
     def get_file(self, url):
         """
         Downloads a file from given URL.
@@ -434,14 +1159,319 @@ class Brickse(object):
         
         # send request
         try:
-            response = urllib.request.urlopen(request)
+            response = urlopen(request)
+            return response.read()
+        
+        except DeadlineExceeded:
+            raise
+        
+        except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+            self._on_error(e)
+            return None
+    
+    
+    @traced
+    @bounded
+    def download_file(self, url, output, resume=True):
+        """
+        Downloads a file from given URL directly into a file or file-like
+        object. Data are written in chunks so the whole file is never kept in
+        memory. Interrupted downloads are resumed by HTTP Range requests.
+        
+        When the output is a path, data are first written into a temporary
+        '.part' file, which is renamed once the download is complete. If such
+        file already exists, the download continues from its current size.
+        
+        Args:
+            url: str
+                URL of the file to download.
+            
+            output: str or file
+                Output file path or binary file-like object.
+            
+            resume: bool
+                If set to True, existing partial download is resumed.
+        
+        Returns:
+            str, file or None
+                Given output or None if download failed.
+        """
+        
+        # download into file object
+        if not isinstance(output, str):
+            
+            try:
+                download(url, output)
+            
+            except DeadlineExceeded:
+                raise
+            
+            except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+                self._on_error(e)
+                return None
+            
+            return output
+        
+        # init folder
+        folder = os.path.dirname(output)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        
+        # get partial file
+        part = output + ".part"
+        if not resume and os.path.exists(part):
+            os.remove(part)
+        
+        # download into partial file
+        with open(part, 'ab') as stream:
+            
+            try:
+                download(url, stream, offset=stream.tell())
+            
+            except DeadlineExceeded:
+                raise
+            
+            except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+                self._on_error(e)
+                return None
+        
+        # finalize file
+        os.replace(part, output)
+        
+        return output
+    
+    
+    @traced
+    @bounded
+    def download_instructions(self, instructions, folder, resume=True, workers=None):
+        """
+        Downloads instructions PDF files into given folder. All the files (e.g.
+        all parts of a multi-part manual) are downloaded concurrently.
+        
+        Args:
+            instructions: (brickse.Instructions,)
+                Instructions to download.
+            
+            folder: str
+                Output folder path.
+            
+            resume: bool
+                If set to True, existing partial downloads are resumed.
+            
+            workers: int or None
+                Maximum number of concurrent downloads. If set to None, the
+                value of config.MAX_WORKERS is used.
+        
+        Returns:
+            (str or None,)
+                Paths of downloaded files in the same order as given
+                instructions. None is used for failed downloads.
+        """
+        
+        # get output paths
+        paths = []
+        for item in instructions:
+            name = os.path.basename(urllib.parse.urlparse(item.url).path)
+            paths.append(os.path.join(folder, name))
+        
+        # download files
+        def fetch(item):
+            return self.download_file(item[0].url, item[1], resume)
+        
+        return self._map(fetch, list(zip(instructions, paths)), workers)
+    
+    
+    def _get_users_sets_data(self, user_token, owned=False, wanted=False, **filters):
+        """Retrieves raw data of all user sets."""
+        
+        sets = []
+        page = 1
+        
+        try:
+            
+            while True:
+                
+                with span("brickse.page", endpoint="getSets", page=page):
+                    
+                    # send request
+                    try:
+                        response = users.get_sets(
+                            extended_data = True,
+                            page = page,
+                            owned = owned,
+                            wanted = wanted,
+                            api_key = self._api_key,
+                            user_token = user_token,
+                            **filters)
+                    
+                    except urllib.error.HTTPError as e:
+                        self._on_error(e)
+                        return None
+                    
+                    # get response data
+                    data = decode(response)
+                    sets.extend(data['sets'])
+                    
+                    # check next page
+                    if data['matches'] <= len(sets):
+                        break
+                
+                # get next page
+                page += 1
+        
+        except DeadlineExceeded as e:
+            e.partial = sets
+            raise
+        
+        return sets
+    
+    
+    def _get_users_minifigs_data(self, user_token, query=None, owned=False, wanted=False):
+        """Retrieves raw data of all user minifigs."""
+        
+        # send request
+        try:
+            response = users.get_minifigs(
+                query = query,
+                owned = owned,
+                wanted = wanted,
+                api_key = self._api_key,
+                user_token = user_token)
         
         except urllib.error.HTTPError as e:
             self._on_error(e)
             return None
         
         # get response data
-        return response.read()
+        return decode(response).get('minifigs', None) or []
+    
+    
+    def _sync_users_sets(self, user_token, owned, wanted, quick):
+        """Retrieves changes of user sets for given token."""
+        
+        from . index import get_index
+        from . sync import SyncResult, get_store, make_snapshot, diff
+        
+        user_token = assert_user_token(user_token)
+        
+        # get last snapshot
+        store = get_store()
+        kind = "sets-%d%d" % (owned, wanted)
+        snapshot = store.load(user_token, kind)
+        
+        # check number of sets
+        if snapshot and quick and time.time() - snapshot['time'] < config.SYNC_FULL_INTERVAL:
+            
+            try:
+                response = users.get_sets(
+                    owned = owned,
+                    wanted = wanted,
+                    page_size = 1,
+                    api_key = self._api_key,
+                    user_token = user_token)
+            
+            except urllib.error.HTTPError as e:
+                self._on_error(e)
+                return None
+            
+            if decode(response)['matches'] == snapshot['count']:
+                return SyncResult(checked=True)
+        
+        # get current sets
+        data = self._get_users_sets_data(user_token, owned=owned, wanted=wanted)
+        if data is None:
+            return None
+        
+        # compare snapshots
+        current = make_snapshot(data, 'setID')
+        added, removed, changed = diff(snapshot['items'] if snapshot else {}, current['items'])
+        store.save(user_token, kind, current)
+        
+        # create collections
+        result = SyncResult(
+            added = [Collection.create(item) for item in added],
+            removed = [Collection.create(item) for item in removed],
+            changed = [Collection.create(new) for old, new in changed],
+            changes = changed)
+        
+        get_index().add(result.added)
+        
+        return result
+    
+    
+    def _sync_users_minifigs(self, user_token, owned, wanted):
+        """Retrieves changes of user minifigs for given token."""
+        
+        from . sync import SyncResult, get_store, make_snapshot, diff
+        
+        user_token = assert_user_token(user_token)
+        
+        # get last snapshot
+        store = get_store()
+        kind = "minifigs-%d%d" % (owned, wanted)
+        snapshot = store.load(user_token, kind)
+        
+        # get current minifigs
+        data = self._get_users_minifigs_data(user_token, owned=owned, wanted=wanted)
+        if data is None:
+            return None
+        
+        # compare snapshots
+        current = make_snapshot(data, 'minifigNumber')
+        added, removed, changed = diff(snapshot['items'] if snapshot else {}, current['items'])
+        store.save(user_token, kind, current)
+        
+        # create minifigs
+        return SyncResult(
+            added = [Minifig.create(item) for item in added],
+            removed = [Minifig.create(item) for item in removed],
+            changed = [Minifig.create(new) for old, new in changed],
+            changes = changed)
+    
+    
+    def _resolve_set_id(self, set_id, set_number):
+        """Gets set ID using local index or server if needed."""
+        
+        from . index import get_index
+        
+        if set_id is not None:
+            return set_id
+        
+        # use index
+        set_id = get_index().get(set_number)
+        if set_id is not None:
+            return set_id
+        
+        # get from server
+        collection = self.get_set(set_number=set_number)
+        if collection is None:
+            return None
+        
+        return collection.set_id
+    
+    
+    def _map(self, func, items, workers=None):
+        """Calls given function for each item concurrently within current context."""
+        
+        results = []
+        exceeded = None
+        
+        with ThreadPoolExecutor(workers or config.MAX_WORKERS) as executor:
+            
+            futures = [executor.submit(contextvars.copy_context().run, func, item) for item in items]
+            
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except DeadlineExceeded as e:
+                    results.append(None)
+                    exceeded = e
+        
+        # raise with partial results
+        if exceeded is not None:
+            raise DeadlineExceeded(str(exceeded), partial=results)
+        
+        return results
     
     
     def _on_error(self, error):
@@ -0,0 +1,580 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import io
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import collections
+import urllib.parse
+from . import config
+
+# define access counts file name
+POPULARITY_FILE = "popularity.json"
+
+# define request parameters containing credentials
+SECRET_PARAMETERS = ('username', 'password', 'userHash')
+
+# define response status pattern and scanned length
+STATUS_PATTERN = re.compile(rb'"status"\s*:\s*"([^"]*)"')
+STATUS_SCAN = 1024
+
+
+class Cache(object):
+    """Provides a response cache with optional disk persistence."""
+    
+    
+    def __init__(self, path=None, ttl=None, size=None):
+        """
+        Initializes a new instance of brickse.Cache.
+        
+        Args:
+            path: str or None
+                Cache folder path. If set to None, responses are kept in
+                memory only.
+            
+            ttl: float or None
+                Time in seconds for which cached responses are considered
+                fresh. If set to None, the value of config.CACHE_TTL is used.
+            
+            size: int or None
+                Maximum number of responses kept in memory. Least recently
+                used responses are dropped from memory (but kept on disk if
+                path is set). If set to None, the value of config.CACHE_SIZE
+                is used.
+        """
+        
+        super().__init__()
+        
+        self._path = path
+        self._ttl = ttl
+        self._size = size
+        self._entries = collections.OrderedDict()
+        self._access = {}
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.revalidations = 0
+        
+        # init folder
+        if path:
+            os.makedirs(path, exist_ok=True)
+        
+        # load access counts
+        if path and os.path.exists(os.path.join(path, POPULARITY_FILE)):
+            with open(os.path.join(path, POPULARITY_FILE), 'r', encoding='utf8') as f:
+                self._access = json.load(f)
+    
+    
+    @property
+    def ttl(self):
+        """Gets current time to live in seconds."""
+        
+        return self._ttl if self._ttl is not None else config.CACHE_TTL
+    
+    
+    def stats(self):
+        """
+        Gets cache statistics.
+        
+        Returns:
+            dict
+                Number of fresh hits, misses, full refreshes of expired entries
+                and revalidations, which avoided full download.
+        """
+        
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'revalidations': self.revalidations}
+    
+    
+    def lookup(self, url, parameters, track=True):
+        """
+        Gets cache key and cached entry for given request.
+        
+        Args:
+            url: str
+                Request URL.
+            
+            parameters: dict
+                Request parameters.
+            
+            track: bool
+                If set to True, the access is counted into statistics and
+                popularity of the entry.
+        
+        Returns:
+            (str, brickse.cache.CacheEntry or None)
+                Cache key and cached entry. The entry may be expired.
+        """
+        
+        key = make_key(url, parameters)
+        entry = self.get(key)
+        
+        if not track:
+            return key, entry
+        
+        with self._lock:
+            
+            if entry is None:
+                self.misses += 1
+            elif not entry.expired:
+                self.hits += 1
+            
+            # count access
+            access = self._access.get(key, None)
+            if access is None:
+                self._access[key] = [1, url.rsplit("/", 1)[-1]]
+            else:
+                access[0] += 1
+        
+        return key, entry
+    
+    
+    def popular(self, count=None, endpoints=None):
+        """
+        Gets keys of the most frequently accessed entries.
+        
+        Args:
+            count: int or None
+                Maximum number of keys to return. If set to None, all keys are
+                returned.
+            
+            endpoints: (str,) or None
+                Endpoint names to include. If set to None, all endpoints are
+                included.
+        
+        Returns:
+            (str,)
+                Cache keys ordered by access frequency.
+        """
+        
+        with self._lock:
+            items = [(v[0], k) for k, v in self._access.items() if endpoints is None or v[1] in endpoints]
+        
+        items.sort(reverse=True)
+        
+        return tuple(k for c, k in items[:count])
+    
+    
+    def decay(self, factor=0.5):
+        """
+        Reduces access counts, so that popularity follows recent traffic.
+        Rarely accessed entries are forgotten.
+        
+        Args:
+            factor: float
+                Multiplier of current counts.
+        """
+        
+        with self._lock:
+            
+            for key, access in list(self._access.items()):
+                
+                access[0] *= factor
+                if access[0] < 0.5:
+                    del self._access[key]
+    
+    
+    def save_popularity(self):
+        """Saves access counts into cache folder to survive restarts."""
+        
+        if not self._path:
+            return
+        
+        path = os.path.join(self._path, POPULARITY_FILE)
+        temp = "%s.%d.tmp" % (path, threading.get_ident())
+        
+        with self._lock:
+            data = json.dumps(self._access)
+        
+        with open(temp, 'w', encoding='utf8') as f:
+            f.write(data)
+        
+        os.replace(temp, path)
+    
+    
+    def get(self, key):
+        """
+        Gets cached entry for given key.
+        
+        Args:
+            key: str
+                Cache key.
+        
+        Returns:
+            brickse.cache.CacheEntry or None
+                Cached entry. The entry may be expired.
+        """
+        
+        # check memory
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        
+        if entry is not None or not self._path:
+            return entry
+        
+        # load from disk
+        entry = self._load(key)
+        if entry is not None:
+            with self._lock:
+                self._remember(key, entry)
+        
+        return entry
+    
+    
+    def set(self, key, entry):
+        """
+        Stores given entry into the cache.
+        
+        Args:
+            key: str
+                Cache key.
+            
+            entry: brickse.cache.CacheEntry
+                Entry to store.
+        """
+        
+        with self._lock:
+            
+            if key in self._entries:
+                self.refreshes += 1
+            
+            self._remember(key, entry)
+        
+        if self._path:
+            self._save(key, entry)
+    
+    
+    def revalidate(self, key, entry):
+        """
+        Extends lifetime of given entry after the server confirmed it has not
+        changed.
+        
+        Args:
+            key: str
+                Cache key.
+            
+            entry: brickse.cache.CacheEntry
+                Entry to revalidate.
+        """
+        
+        entry.expires = time.time() + self.ttl
+        
+        with self._lock:
+            self.revalidations += 1
+            self._remember(key, entry)
+        
+        if self._path:
+            self._save(key, entry)
+    
+    
+    def clear(self):
+        """Removes all cached entries."""
+        
+        with self._lock:
+            self._entries.clear()
+        
+        if not self._path:
+            return
+        
+        for name in os.listdir(self._path):
+            if name.endswith(".cache"):
+                os.remove(os.path.join(self._path, name))
+    
+    
+    def _remember(self, key, entry):
+        """Stores entry into memory and drops least recently used ones."""
+        
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        
+        size = self._size if self._size is not None else config.CACHE_SIZE
+        while len(self._entries) > size:
+            self._entries.popitem(last=False)
+    
+    
+    def _load(self, key):
+        """Loads entry from disk."""
+        
+        path = os.path.join(self._path, key + ".cache")
+        if not os.path.exists(path):
+            return None
+        
+        with open(path, 'rb') as f:
+            meta = json.loads(f.readline())
+            body = f.read()
+        
+        return CacheEntry(body=body, **meta)
+    
+    
+    def _save(self, key, entry):
+        """Saves entry to disk."""
+        
+        path = os.path.join(self._path, key + ".cache")
+        
+        meta = {
+            'url': entry.url,
+            'parameters': entry.parameters,
+            'post': entry.post,
+            'etag': entry.etag,
+            'modified': entry.modified,
+            'expires': entry.expires}
+        
+        temp = "%s.%d.tmp" % (path, threading.get_ident())
+        
+        with open(temp, 'wb') as f:
+            f.write(json.dumps(meta).encode('utf8'))
+            f.write(b"\n")
+            f.write(entry.body)
+        
+        os.replace(temp, path)
+
+
+class CacheEntry(object):
+    """Represents a single cached response."""
+    
+    
+    def __init__(self, url, parameters, post, body, etag=None, modified=None, expires=None):
+        """
+        Initializes a new instance of brickse.cache.CacheEntry.
+        
+        Args:
+            url: str
+                Request URL.
+            
+            parameters: dict
+                Request parameters without API key.
+            
+            post: bool
+                Specifies whether the request was sent as POST.
+            
+            body: bytes
+                Response body.
+            
+            etag: str or None
+                Response ETag validator.
+            
+            modified: str or None
+                Response Last-Modified validator.
+            
+            expires: float or None
+                Expiration timestamp.
+        """
+        
+        super().__init__()
+        
+        self.url = url
+        self.parameters = parameters
+        self.post = post
+        self.body = body
+        self.etag = etag
+        self.modified = modified
+        self.expires = expires or 0
+    
+    
+    @property
+    def expired(self):
+        """Checks whether the entry is expired."""
+        
+        return self.expires <= time.time()
+    
+    
+    def validators(self):
+        """
+        Gets conditional request headers.
+        
+        Returns:
+            dict
+                Conditional headers for available validators.
+        """
+        
+        headers = {}
+        
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        
+        if self.modified:
+            headers['If-Modified-Since'] = self.modified
+        
+        return headers
+    
+    
+    def response(self, stale=False):
+        """
+        Creates response from cached data.
+        
+        Args:
+            stale: bool
+                Specifies whether the data are served instead of failed
+                request.
+        
+        Returns:
+            brickse.cache.CachedResponse
+                Response object.
+        """
+        
+        return CachedResponse(self.url, self.body, cached=True, stale=stale)
+
+
+class CachedResponse(io.BytesIO):
+    """Represents a response served from already downloaded data."""
+    
+    
+    def __init__(self, url, body, status=200, headers=None, cached=False, stale=False):
+        """
+        Initializes a new instance of brickse.cache.CachedResponse.
+        
+        Args:
+            url: str
+                Request URL.
+            
+            body: bytes
+                Response body.
+            
+            status: int
+                HTTP status code.
+            
+            headers: dict or None
+                Response headers.
+            
+            cached: bool
+                Specifies whether the data come from cache.
+            
+            stale: bool
+                Specifies whether the data are last known cached data served
+                because the server failed or its circuit is open.
+        """
+        
+        super().__init__(body)
+        
+        self.url = url
+        self.status = status
+        self.headers = headers or {}
+        self.cached = cached
+        self.stale = stale
+
+
+def make_key(url, parameters):
+    """
+    Creates cache key for given request.
+    
+    Args:
+        url: str
+            Request URL.
+        
+        parameters: dict
+            Request parameters. API key is ignored.
+    
+    Returns:
+        str
+            Cache key.
+    """
+    
+    items = sorted((k, str(v)) for k, v in parameters.items() if k != 'apiKey')
+    data = url + "?" + urllib.parse.urlencode(items)
+    
+    return hashlib.sha1(data.encode('utf8')).hexdigest()
+
+
+def redact_parameters(parameters):
+    """
+    Removes API key from given request parameters and replaces credentials
+    by placeholders, so that the parameters can be stored or passed around
+    safely. User names and tokens are replaced by short stable digest to keep
+    different users apart, passwords are replaced completely. Already
+    redacted values are kept.
+    
+    Args:
+        parameters: dict
+            Request parameters.
+    
+    Returns:
+        dict
+            Redacted parameters.
+    """
+    
+    redacted = {}
+    
+    for key, value in parameters.items():
+        
+        if key == 'apiKey':
+            continue
+        
+        if key in SECRET_PARAMETERS and value and not str(value).startswith("<redacted"):
+            
+            if key == 'password':
+                value = "<redacted>"
+            else:
+                value = "<redacted:%s>" % hashlib.sha256(str(value).encode('utf8')).hexdigest()[:8]
+        
+        redacted[key] = value
+    
+    return redacted
+
+
+def is_cacheable(url, parameters):
+    """
+    Checks whether given request can be cached. Only public endpoints listed
+    in config.CACHE_ENDPOINTS are cached, user-specific requests never.
+    
+    Args:
+        url: str
+            Request URL.
+        
+        parameters: dict
+            Request parameters.
+    
+    Returns:
+        bool
+            True if request can be cached.
+    """
+    
+    if parameters.get('userHash', None):
+        return False
+    
+    endpoint = url.rsplit("/", 1)[-1]
+    
+    return endpoint in config.CACHE_ENDPOINTS
+
+
+def is_success(body):
+    """
+    Checks whether given response body contains successful API result.
+    BrickSet reports API errors (e.g. invalid API key) by 'status' value
+    within normal HTTP 200 response, such responses must not be cached.
+    
+    The status is the first item of every API response, so only the
+    beginning of the body is scanned instead of parsing whole JSON, which is
+    done once later by the caller.
+    
+    Args:
+        body: bytes
+            Response body.
+    
+    Returns:
+        bool
+            True if the response can be cached.
+    """
+    
+    head = body[:STATUS_SCAN].lstrip()
+    
+    # check JSON
+    if head[:1] not in (b"{", b"["):
+        return False
+    
+    # check status
+    match = STATUS_PATTERN.search(head)
+    if match is None:
+        return True
+    
+    return match.group(1) == b"success"
@@ -0,0 +1,497 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import os
+import mmap
+import zlib
+import struct
+import threading
+from . ingest import FIELDS
+from . index import make_number
+from . objects import Collection, Theme, Instructions
+
+# define format
+MAGIC = b"BRKCAT\x00\x00"
+VERSION = 1
+
+# define records
+_HEADER = struct.Struct("<8sI12I12x")
+_SET = struct.Struct("<iiib3x14III")
+_THEME = struct.Struct("<4I4i")
+_INSTRUCTIONS = struct.Struct("<i6Iii")
+_SLOT = struct.Struct("<I")
+
+# define missing values
+_NULL = 0xFFFFFFFF
+_NONE = -2**31
+
+
+class Catalog(object):
+    """
+    Provides read-only access to binary catalog snapshot created by
+    write_catalog. The file is memory-mapped, so that it opens instantly and
+    the same pages are shared by all processes using it. Records are decoded
+    only when accessed and sets can be found in constant time by set ID or
+    number.
+    
+    The snapshot consists of a header followed by fixed-width tables of sets,
+    themes and instructions, two open-addressing hash tables for sets lookup
+    and a heap of deduplicated UTF-8 strings referenced by offset and length.
+    """
+    
+    
+    def __init__(self, path):
+        """
+        Initializes a new instance of brickse.Catalog.
+        
+        Args:
+            path: str
+                Snapshot file path.
+        """
+        
+        super().__init__()
+        
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        self._buff = memoryview(self._mmap)
+        
+        # read header
+        header = _HEADER.unpack_from(self._buff, 0)
+        if header[0] != MAGIC:
+            self.close()
+            raise ValueError("Unknown catalog format: %s" % path)
+        
+        if header[1] != VERSION:
+            self.close()
+            raise ValueError("Unsupported catalog version: %s" % header[1])
+        
+        (self._sets_count, self._sets_offset,
+            self._themes_count, self._themes_offset,
+            self._instructions_count, self._instructions_offset,
+            self._ids_size, self._ids_offset,
+            self._numbers_size, self._numbers_offset,
+            self._heap_offset, self._heap_size) = header[2:]
+    
+    
+    def __len__(self):
+        """Gets number of sets."""
+        
+        return self._sets_count
+    
+    
+    def __enter__(self):
+        """Enters catalog context."""
+        
+        return self
+    
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Exits catalog context."""
+        
+        self.close()
+    
+    
+    def close(self):
+        """Closes the file mapping."""
+        
+        if self._mmap is not None:
+            self._buff.release()
+            self._mmap.close()
+            self._mmap = None
+    
+    
+    def get(self, set_id):
+        """
+        Gets set by BrickSet internal ID.
+        
+        Args:
+            set_id: int
+                BrickSet internal set ID.
+        
+        Returns:
+            brickse.Collection or None
+                Set details.
+        """
+        
+        index = self._find_id(int(set_id))
+        if index is None:
+            return None
+        
+        return self._make_collection(index)
+    
+    
+    def find(self, set_number):
+        """
+        Gets set by set number.
+        
+        Args:
+            set_number: str or int
+                Set number with or without variant.
+        
+        Returns:
+            brickse.Collection or None
+                Set details.
+        """
+        
+        index = self._find_number(make_number(set_number))
+        if index is None:
+            return None
+        
+        return self._make_collection(index)
+    
+    
+    def row(self, index):
+        """
+        Gets set values at given position.
+        
+        Args:
+            index: int
+                Set position.
+        
+        Returns:
+            tuple
+                Set values ordered by brickse.ingest.FIELDS.
+        """
+        
+        if not 0 <= index < self._sets_count:
+            raise IndexError("Set index out of range: %s" % index)
+        
+        values = _SET.unpack_from(self._buff, self._sets_offset + index * _SET.size)
+        strings = [self._string(values[i], values[i+1]) for i in range(4, 18, 2)]
+        
+        return (
+            _int(values[0]),
+            strings[0],
+            _int(values[1]),
+            strings[1],
+            _int(values[2]),
+            strings[2],
+            strings[3],
+            strings[4],
+            strings[5],
+            None if values[3] < 0 else bool(values[3]),
+            strings[6])
+    
+    
+    def rows(self):
+        """
+        Iterates over all sets values.
+        
+        Yields:
+            tuple
+                Set values ordered by brickse.ingest.FIELDS.
+        """
+        
+        for i in range(self._sets_count):
+            yield self.row(i)
+    
+    
+    def sets(self):
+        """
+        Iterates over all sets.
+        
+        Yields:
+            brickse.Collection
+                Set details.
+        """
+        
+        for i in range(self._sets_count):
+            yield self._make_collection(i)
+    
+    
+    def themes(self):
+        """
+        Gets all stored themes and sub-themes.
+        
+        Returns:
+            (brickse.Theme,)
+                Themes.
+        """
+        
+        themes = []
+        
+        for i in range(self._themes_count):
+            
+            values = _THEME.unpack_from(self._buff, self._themes_offset + i * _THEME.size)
+            
+            themes.append(Theme(
+                name = self._string(values[0], values[1]),
+                parent = self._string(values[2], values[3]),
+                subthemes = _int(values[4]),
+                sets = _int(values[5]),
+                year_from = _int(values[6]),
+                year_to = _int(values[7])))
+        
+        return themes
+    
+    
+    def instructions(self, set_id):
+        """
+        Gets stored instructions of given set.
+        
+        Args:
+            set_id: int
+                BrickSet internal set ID.
+        
+        Returns:
+            (brickse.Instructions,) or None
+                Set instructions or None if set is unknown.
+        """
+        
+        index = self._find_id(int(set_id))
+        if index is None:
+            return None
+        
+        values = _SET.unpack_from(self._buff, self._sets_offset + index * _SET.size)
+        start, count = values[18], values[19]
+        
+        instructions = []
+        
+        for i in range(start, start + count):
+            
+            values = _INSTRUCTIONS.unpack_from(self._buff, self._instructions_offset + i * _INSTRUCTIONS.size)
+            
+            instructions.append(Instructions(
+                description = self._string(values[1], values[2]),
+                url = self._string(values[3], values[4]),
+                version = self._string(values[5], values[6]),
+                part = _int(values[7]),
+                parts = _int(values[8])))
+        
+        return instructions
+    
+    
+    def _make_collection(self, index):
+        """Creates collection from set at given position."""
+        
+        return Collection(**dict(zip(FIELDS, self.row(index))))
+    
+    
+    def _string(self, offset, length):
+        """Gets string from heap."""
+        
+        if offset == _NULL:
+            return None
+        
+        start = self._heap_offset + offset
+        return str(self._buff[start:start+length], 'utf8')
+    
+    
+    def _find_id(self, set_id):
+        """Gets set position by ID."""
+        
+        if not self._ids_size:
+            return None
+        
+        mask = self._ids_size - 1
+        slot = _hash_id(set_id) & mask
+        
+        while True:
+            
+            value = _SLOT.unpack_from(self._buff, self._ids_offset + slot * _SLOT.size)[0]
+            if not value:
+                return None
+            
+            index = value - 1
+            if _SET.unpack_from(self._buff, self._sets_offset + index * _SET.size)[0] == set_id:
+                return index
+            
+            slot = (slot + 1) & mask
+    
+    
+    def _find_number(self, number):
+        """Gets set position by full number."""
+        
+        if not self._numbers_size:
+            return None
+        
+        mask = self._numbers_size - 1
+        slot = _hash_number(number) & mask
+        
+        while True:
+            
+            value = _SLOT.unpack_from(self._buff, self._numbers_offset + slot * _SLOT.size)[0]
+            if not value:
+                return None
+            
+            index = value - 1
+            values = _SET.unpack_from(self._buff, self._sets_offset + index * _SET.size)
+            if "%s-%s" % (self._string(values[4], values[5]), _int(values[1]) or 1) == number:
+                return index
+            
+            slot = (slot + 1) & mask
+
+
+def write_catalog(path, sets, themes=None, instructions=None):
+    """
+    Writes binary catalog snapshot to be opened by brickse.Catalog.
+    
+    Args:
+        path: str
+            Snapshot file path.
+        
+        sets: iterable of brickse.Collection or tuple
+            Sets to store. Tuples are expected to contain values ordered by
+            brickse.ingest.FIELDS. Sets without ID are skipped.
+        
+        themes: (brickse.Theme,) or None
+            Themes and sub-themes to store.
+        
+        instructions: {int: (brickse.Instructions,)} or None
+            Instructions by set ID.
+    
+    Returns:
+        int
+            Number of stored sets.
+    """
+    
+    heap = bytearray()
+    strings = {}
+    
+    def add(value):
+        if value is None:
+            return _NULL, 0
+        if value not in strings:
+            data = str(value).encode('utf8')
+            strings[value] = (len(heap), len(data))
+            heap.extend(data)
+        return strings[value]
+    
+    instructions = instructions or {}
+    
+    # make tables
+    sets_table = bytearray()
+    instructions_table = bytearray()
+    ids = []
+    numbers = []
+    
+    for item in sets:
+        
+        row = item if isinstance(item, tuple) else tuple(getattr(item, f) for f in FIELDS)
+        set_id, number, variant, name, year, category, group, theme, subtheme, released, image_url = row
+        
+        if set_id is None:
+            continue
+        
+        start = len(instructions_table) // _INSTRUCTIONS.size
+        manuals = instructions.get(set_id, None) or ()
+        
+        for manual in manuals:
+            instructions_table += _INSTRUCTIONS.pack(
+                _none(set_id),
+                *add(manual.description),
+                *add(manual.url),
+                *add(manual.version),
+                _none(manual.part),
+                _none(manual.parts))
+        
+        sets_table += _SET.pack(
+            _none(set_id),
+            _none(variant),
+            _none(year),
+            -1 if released is None else int(bool(released)),
+            *add(number),
+            *add(name),
+            *add(category),
+            *add(group),
+            *add(theme),
+            *add(subtheme),
+            *add(image_url),
+            start,
+            len(manuals))
+        
+        ids.append(set_id)
+        numbers.append("%s-%s" % (number, variant or 1))
+    
+    themes_table = bytearray()
+    for theme in themes or ():
+        themes_table += _THEME.pack(
+            *add(theme.name),
+            *add(theme.parent),
+            _none(theme.subthemes),
+            _none(theme.sets),
+            _none(theme.year_from),
+            _none(theme.year_to))
+    
+    # make lookup tables
+    ids_table = _make_table(ids, _hash_id)
+    numbers_table = _make_table(numbers, _hash_number)
+    
+    # make layout
+    sections = (sets_table, themes_table, instructions_table, ids_table, numbers_table, heap)
+    offsets = []
+    offset = _HEADER.size
+    
+    for section in sections:
+        offsets.append(offset)
+        offset += len(section)
+    
+    header = _HEADER.pack(
+        MAGIC, VERSION,
+        len(ids), offsets[0],
+        len(themes_table) // _THEME.size, offsets[1],
+        len(instructions_table) // _INSTRUCTIONS.size, offsets[2],
+        len(ids_table) // _SLOT.size, offsets[3],
+        len(numbers_table) // _SLOT.size, offsets[4],
+        offsets[5], len(heap))
+    
+    # write file
+    temp = "%s.%d.tmp" % (path, threading.get_ident())
+    
+    with open(temp, 'wb') as f:
+        f.write(header)
+        for section in sections:
+            f.write(section)
+    
+    os.replace(temp, path)
+    
+    return len(ids)
+
+
+def _make_table(keys, hash_func):
+    """Creates open-addressing lookup table of given keys."""
+    
+    if not keys:
+        return bytearray()
+    
+    size = 1
+    while size < 2 * len(keys):
+        size *= 2
+    
+    mask = size - 1
+    slots = [0] * size
+    
+    for index, key in enumerate(keys):
+        
+        slot = hash_func(key) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        
+        slots[slot] = index + 1
+    
+    return bytearray(struct.pack("<%dI" % size, *slots))
+
+
+def _hash_id(set_id):
+    """Creates hash of set ID."""
+    
+    return (set_id * 2654435761) & 0xFFFFFFFF
+
+
+def _hash_number(number):
+    """Creates hash of set number."""
+    
+    return zlib.crc32(number.encode('utf8'))
+
+
+def _none(value):
+    """Converts None to integer marker."""
+    
+    return _NONE if value is None else int(value)
+
+
+def _int(value):
+    """Converts integer marker to None."""
+    
+    return None if value == _NONE else value
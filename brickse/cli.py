@@ -0,0 +1,483 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import os
+import sys
+import time
+import argparse
+import threading
+import contextvars
+import urllib.error
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from . import config
+from . import metrics
+from . import ingest
+from . cache import Cache
+from . catalog import write_catalog
+from . export import export
+from . request import urlopen, DeadlineExceeded
+from . brickse import Brickse
+
+# define snapshot extensions
+CATALOG_EXTENSIONS = (".bin", ".cat")
+
+
+class QuotaExceeded(Exception):
+    """Raised when maximum number of API requests is reached."""
+    pass
+
+
+class QuotaTransport(object):
+    """Provides a transport limiting the number of sent requests."""
+    
+    
+    def __init__(self, quota, transport=None):
+        """
+        Initializes a new instance of brickse.cli.QuotaTransport.
+        
+        Args:
+            quota: int
+                Maximum number of requests to send.
+            
+            transport: object or None
+                Underlying transport used to send requests. If set to None,
+                requests are sent directly by urllib.
+        """
+        
+        super().__init__()
+        
+        self.quota = quota
+        self.sent = 0
+        
+        self._transport = transport
+        self._lock = threading.Lock()
+    
+    
+    def open(self, request):
+        """
+        Sends given request unless the quota is exhausted.
+        
+        Args:
+            request: urllib.request.Request
+                Request to send.
+        
+        Returns:
+            http.client.HTTPResponse or brickse.cache.CachedResponse
+                Server response.
+        """
+        
+        with self._lock:
+            
+            if self.sent >= self.quota:
+                raise QuotaExceeded("Request quota exhausted (%d)." % self.quota)
+            
+            self.sent += 1
+        
+        if self._transport is not None:
+            return self._transport.open(request)
+        
+        return urlopen(request)
+
+
+class Progress(object):
+    """Periodically reports processed items and requests throughput."""
+    
+    
+    def __init__(self, interval=2., stream=None):
+        """
+        Initializes a new instance of brickse.cli.Progress.
+        
+        Args:
+            interval: float
+                Reporting interval in seconds.
+            
+            stream: file or None
+                Output stream. If set to None, sys.stderr is used.
+        """
+        
+        super().__init__()
+        
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        
+        self.items = 0
+        self.requests = 0
+        self.cached = 0
+        self.bytes = 0
+        
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    
+    def start(self):
+        """Starts reporting."""
+        
+        self._start = time.perf_counter()
+        metrics.add_hook(post=self._on_request)
+        
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    
+    def stop(self):
+        """Stops reporting and writes final summary."""
+        
+        self._stop.set()
+        metrics.remove_hook(self._on_request)
+        
+        if self._thread is not None:
+            self._thread.join()
+        
+        self.report()
+    
+    
+    def add(self, count=1):
+        """Adds number of processed items."""
+        
+        with self._lock:
+            self.items += count
+    
+    
+    def track(self, items):
+        """Counts items while iterating."""
+        
+        for item in items:
+            self.add()
+            yield item
+    
+    
+    def report(self):
+        """Writes current progress."""
+        
+        elapsed = max(time.perf_counter() - self._start, 1e-9)
+        
+        with self._lock:
+            message = "[%.0fs] items: %d (%.1f/s), requests: %d (%.1f/s, %d cached), %.1f MB\n" % (
+                elapsed,
+                self.items, self.items / elapsed,
+                self.requests, self.requests / elapsed, self.cached,
+                self.bytes / 1024 / 1024)
+        
+        self.stream.write(message)
+        self.stream.flush()
+    
+    
+    def _on_request(self, event):
+        """Counts finished request."""
+        
+        with self._lock:
+            self.requests += 1
+            self.bytes += event.size
+            if event.cached:
+                self.cached += 1
+    
+    
+    def _run(self):
+        """Reports progress until stopped."""
+        
+        while not self._stop.wait(self.interval):
+            self.report()
+
+
+def main(argv=None):
+    """Runs brickse command line tool."""
+    
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    
+    if not args.command:
+        parser.print_help()
+        return 2
+    
+    # check arguments
+    if args.rate is not None and args.rate <= 0:
+        parser.error("--rate must be positive")
+    
+    if args.cache_ttl is not None and not args.cache:
+        parser.error("--cache-ttl requires --cache")
+    
+    progress = None
+    
+    # run command
+    try:
+        
+        tool = setup(args)
+        
+        # init progress
+        if args.progress:
+            progress = Progress(args.progress)
+            progress.start()
+        
+        return args.func(tool, args, progress) or 0
+    
+    except QuotaExceeded as e:
+        sys.stderr.write("%s\n" % e)
+        return 3
+    
+    except DeadlineExceeded as e:
+        sys.stderr.write("%s\n" % e)
+        return 4
+    
+    except (urllib.error.URLError, OSError) as e:
+        sys.stderr.write("Request failed: %s\n" % e)
+        return 1
+    
+    except ValueError as e:
+        sys.stderr.write("Error: %s\n" % e)
+        return 1
+    
+    except KeyboardInterrupt:
+        return 130
+    
+    finally:
+        if progress:
+            progress.stop()
+
+
+def make_parser():
+    """Creates command line arguments parser."""
+    
+    parser = argparse.ArgumentParser(
+        prog = "brickse",
+        description = "Bulk operations over BrickSet API. Arguments can be read from file by @path.",
+        fromfile_prefix_chars = "@")
+    
+    parser.add_argument("--api-key", default=os.environ.get('BRICKSE_API_KEY', None), help="API key (default: $BRICKSE_API_KEY)")
+    parser.add_argument("--user-token", default=os.environ.get('BRICKSE_USER_TOKEN', None), help="user token (default: $BRICKSE_USER_TOKEN)")
+    parser.add_argument("--api-url", default=None, help="API URL, e.g. of local mock server")
+    parser.add_argument("--workers", type=int, default=None, help="number of concurrent workers (default: %d)" % config.MAX_WORKERS)
+    parser.add_argument("--cache", default=None, help="response cache folder")
+    parser.add_argument("--cache-ttl", type=float, default=None, help="cached responses lifetime in seconds")
+    parser.add_argument("--rate", type=float, default=None, help="maximum requests per second (default: %.2f)" % (1. / config.REQUEST_DELAY))
+    parser.add_argument("--quota", type=int, default=None, help="maximum number of API requests to send")
+    parser.add_argument("--timeout", type=float, default=None, help="time budget in seconds for each tool call")
+    parser.add_argument("--progress", type=float, nargs="?", const=2., default=None, metavar="SECONDS", help="report progress and throughput periodically")
+    
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    
+    # sets
+    cmd = commands.add_parser("sets", help="crawl sets and export them", fromfile_prefix_chars="@")
+    cmd.add_argument("numbers", nargs="*", help="set numbers to retrieve instead of search")
+    cmd.add_argument("-o", "--output", required=True, help="output file (.jsonl, .csv, .parquet or %s)" % ", ".join(CATALOG_EXTENSIONS))
+    cmd.add_argument("--query", default=None, help="search term")
+    cmd.add_argument("--theme", default=None, help="theme name")
+    cmd.add_argument("--subtheme", default=None, help="sub-theme name")
+    cmd.add_argument("--year", action="append", default=None, help="release year or range (e.g. 2010-2015), can be repeated")
+    cmd.set_defaults(func=run_sets)
+    
+    # images
+    cmd = commands.add_parser("images", help="download sets images", fromfile_prefix_chars="@")
+    cmd.add_argument("numbers", nargs="+", help="set numbers")
+    cmd.add_argument("-o", "--output", required=True, help="output folder")
+    cmd.set_defaults(func=run_images)
+    
+    # instructions
+    cmd = commands.add_parser("instructions", help="download sets instructions", fromfile_prefix_chars="@")
+    cmd.add_argument("numbers", nargs="+", help="set numbers")
+    cmd.add_argument("-o", "--output", required=True, help="output folder")
+    cmd.set_defaults(func=run_instructions)
+    
+    # sync
+    cmd = commands.add_parser("sync", help="sync user collection")
+    cmd.add_argument("--owned", action="store_true", help="sync owned sets only")
+    cmd.add_argument("--wanted", action="store_true", help="sync wanted sets only")
+    cmd.add_argument("--quick", action="store_true", help="skip download if number of sets did not change")
+    cmd.add_argument("--minifigs", action="store_true", help="sync minifigs instead of sets")
+    cmd.add_argument("--snapshots", default=None, help="folder to keep last known collections between runs")
+    cmd.add_argument("-o", "--output", default=None, help="output file for added and changed sets")
+    cmd.set_defaults(func=run_sync)
+    
+    # export
+    cmd = commands.add_parser("export", help="export stored pages from cache or recordings folder")
+    cmd.add_argument("source", help="cache or recordings folder")
+    cmd.add_argument("output", help="output file (.jsonl, .csv, .parquet or %s)" % ", ".join(CATALOG_EXTENSIONS))
+    cmd.set_defaults(func=run_export)
+    
+    return parser
+
+
+def setup(args):
+    """Applies global arguments and creates the tool."""
+    
+    if args.api_url:
+        config.API_URL = args.api_url
+    
+    if args.api_key:
+        config.API_KEY = args.api_key
+    
+    if args.user_token:
+        config.USER_TOKEN = args.user_token
+    
+    if args.workers:
+        config.MAX_WORKERS = args.workers
+    
+    if args.rate is not None:
+        config.REQUEST_DELAY = 1. / args.rate
+    
+    if args.cache:
+        config.CACHE = Cache(args.cache, ttl=args.cache_ttl)
+    
+    if args.quota is not None:
+        config.TRANSPORT = QuotaTransport(args.quota, config.TRANSPORT)
+    
+    return Brickse(timeout=args.timeout, priority="batch")
+
+
+def run_sets(tool, args, progress):
+    """Crawls sets and exports them."""
+    
+    years = parse_years(args.year)
+    
+    # get by numbers
+    if args.numbers:
+        items = parallel(lambda x: tool.get_set(set_number=x), args.numbers, args.workers)
+        items = (x for x in items if x is not None)
+    
+    # crawl years in parallel
+    elif years and len(years) > 1:
+        
+        def crawl(year):
+            return tool.get_sets(query=args.query, theme=args.theme, subtheme=args.subtheme, year=year) or []
+        
+        items = (x for page in parallel(crawl, years, args.workers) for x in page)
+    
+    # stream search
+    else:
+        year = years[0] if years else None
+        items = tool.iter_sets(query=args.query, theme=args.theme, subtheme=args.subtheme, year=year)
+    
+    if progress:
+        items = progress.track(items)
+    
+    count = write(items, args.output)
+    sys.stderr.write("Exported %d sets into %s\n" % (count, args.output))
+
+
+def run_images(tool, args, progress):
+    """Downloads sets images."""
+    
+    os.makedirs(args.output, exist_ok=True)
+    
+    def fetch(number):
+        
+        images = tool.get_set_images(set_number=number) or []
+        paths = []
+        
+        for image in images:
+            name = os.path.basename(urllib.parse.urlparse(image.image_url).path)
+            paths.append(tool.download_file(image.image_url, os.path.join(args.output, name)))
+            if progress:
+                progress.add()
+        
+        return paths
+    
+    count = sum(len([x for x in paths if x]) for paths in parallel(fetch, args.numbers, args.workers))
+    sys.stderr.write("Downloaded %d images into %s\n" % (count, args.output))
+
+
+def run_instructions(tool, args, progress):
+    """Downloads sets instructions."""
+    
+    def fetch(number):
+        
+        instructions = tool.get_set_instructions(set_number=number) or []
+        if not instructions:
+            return []
+        
+        folder = os.path.join(args.output, str(number))
+        os.makedirs(folder, exist_ok=True)
+        
+        paths = tool.download_instructions(instructions, folder, workers=1)
+        if progress:
+            progress.add(len(paths))
+        
+        return paths
+    
+    count = sum(len([x for x in paths if x]) for paths in parallel(fetch, args.numbers, args.workers))
+    sys.stderr.write("Downloaded %d instructions into %s\n" % (count, args.output))
+
+
+def run_sync(tool, args, progress):
+    """Syncs user collection."""
+    
+    if args.snapshots:
+        config.SYNC_PATH = args.snapshots
+    
+    if args.minifigs:
+        result = tool.sync_users_minifigs(owned=args.owned, wanted=args.wanted)
+    else:
+        result = tool.sync_users_sets(owned=args.owned, wanted=args.wanted, quick=args.quick)
+    
+    if result is None:
+        sys.stderr.write("Sync failed.\n")
+        return 1
+    
+    sys.stderr.write("%s\n" % result)
+    
+    if args.output and not args.minifigs:
+        write(result.added + result.changed, args.output)
+
+
+def run_export(tool, args, progress):
+    """Exports stored pages."""
+    
+    pages = list(ingest.iter_pages(args.source))
+    rows = ingest.ingest(pages, workers=args.workers)
+    
+    if progress:
+        progress.add(len(rows))
+    
+    count = write(rows, args.output)
+    sys.stderr.write("Exported %d sets from %d pages into %s\n" % (count, len(pages), args.output))
+
+
+def write(items, path):
+    """Writes items into export file or catalog snapshot."""
+    
+    if path.lower().endswith(CATALOG_EXTENSIONS):
+        return write_catalog(path, items)
+    
+    return export(items, path)
+
+
+def parallel(func, items, workers=None):
+    """Calls given function for each item concurrently and yields results as completed."""
+    
+    with ThreadPoolExecutor(workers or config.MAX_WORKERS) as executor:
+        
+        futures = [executor.submit(contextvars.copy_context().run, func, item) for item in items]
+        
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def parse_years(values):
+    """Parses years and year ranges."""
+    
+    if not values:
+        return None
+    
+    years = []
+    
+    for value in values:
+        for item in value.split(","):
+            
+            start, _, end = item.partition("-")
+            start = int(start)
+            end = int(end) if end else start
+            
+            years.extend(range(start, end + 1))
+    
+    return years
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import io
+import pickle
+import copyreg
+from . objects import Collection, Theme, Year, Instructions, Image, Review, Minifig
+from . objects import entity_values, restore_entity
+
+# define schema version
+SCHEMA_VERSION = 1
+
+# define entities msgpack extension codes (never reuse or change existing)
+CODES = {
+    Collection: 1,
+    Theme: 2,
+    Year: 3,
+    Instructions: 4,
+    Image: 5,
+    Review: 6,
+    Minifig: 7}
+
+# define entities by code
+ENTITIES = {v: k for k, v in CODES.items()}
+
+
+def dumps(obj):
+    """
+    Serializes given object into compact msgpack bytes. Entities are stored
+    as extension types containing schema version followed by plain values
+    ordered by brickse.objects.entity_fields. Entities can be nested within
+    lists, tuples and dicts. Requires msgpack to be installed.
+    
+    Args:
+        obj: any
+            Entity, list of entities or any msgpack-compatible value.
+    
+    Returns:
+        bytes
+            Serialized data.
+    """
+    
+    msgpack = _import()
+    
+    def default(value):
+        code = CODES.get(value.__class__, None)
+        if code is None:
+            raise TypeError("Unsupported type: %s" % value.__class__.__name__)
+        payload = msgpack.packb((SCHEMA_VERSION,) + entity_values(value), default=default)
+        return msgpack.ExtType(code, payload)
+    
+    return msgpack.packb(obj, default=default)
+
+
+def loads(data):
+    """
+    Deserializes object created by dumps. Data written by older schema
+    version are loaded with missing attributes set to None.
+    
+    Args:
+        data: bytes
+            Serialized data.
+    
+    Returns:
+        any
+            Deserialized object. Tuples are returned as lists.
+    """
+    
+    msgpack = _import()
+    
+    def ext_hook(code, payload):
+        cls = ENTITIES.get(code, None)
+        if cls is None:
+            return msgpack.ExtType(code, payload)
+        values = msgpack.unpackb(payload, ext_hook=ext_hook)
+        if values[0] > SCHEMA_VERSION:
+            raise ValueError("Unsupported schema version: %s" % values[0])
+        return restore_entity(cls, values[1:])
+    
+    return msgpack.unpackb(data, ext_hook=ext_hook)
+
+
+def pickle_dumps(obj, protocol=pickle.HIGHEST_PROTOCOL):
+    """
+    Pickles given object storing entities as their class and plain tuple of
+    values ordered by brickse.objects.entity_fields. This produces smaller
+    data than default pickling but takes longer, so it is used only if
+    explicitly called. The data are loaded by standard pickle.loads.
+    
+    Args:
+        obj: any
+            Entity, list of entities or any picklable value.
+        
+        protocol: int
+            Pickle protocol.
+    
+    Returns:
+        bytes
+            Pickled data.
+    """
+    
+    # use compact form for entities only
+    dispatch = copyreg.dispatch_table.copy()
+    dispatch.update(dict.fromkeys(CODES, _reduce))
+    
+    # pickle object
+    stream = io.BytesIO()
+    
+    pickler = pickle.Pickler(stream, protocol)
+    pickler.dispatch_table = dispatch
+    pickler.dump(obj)
+    
+    return stream.getvalue()
+
+
+def _reduce(entity):
+    """Gets compact pickling data of entity."""
+    
+    return restore_entity, (entity.__class__, entity_values(entity))
+
+
+def _import():
+    """Imports msgpack."""
+    
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("Binary codec requires msgpack to be installed.")
+    
+    return msgpack
@@ -10,3 +10,106 @@ API_URL = "https://brickset.com/api/v3.asmx/"
 
 # define minimum delay between requests in seconds
 REQUEST_DELAY = 1.1
+
+# define maximum number of concurrent workers
+MAX_WORKERS = 4
+
+# define file download chunk size in bytes
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# define maximum number of download resume attempts
+DOWNLOAD_RETRIES = 3
+
+# define initial delay in seconds between download resume attempts (doubled after each attempt)
+DOWNLOAD_RETRY_DELAY = 0.5
+
+# define response cache (brickse.Cache instance) or None to disable caching
+CACHE = None
+
+# define time in seconds for which cached responses are considered fresh
+CACHE_TTL = 24 * 3600
+
+# define maximum number of responses kept in memory by cache (least recently used are dropped)
+CACHE_SIZE = 1000
+
+# define cacheable endpoints
+CACHE_ENDPOINTS = ("getSets", "getThemes", "getSubthemes", "getYears", "getInstructions", "getAdditionalImages", "getReviews")
+
+# define set number index file path or None to keep the index in memory only
+INDEX_PATH = None
+
+# define maximum number of sets kept by instructions index (least recently used are dropped)
+INSTRUCTIONS_INDEX_SIZE = 10000
+
+# define minimum time in seconds between automatic index saves
+INDEX_SAVE_INTERVAL = 10
+
+# define user collections snapshots folder or None to keep snapshots in memory only
+SYNC_PATH = None
+
+# define maximum time in seconds after which quick sync downloads whole user collection
+SYNC_FULL_INTERVAL = 24 * 3600
+
+# define time in seconds for which valid user tokens are remembered
+TOKEN_TTL = 3600
+
+# define time in seconds for which invalid user tokens are remembered
+TOKEN_NEGATIVE_TTL = 300
+
+# define maximum number of remembered user tokens before expired ones are removed
+TOKEN_CACHE_SIZE = 10000
+
+# define login results file path or None to keep login results in memory only
+LOGIN_PATH = None
+
+# define API requests transport (e.g. brickse.Recorder or brickse.Player) or None to use urllib directly
+TRANSPORT = None
+
+# define whether request metrics are recorded (see brickse.metrics)
+METRICS = False
+
+# define OpenTelemetry-like tracer (e.g. opentelemetry.trace.get_tracer("brickse")) or None to disable tracing
+TRACER = None
+
+# define connection and read timeouts in seconds or None to wait forever
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 30
+
+# define default request priority class ('interactive', 'batch' or 'idle')
+PRIORITY = "interactive"
+
+# define maximum number of distinct strings shared by entities (0 to disable sharing)
+INTERN_SIZE = 10000
+
+# define number of consecutive failures opening endpoint circuit (0 to disable circuit breaker)
+BREAKER_THRESHOLD = 5
+
+# define time in seconds after which open circuit is probed again
+BREAKER_TIMEOUT = 30
+
+# define whether last known cached data are served when request fails or circuit is open
+SERVE_STALE = True
+
+# define endpoints kept warm by brickse.CacheWarmer
+WARM_ENDPOINTS = ("getSets", "getThemes", "getInstructions", "getAdditionalImages")
+
+# define maximum number of most accessed entries refreshed by brickse.CacheWarmer
+WARM_COUNT = 1000
+
+# define time in seconds between brickse.CacheWarmer cycles
+WARM_INTERVAL = 60
+
+# define time in seconds before expiration at which brickse.CacheWarmer refreshes entry
+WARM_MARGIN = 600
+
+# define time in seconds after which access counts used by brickse.CacheWarmer are halved
+WARM_HALF_LIFE = 3600
+
+# define maximum number of idle keep-alive connections kept per host (0 to close connection after every request)
+POOL_SIZE = 10
+
+# define time in seconds after which idle connection is closed
+POOL_IDLE = 30
+
+# define number of connections opened in background when client is created (0 to disable prewarming)
+PREWARM = 0
@@ -0,0 +1,311 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import os
+import csv
+import json
+import queue
+import threading
+import contextvars
+from . ingest import FIELDS
+
+# define default number of rows per batch
+BATCH_SIZE = 1000
+
+# define maximum number of prepared batches waiting to be written
+QUEUE_SIZE = 2
+
+# define Parquet types of collection attributes (others are stored as strings)
+PARQUET_TYPES = {
+    'set_id': 'int64',
+    'number': 'string',
+    'variant': 'int64',
+    'name': 'string',
+    'year': 'int64',
+    'category': 'string',
+    'group': 'string',
+    'theme': 'string',
+    'subtheme': 'string',
+    'released': 'bool',
+    'image_url': 'string'}
+
+
+class JSONLWriter(object):
+    """Writes rows as JSON lines."""
+    
+    
+    def __init__(self, path, fields):
+        """
+        Initializes a new instance of brickse.export.JSONLWriter.
+        
+        Args:
+            path: str
+                Output file path.
+            
+            fields: (str,)
+                Columns names.
+        """
+        
+        super().__init__()
+        
+        self._fields = fields
+        self._file = open(path, 'w', encoding='utf8', newline="\n")
+    
+    
+    def write(self, rows):
+        """Writes batch of rows."""
+        
+        lines = (json.dumps(dict(zip(self._fields, row)), ensure_ascii=False) for row in rows)
+        self._file.write("\n".join(lines) + "\n")
+    
+    
+    def close(self):
+        """Closes the output."""
+        
+        self._file.close()
+
+
+class CSVWriter(object):
+    """Writes rows as CSV with header."""
+    
+    
+    def __init__(self, path, fields):
+        """
+        Initializes a new instance of brickse.export.CSVWriter.
+        
+        Args:
+            path: str
+                Output file path.
+            
+            fields: (str,)
+                Columns names.
+        """
+        
+        super().__init__()
+        
+        self._file = open(path, 'w', encoding='utf8', newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(fields)
+    
+    
+    def write(self, rows):
+        """Writes batch of rows."""
+        
+        self._writer.writerows(rows)
+    
+    
+    def close(self):
+        """Closes the output."""
+        
+        self._file.close()
+
+
+class ParquetWriter(object):
+    """
+    Writes rows as Parquet row groups. Columns types are given by
+    PARQUET_TYPES, so that they do not depend on values of particular batch
+    and the file is written even if there are no rows. Requires pyarrow to be
+    installed.
+    """
+    
+    
+    def __init__(self, path, fields):
+        """
+        Initializes a new instance of brickse.export.ParquetWriter.
+        
+        Args:
+            path: str
+                Output file path.
+            
+            fields: (str,)
+                Columns names.
+        """
+        
+        super().__init__()
+        
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet export requires pyarrow to be installed.")
+        
+        self._pa = pyarrow
+        self._fields = fields
+        
+        # init schema
+        self._schema = pyarrow.schema([(f, PARQUET_TYPES.get(f, 'string')) for f in fields])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+    
+    
+    def write(self, rows):
+        """Writes batch of rows as a single row group."""
+        
+        columns = list(zip(*rows)) if rows else [()] * len(self._fields)
+        arrays = []
+        
+        for values, field in zip(columns, self._schema):
+            
+            # convert unknown attributes
+            if field.name not in PARQUET_TYPES:
+                values = [None if v is None else str(v) for v in values]
+            
+            arrays.append(self._pa.array(values, type=field.type))
+        
+        table = self._pa.Table.from_arrays(arrays, schema=self._schema)
+        self._writer.write_table(table)
+    
+    
+    def close(self):
+        """Closes the output."""
+        
+        self._writer.close()
+
+
+# define writers by format
+WRITERS = {
+    'jsonl': JSONLWriter,
+    'csv': CSVWriter,
+    'parquet': ParquetWriter}
+
+
+def export(items, path, format=None, fields=None, batch_size=None):
+    """
+    Streams given items into file in bounded-size batches. The items are
+    consumed in a background thread while the previous batch is being written,
+    so that lazily retrieved pages (e.g. brickse.Brickse.iter_sets) overlap
+    with disk writing and only a few batches are kept in memory at once.
+    
+    Data are written into temporary file, which replaces the output only
+    when the export succeeds.
+    
+    Args:
+        items: iterable of brickse.Collection or tuple
+            Items to export. Tuples are expected to contain values ordered by
+            the fields (e.g. rows from brickse.ingest).
+        
+        path: str
+            Output file path.
+        
+        format: str or None
+            Output format ('jsonl', 'csv' or 'parquet'). If set to None, the
+            format is determined by file extension.
+        
+        fields: (str,) or None
+            Attributes to export. If set to None, brickse.ingest.FIELDS are
+            used.
+        
+        batch_size: int or None
+            Number of rows per batch. If set to None, the value of BATCH_SIZE
+            is used.
+    
+    Returns:
+        int
+            Number of exported rows.
+    """
+    
+    # get defaults
+    if format is None:
+        format = os.path.splitext(path)[1][1:].lower()
+    
+    if format not in WRITERS:
+        raise ValueError("Unsupported export format: %s" % format)
+    
+    fields = tuple(fields or FIELDS)
+    batch_size = batch_size or BATCH_SIZE
+    
+    # init writer
+    temp = "%s.%d.tmp" % (path, threading.get_ident())
+    writer = WRITERS[format](temp, fields)
+    
+    # start reading
+    batches = queue.Queue(QUEUE_SIZE)
+    stop = threading.Event()
+    
+    context = contextvars.copy_context()
+    thread = threading.Thread(target=context.run, args=(_read, items, fields, batch_size, batches, stop), daemon=True)
+    thread.start()
+    
+    count = 0
+    
+    try:
+        
+        while True:
+            
+            # get batch
+            batch = batches.get()
+            
+            if isinstance(batch, BaseException):
+                raise batch
+            
+            if batch is None:
+                break
+            
+            # write batch
+            writer.write(batch)
+            count += len(batch)
+    
+    except BaseException:
+        
+        stop.set()
+        writer.close()
+        
+        # remove partial output
+        if os.path.exists(temp):
+            os.remove(temp)
+        
+        raise
+    
+    stop.set()
+    writer.close()
+    
+    # finalize file
+    if os.path.exists(temp):
+        os.replace(temp, path)
+    
+    return count
+
+
+def _read(items, fields, batch_size, batches, stop):
+    """Reads items into batches of rows."""
+    
+    batch = []
+    error = None
+    
+    try:
+        
+        for item in items:
+            
+            if isinstance(item, tuple):
+                batch.append(item)
+            else:
+                batch.append(tuple(getattr(item, f) for f in fields))
+            
+            if len(batch) >= batch_size:
+                if not _put(batches, batch, stop):
+                    return
+                batch = []
+        
+        if batch:
+            _put(batches, batch, stop)
+    
+    except BaseException as e:
+        error = e
+    
+    # always finish by end sentinel or error
+    finally:
+        _put(batches, error, stop)
+
+
+def _put(batches, batch, stop):
+    """Puts batch into queue unless the export was stopped."""
+    
+    while not stop.is_set():
+        
+        try:
+            batches.put(batch, timeout=0.1)
+            return True
+        
+        except queue.Full:
+            pass
+    
+    return False
@@ -0,0 +1,394 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import os
+import json
+import time
+import atexit
+import threading
+import collections
+from . import config
+from . objects import parse_instructions
+
+# init default index
+_index = None
+_index_lock = threading.Lock()
+
+# init default instructions index
+_instructions = None
+_instructions_lock = threading.Lock()
+
+
+class SetIndex(object):
+    """Provides a persistent mapping of set numbers to BrickSet set IDs."""
+    
+    
+    def __init__(self, path=None):
+        """
+        Initializes a new instance of brickse.SetIndex.
+        
+        Args:
+            path: str or None
+                Index file path. If set to None, index is kept in memory only.
+        """
+        
+        super().__init__()
+        
+        self._path = path
+        self._sets = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved = time.time()
+        
+        # load index
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf8') as f:
+                self._sets = json.load(f)
+    
+    
+    def __len__(self):
+        """Gets number of indexed sets."""
+        
+        return len(self._sets)
+    
+    
+    @property
+    def path(self):
+        """Gets index file path."""
+        
+        return self._path
+    
+    
+    def get(self, set_number):
+        """
+        Gets set ID for given set number.
+        
+        Args:
+            set_number: str or int
+                Full set number including variant. If variant is not
+                specified, the first one is used.
+        
+        Returns:
+            int or None
+                BrickSet internal set ID or None if unknown.
+        """
+        
+        return self._sets.get(make_number(set_number), None)
+    
+    
+    def add(self, collections):
+        """
+        Adds given sets into the index. The index file is saved if enough time
+        passed since the last save.
+        
+        Args:
+            collections: (brickse.Collection,)
+                Sets to add.
+        """
+        
+        with self._lock:
+            
+            for item in collections:
+                
+                if item.set_id is None or item.number is None:
+                    continue
+                
+                number = "%s-%s" % (item.number, item.variant or 1)
+                if self._sets.get(number, None) != item.set_id:
+                    self._sets[number] = item.set_id
+                    self._dirty = True
+            
+            save = self._dirty and time.time() - self._saved > config.INDEX_SAVE_INTERVAL
+        
+        if save:
+            self.save()
+    
+    
+    def save(self):
+        """Saves the index into its file if changed."""
+        
+        if not self._path:
+            return
+        
+        with self._lock:
+            
+            if not self._dirty:
+                return
+            
+            temp = "%s.%d.tmp" % (self._path, threading.get_ident())
+            
+            with open(temp, 'w', encoding='utf8') as f:
+                json.dump(self._sets, f)
+            
+            os.replace(temp, self._path)
+            
+            self._dirty = False
+            self._saved = time.time()
+
+
+class InstructionsIndex(object):
+    """
+    Provides instructions of many sets grouped into complete manuals. For
+    every set and region, the latest manual having all its parts is resolved
+    when the instructions are added, so that the lookup is a single dict
+    access. Each part of multi-part manual is taken in its latest version.
+    Region-specific manuals (e.g. 'NA' or 'IN') are used for given region
+    only, falling back to the global manual.
+    
+    Only the resolved manuals are kept and the least recently used sets are
+    dropped once the size limit is reached.
+    """
+    
+    
+    def __init__(self, size=None):
+        """
+        Initializes a new instance of brickse.InstructionsIndex.
+        
+        Args:
+            size: int or None
+                Maximum number of indexed sets. If set to None, the value of
+                config.INSTRUCTIONS_INDEX_SIZE is used.
+        """
+        
+        super().__init__()
+        
+        self._size = size
+        self._manuals = {}
+        self._regions = collections.OrderedDict()
+        self._lock = threading.Lock()
+    
+    
+    def __len__(self):
+        """Gets number of indexed sets."""
+        
+        return len(self._regions)
+    
+    
+    def __contains__(self, set_id):
+        """Checks whether instructions of given set are indexed."""
+        
+        return set_id in self._regions
+    
+    
+    def get(self, set_id, region=None):
+        """
+        Gets the latest complete manual of given set.
+        
+        Args:
+            set_id: int
+                BrickSet internal set ID.
+            
+            region: str or None
+                Region code (e.g. 'NA' or 'IN'). If not available, global
+                manual is used.
+        
+        Returns:
+            (brickse.Instructions,) or None
+                Manual parts in order or None if no complete manual is known.
+        """
+        
+        manual = None
+        
+        with self._lock:
+            
+            if set_id not in self._regions:
+                return None
+            
+            self._regions.move_to_end(set_id)
+            
+            if region is not None:
+                manual = self._manuals.get((set_id, region), None)
+            
+            if manual is None:
+                manual = self._manuals.get((set_id, None), None)
+        
+        return manual
+    
+    
+    def regions(self, set_id):
+        """
+        Gets regions having complete manual of given set.
+        
+        Args:
+            set_id: int
+                BrickSet internal set ID.
+        
+        Returns:
+            (str or None,)
+                Region codes, None stands for global manual.
+        """
+        
+        return self._regions.get(set_id, ())
+    
+    
+    def add(self, set_id, instructions):
+        """
+        Adds or replaces instructions of given set.
+        
+        Args:
+            set_id: int
+                BrickSet internal set ID.
+            
+            instructions: (brickse.Instructions,)
+                All available instructions of the set.
+        """
+        
+        self.update({set_id: instructions})
+    
+    
+    def update(self, instructions):
+        """
+        Adds or replaces instructions of many sets at once.
+        
+        Args:
+            instructions: {int: (brickse.Instructions,)}
+                Instructions by set ID.
+        """
+        
+        # resolve manuals
+        resolved = {set_id: make_manuals(items or ()) for set_id, items in instructions.items()}
+        
+        # update index
+        with self._lock:
+            
+            for set_id, manuals in resolved.items():
+                
+                self._forget(set_id)
+                
+                for region, manual in manuals.items():
+                    self._manuals[(set_id, region)] = manual
+                
+                self._regions[set_id] = tuple(manuals)
+            
+            # drop least recently used
+            size = self._size if self._size is not None else config.INSTRUCTIONS_INDEX_SIZE
+            while len(self._regions) > size:
+                self._forget(next(iter(self._regions)))
+    
+    
+    def _forget(self, set_id):
+        """Removes manuals of given set."""
+        
+        for region in self._regions.pop(set_id, ()):
+            del self._manuals[(set_id, region)]
+
+
+def make_manuals(instructions):
+    """
+    Groups instructions parts into complete manuals by region. Only the
+    latest manual of each region is kept and every part is taken in its
+    latest version.
+    
+    Args:
+        instructions: (brickse.Instructions,)
+            Instructions of single set.
+    
+    Returns:
+        {str or None: (brickse.Instructions,)}
+            Manual parts by region.
+    """
+    
+    groups = {}
+    
+    # group parts by region and number of parts
+    for item in instructions:
+        
+        version, region, part, parts = parse_instructions(item.description)
+        version = int(version[1:]) if version else 0
+        
+        found = groups.setdefault((region, parts or 1), {})
+        part = part or 1
+        
+        if part not in found or version > found[part][0]:
+            found[part] = (version, item)
+    
+    # get latest complete manuals
+    manuals = {}
+    
+    for (region, parts), found in groups.items():
+        
+        if len(found) != parts or any(p not in found for p in range(1, parts+1)):
+            continue
+        
+        version = max(v for v, item in found.values())
+        if region in manuals and manuals[region][0] >= version:
+            continue
+        
+        manuals[region] = (version, tuple(found[p][1] for p in range(1, parts+1)))
+    
+    return {region: manual for region, (version, manual) in manuals.items()}
+
+
+def make_number(set_number):
+    """
+    Creates full set number including variant.
+    
+    Args:
+        set_number: str or int
+            Set number with or without variant.
+    
+    Returns:
+        str
+            Full set number.
+    """
+    
+    set_number = str(set_number)
+    
+    if '-' not in set_number:
+        set_number = "%s-1" % set_number
+    
+    return set_number
+
+
+def get_index():
+    """
+    Gets default set index stored at config.INDEX_PATH. The index is saved
+    automatically at exit.
+    
+    Returns:
+        brickse.SetIndex
+            Default set index.
+    """
+    
+    global _index
+    
+    with _index_lock:
+        
+        if _index is None or _index.path != config.INDEX_PATH:
+            
+            if _index is not None:
+                _index.save()
+            else:
+                atexit.register(_save_index)
+            
+            _index = SetIndex(config.INDEX_PATH)
+        
+        return _index
+
+
+def get_instructions_index():
+    """
+    Gets default instructions index kept in memory and updated by every
+    retrieved set instructions.
+    
+    Returns:
+        brickse.InstructionsIndex
+            Default instructions index.
+    """
+    
+    global _instructions
+    
+    with _instructions_lock:
+        
+        if _instructions is None:
+            _instructions = InstructionsIndex()
+        
+        return _instructions
+
+
+def _save_index():
+    """Saves current default set index."""
+    
+    with _index_lock:
+        if _index is not None:
+            _index.save()
@@ -0,0 +1,197 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import os
+import json
+from . objects import Collection, intern_string
+
+# define row fields
+FIELDS = ('set_id', 'number', 'variant', 'name', 'year', 'category', 'group', 'theme', 'subtheme', 'released', 'image_url')
+
+# define minimum number of pages worth a process pool
+POOL_MIN_PAGES = 4
+
+
+def ingest(sources, workers=None):
+    """
+    Parses many getSets response pages in parallel using a process pool. Each
+    source can be raw response body, disk cache file (*.cache) or recorded
+    response file (*.json). Files are read by the workers as well, so only
+    the compact rows are transferred back.
+    
+    Sets are returned as plain tuples with values ordered by FIELDS, which is
+    much cheaper to create, transfer and keep than brickse.Collection. Use
+    make_collection to create full object when needed. Duplicate sets are
+    removed, keeping the first occurrence.
+    
+    Args:
+        sources: (bytes or str,)
+            Response bodies or file paths.
+        
+        workers: int or None
+            Maximum number of processes. If set to None, the number of CPUs
+            is used.
+    
+    Returns:
+        [tuple]
+            Sets rows.
+    """
+    
+    sources = list(sources)
+    workers = workers or os.cpu_count() or 1
+    
+    # parse in current process
+    if workers == 1 or len(sources) < POOL_MIN_PAGES:
+        pages = map(parse_page, sources)
+        return _merge(pages)
+    
+    # parse in pool
+    from concurrent.futures import ProcessPoolExecutor
+    
+    chunk_size = max(1, len(sources) // (workers * 4))
+    
+    with ProcessPoolExecutor(min(workers, len(sources))) as executor:
+        pages = executor.map(parse_page, sources, chunksize=chunk_size)
+        return _merge(pages)
+
+
+def iter_pages(path):
+    """
+    Finds stored getSets pages in given disk cache or recordings folder.
+    
+    Args:
+        path: str
+            Cache or recordings folder path.
+    
+    Yields:
+        str
+            Page file path.
+    """
+    
+    for name in sorted(os.listdir(path)):
+        
+        if not name.endswith((".cache", ".json")):
+            continue
+        
+        page = os.path.join(path, name)
+        
+        # read request info
+        with open(page, 'rb') as f:
+            
+            if name.endswith(".cache"):
+                url = json.loads(f.readline()).get('url', "")
+            else:
+                url = json.load(f).get('url', "")
+        
+        if url.rsplit("/", 1)[-1] == "getSets":
+            yield page
+
+
+def parse_page(source):
+    """
+    Parses single getSets response page into sets rows.
+    
+    Args:
+        source: bytes or str
+            Response body or cache/recording file path.
+    
+    Returns:
+        [tuple]
+            Sets rows.
+    """
+    
+    body = _read_body(source)
+    if not body:
+        return []
+    
+    data = json.loads(body)
+    if data.get('status', 'success') != 'success':
+        return []
+    
+    return [make_row(item) for item in data.get('sets', ())]
+
+
+def make_row(data):
+    """
+    Creates compact set row from given JSON data.
+    
+    Args:
+        data: dict
+            JSON data retrieved from BrickSet.
+    
+    Returns:
+        tuple
+            Set values ordered by FIELDS.
+    """
+    
+    image = data.get('image', None) or {}
+    
+    return (
+        data['setID'],
+        data['number'],
+        data['numberVariant'],
+        data['name'],
+        data['year'],
+        intern_string(data['category']),
+        intern_string(data['themeGroup']),
+        intern_string(data['theme']),
+        intern_string(data.get('subtheme', None)),
+        data['released'],
+        image.get('imageURL', None))
+
+
+def make_collection(row):
+    """
+    Creates a new instance of brickse.Collection from given row.
+    
+    Args:
+        row: tuple
+            Set values ordered by FIELDS.
+    
+    Returns:
+        brickse.Collection
+            Initialized collection.
+    """
+    
+    return Collection(**dict(zip(FIELDS, row)))
+
+
+def _read_body(source):
+    """Gets response body from source."""
+    
+    # raw body
+    if isinstance(source, (bytes, bytearray)):
+        return source
+    
+    # cache file
+    if source.endswith(".cache"):
+        with open(source, 'rb') as f:
+            f.readline()
+            return f.read()
+    
+    # recording file
+    with open(source, 'r', encoding='utf8') as f:
+        data = json.load(f)
+    
+    if data.get('status', 200) != 200:
+        return None
+    
+    return data['body']
+
+
+def _merge(pages):
+    """Merges pages rows and removes duplicates."""
+    
+    rows = []
+    seen = set()
+    
+    for page in pages:
+        for row in page:
+            
+            if row[0] in seen:
+                continue
+            
+            seen.add(row[0])
+            rows.append(row)
+    
+    return rows
@@ -0,0 +1,476 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import time
+import threading
+import urllib.parse
+from . import config
+from . cache import redact_parameters
+
+# define histogram buckets in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# init hooks
+_pre_hooks = []
+_post_hooks = []
+
+
+class RequestEvent(object):
+    """Represents a single API request passed to hooks."""
+    
+    
+    def __init__(self, endpoint, parameters):
+        """
+        Initializes a new instance of brickse.metrics.RequestEvent.
+        
+        Args:
+            endpoint: str
+                API endpoint name.
+            
+            parameters: dict
+                Request parameters without API key and with credentials
+                redacted.
+        """
+        
+        super().__init__()
+        
+        self.endpoint = endpoint
+        self.parameters = parameters
+        
+        self.status = None
+        self.error = None
+        self.cached = False
+        self.stale = False
+        self.size = 0
+        
+        self.wait = 0.
+        self.network = 0.
+        self.duration = 0.
+        
+        self._start = time.perf_counter()
+
+
+class Histogram(object):
+    """Provides a cumulative histogram of observed values."""
+    
+    
+    def __init__(self, buckets=BUCKETS):
+        """
+        Initializes a new instance of brickse.metrics.Histogram.
+        
+        Args:
+            buckets: (float,)
+                Upper bounds of histogram buckets.
+        """
+        
+        super().__init__()
+        
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.
+    
+    
+    def observe(self, value):
+        """Adds given value into histogram."""
+        
+        self.count += 1
+        self.sum += value
+        
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+    
+    
+    def cumulative(self):
+        """Gets cumulative counts by bucket upper bound."""
+        
+        total = 0
+        results = []
+        
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            results.append((bound, total))
+        
+        return results
+
+
+class Metrics(object):
+    """Provides per-endpoint request counters and latency histograms."""
+    
+    
+    def __init__(self):
+        """Initializes a new instance of brickse.metrics.Metrics."""
+        
+        super().__init__()
+        
+        self._lock = threading.Lock()
+        self.reset()
+    
+    
+    def reset(self):
+        """Removes all recorded data."""
+        
+        with self._lock:
+            self.requests = {}
+            self.errors = {}
+            self.cache_hits = {}
+            self.stale = {}
+            self.bytes = {}
+            self.wait = {}
+            self.network = {}
+            self.decode = {}
+    
+    
+    def record(self, event):
+        """
+        Records finished request.
+        
+        Args:
+            event: brickse.metrics.RequestEvent
+                Finished request.
+        """
+        
+        endpoint = event.endpoint
+        
+        with self._lock:
+            
+            key = (endpoint, str(event.status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.bytes[endpoint] = self.bytes.get(endpoint, 0) + event.size
+            
+            if event.error is not None:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            
+            if event.cached:
+                self.cache_hits[endpoint] = self.cache_hits.get(endpoint, 0) + 1
+            
+            if event.stale:
+                self.stale[endpoint] = self.stale.get(endpoint, 0) + 1
+            
+            if not event.cached or event.status == 304:
+                self.wait.setdefault(endpoint, Histogram()).observe(event.wait)
+                self.network.setdefault(endpoint, Histogram()).observe(event.network)
+    
+    
+    def record_bytes(self, endpoint, size):
+        """
+        Records response bytes read after the request was finished.
+        
+        Args:
+            endpoint: str
+                API endpoint name.
+            
+            size: int
+                Number of bytes.
+        """
+        
+        with self._lock:
+            self.bytes[endpoint] = self.bytes.get(endpoint, 0) + size
+    
+    
+    def record_decode(self, endpoint, duration):
+        """
+        Records response decoding time.
+        
+        Args:
+            endpoint: str
+                API endpoint name.
+            
+            duration: float
+                Decoding time in seconds.
+        """
+        
+        with self._lock:
+            self.decode.setdefault(endpoint, Histogram()).observe(duration)
+    
+    
+    def export(self):
+        """
+        Exports recorded data in Prometheus text format.
+        
+        Returns:
+            str
+                Metrics text.
+        """
+        
+        lines = []
+        
+        with self._lock:
+            
+            _export_counter(lines, "brickse_requests_total", "Number of API requests.", {
+                (("endpoint", k[0]), ("status", k[1])): v for k, v in self.requests.items()})
+            
+            _export_counter(lines, "brickse_errors_total", "Number of failed API requests.", {
+                (("endpoint", k),): v for k, v in self.errors.items()})
+            
+            _export_counter(lines, "brickse_cache_hits_total", "Number of API requests served from cache.", {
+                (("endpoint", k),): v for k, v in self.cache_hits.items()})
+            
+            _export_counter(lines, "brickse_stale_total", "Number of API requests served by stale cached data.", {
+                (("endpoint", k),): v for k, v in self.stale.items()})
+            
+            _export_counter(lines, "brickse_bytes_total", "Number of transferred response bytes.", {
+                (("endpoint", k),): v for k, v in self.bytes.items()})
+            
+            _export_histogram(lines, "brickse_wait_seconds", "Time spent waiting for rate limiter.", self.wait)
+            _export_histogram(lines, "brickse_network_seconds", "Time spent by network request.", self.network)
+            _export_histogram(lines, "brickse_decode_seconds", "Time spent by JSON decoding.", self.decode)
+        
+        return "\n".join(lines) + "\n"
+
+
+class _ExporterHandler(object):
+    """
+    Serves metrics text. Combined with http.server.BaseHTTPRequestHandler
+    when the exporter is started, so that http.server is not imported unless
+    used.
+    """
+    
+    
+    def do_GET(self):
+        """Handles GET request."""
+        
+        body = _metrics.export().encode('utf8')
+        
+        self.send_response(200)
+        self.send_header('Content-Type', "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    
+    def log_message(self, format, *args):
+        """Disables request logging."""
+        
+        pass
+
+
+def add_hook(pre=None, post=None):
+    """
+    Registers request hooks. Pre-request hooks are called before the request
+    is sent (or served from cache), post-request hooks after it finished or
+    failed. Both receive brickse.metrics.RequestEvent.
+    
+    Args:
+        pre: callable or None
+            Pre-request hook.
+        
+        post: callable or None
+            Post-request hook.
+    """
+    
+    if pre is not None:
+        _pre_hooks.append(pre)
+    
+    if post is not None:
+        _post_hooks.append(post)
+
+
+def remove_hook(hook):
+    """
+    Removes previously registered hook.
+    
+    Args:
+        hook: callable
+            Hook to remove.
+    """
+    
+    for hooks in (_pre_hooks, _post_hooks):
+        while hook in hooks:
+            hooks.remove(hook)
+
+
+def begin(url, parameters):
+    """
+    Starts request instrumentation.
+    
+    Args:
+        url: str
+            Request URL.
+        
+        parameters: dict
+            Request parameters.
+    
+    Returns:
+        brickse.metrics.RequestEvent or None
+            Request event or None if instrumentation is disabled.
+    """
+    
+    if not config.METRICS and not _pre_hooks and not _post_hooks:
+        return None
+    
+    event = RequestEvent(
+        endpoint = get_endpoint(url),
+        parameters = redact_parameters(parameters))
+    
+    for hook in _pre_hooks:
+        hook(event)
+    
+    return event
+
+
+def end(event, status=None, error=None, cached=False, stale=False, size=0):
+    """
+    Finishes request instrumentation.
+    
+    Args:
+        event: brickse.metrics.RequestEvent or None
+            Request event.
+        
+        status: int or None
+            HTTP status code.
+        
+        error: Exception or None
+            Request error.
+        
+        cached: bool
+            Specifies whether the response was served from cache.
+        
+        stale: bool
+            Specifies whether stale cached data were served instead of failed
+            request.
+        
+        size: int
+            Number of response bytes.
+    """
+    
+    if event is None:
+        return
+    
+    event.status = status
+    event.error = error
+    event.cached = cached
+    event.stale = stale
+    event.size = size
+    event.duration = time.perf_counter() - event._start
+    
+    if config.METRICS:
+        _metrics.record(event)
+    
+    for hook in _post_hooks:
+        hook(event)
+
+
+def add_size(event, size):
+    """
+    Adds number of response bytes read after the request was finished (e.g.
+    when streamed response is decoded). The size of already passed event is
+    updated as well.
+    
+    Args:
+        event: brickse.metrics.RequestEvent or None
+            Finished request event.
+        
+        size: int
+            Number of bytes read.
+    """
+    
+    if event is None:
+        return
+    
+    event.size += size
+    
+    if config.METRICS:
+        _metrics.record_bytes(event.endpoint, size)
+
+
+def get_endpoint(url):
+    """Gets API endpoint name from URL."""
+    
+    return urllib.parse.urlparse(url).path.rsplit("/", 1)[-1]
+
+
+def get_metrics():
+    """
+    Gets default metrics registry.
+    
+    Returns:
+        brickse.metrics.Metrics
+            Metrics registry.
+    """
+    
+    return _metrics
+
+
+def export():
+    """
+    Exports default metrics in Prometheus text format.
+    
+    Returns:
+        str
+            Metrics text.
+    """
+    
+    return _metrics.export()
+
+
+def start_exporter(port=9464, host=""):
+    """
+    Starts HTTP server exposing default metrics in Prometheus text format.
+    
+    Args:
+        port: int
+            Server port.
+        
+        host: str
+            Server host.
+    
+    Returns:
+        http.server.ThreadingHTTPServer
+            Running server.
+    """
+    
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    # init server
+    handler = type("ExporterHandler", (_ExporterHandler, BaseHTTPRequestHandler), {})
+    
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    return server
+
+
+def _export_counter(lines, name, help, values):
+    """Exports counter values."""
+    
+    lines.append("# HELP %s %s" % (name, help))
+    lines.append("# TYPE %s counter" % name)
+    
+    for labels, value in sorted(values.items()):
+        lines.append("%s{%s} %s" % (name, _format_labels(labels), value))
+
+
+def _export_histogram(lines, name, help, histograms):
+    """Exports histogram values."""
+    
+    lines.append("# HELP %s %s" % (name, help))
+    lines.append("# TYPE %s histogram" % name)
+    
+    for endpoint, histogram in sorted(histograms.items()):
+        
+        for bound, count in histogram.cumulative():
+            labels = _format_labels((("endpoint", endpoint), ("le", repr(float(bound)))))
+            lines.append("%s_bucket{%s} %d" % (name, labels, count))
+        
+        labels = _format_labels((("endpoint", endpoint), ("le", "+Inf")))
+        lines.append("%s_bucket{%s} %d" % (name, labels, histogram.count))
+        
+        labels = _format_labels((("endpoint", endpoint),))
+        lines.append("%s_sum{%s} %r" % (name, labels, histogram.sum))
+        lines.append("%s_count{%s} %d" % (name, labels, histogram.count))
+
+
+def _format_labels(labels):
+    """Formats metric labels."""
+    
+    return ",".join('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels)
+
+
+# init default metrics
+_metrics = Metrics()
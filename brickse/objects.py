@@ -2,11 +2,19 @@
 # Copyright (c) Martin Strohalm. All rights reserved.
 
 import re
+import functools
+from . import config
 
 # define constants
 INSTRUCTIONS_VERSION_PATTERN = re.compile("(?:vers|V|v).?(\d\d)")
 INSTRUCTIONS_PARTS_PATTERN = re.compile("(?:\s|-)([0-9]{1,2})/([0-9]{1,2})(?:\s|$)")
 
+# init intern table
+_interned = {}
+
+# init entities fields
+_fields = {}
+
 
 class _Entity(object):
     """Provides a base class for all objects."""
@@ -81,10 +89,10 @@ class Collection(_Entity):
             variant = data['numberVariant'],
             name = data['name'],
             year = data['year'],
-            category = data['category'],
-            group = data['themeGroup'],
-            theme = data['theme'],
-            subtheme = data.get('subtheme', None),
+            category = intern_string(data['category']),
+            group = intern_string(data['themeGroup']),
+            theme = intern_string(data['theme']),
+            subtheme = intern_string(data.get('subtheme', None)),
             released = data['released'],
             image_url = data['image'].get('imageURL', None))
 
@@ -103,6 +111,9 @@ class Theme(_Entity):
         self.year_from = None
         self.year_to = None
         
+        self.children = None
+        self.years = None
+        
         super().__init__(**attrs)
     
     
@@ -129,7 +140,7 @@ class Theme(_Entity):
         # create sub-theme
         if 'subtheme' in data:
             return Theme(
-                parent = data['theme'],
+                parent = intern_string(data['theme']),
                 name = data['subtheme'],
                 sets = int(data['setCount']),
                 year_from = int(data['yearFrom']),
@@ -144,6 +155,47 @@ class Theme(_Entity):
             year_to = int(data['yearTo']))
 
 
+class Year(_Entity):
+    """Represents a BrickSet release year summary."""
+    
+    
+    def __init__(self, **attrs):
+        """Initializes a new instance of brickse.Year."""
+        
+        self.theme = None
+        self.year = None
+        self.sets = None
+        
+        super().__init__(**attrs)
+    
+    
+    def __str__(self):
+        """Gets standard string representation."""
+        
+        return "Year: %s (%s)" % (self.year, self.sets)
+    
+    
+    @staticmethod
+    def create(data):
+        """
+        Creates a new instance of brickse.Year from given JSON data.
+        
+        Args:
+            data: dict
+                JSON data retrieved from BrickSet.
+        
+        Returns:
+            brickse.Year
+                Initialized year.
+        """
+        
+        # create year
+        return Year(
+            theme = intern_string(data.get('theme', None)),
+            year = int(data['year']),
+            sets = int(data['setCount']))
+
+
 class Instructions(_Entity):
     """Represents a BrickSet set instructions definition."""
     
@@ -182,35 +234,117 @@ class Instructions(_Entity):
         
         # get description
         descr = data.get('description', None)
-        version = None
-        part = None
-        parts = None
-        
-        # get version
-        if descr:
-            
-            # get version
-            match = INSTRUCTIONS_VERSION_PATTERN.search(descr)
-            if match:
-                version = f"V{match.group(1)}"
-            elif descr[-3:] in (" IN", " NA"):
-                version = descr[-2:]
-            
-            # get parts
-            match = INSTRUCTIONS_PARTS_PATTERN.search(descr)
-            if match:
-                part = int(match.group(1))
-                parts = int(match.group(2))
+        
+        # parse description
+        version, region, part, parts = parse_instructions(descr)
         
         # create instructions
         return Instructions(
             description = descr,
             url = data['URL'],
-            version = version,
+            version = version or region,
             part = part,
             parts = parts)
 
 
+class Image(_Entity):
+    """Represents a BrickSet additional set image."""
+    
+    
+    def __init__(self, **attrs):
+        """Initializes a new instance of brickse.Image."""
+        
+        self.image_url = None
+        self.thumbnail_url = None
+        
+        super().__init__(**attrs)
+    
+    
+    def __str__(self):
+        """Gets standard string representation."""
+        
+        return "Image: %s" % self.image_url
+    
+    
+    @staticmethod
+    def create(data):
+        """
+        Creates a new instance of brickse.Image from given JSON data.
+        
+        Args:
+            data: dict
+                JSON data retrieved from BrickSet.
+        
+        Returns:
+            brickse.Image
+                Initialized image.
+        """
+        
+        # create image
+        return Image(
+            image_url = data.get('imageURL', None),
+            thumbnail_url = data.get('thumbnailURL', None))
+
+
+class Review(_Entity):
+    """Represents a BrickSet set review."""
+    
+    
+    def __init__(self, **attrs):
+        """Initializes a new instance of brickse.Review."""
+        
+        self.author = None
+        self.date = None
+        self.title = None
+        self.text = None
+        self.html = None
+        
+        self.overall = None
+        self.parts = None
+        self.building = None
+        self.playability = None
+        self.value = None
+        
+        super().__init__(**attrs)
+    
+    
+    def __str__(self):
+        """Gets standard string representation."""
+        
+        return "Review: %s (%s)" % (self.title, self.author)
+    
+    
+    @staticmethod
+    def create(data):
+        """
+        Creates a new instance of brickse.Review from given JSON data.
+        
+        Args:
+            data: dict
+                JSON data retrieved from BrickSet.
+        
+        Returns:
+            brickse.Review
+                Initialized review.
+        """
+        
+        # get rating
+        rating = data.get('rating', None) or {}
+        
+        # create review
+        return Review(
+            author = data.get('author', None),
+            date = data.get('datePosted', None),
+            title = data.get('title', None),
+            text = data.get('review', None),
+            html = data.get('HTML', None),
+            overall = rating.get('overall', None),
+            parts = rating.get('parts', None),
+            building = rating.get('buildingExperience', None),
+            playability = rating.get('playability', None),
+            value = rating.get('valueForMoney', None))
+
+
 class Minifig(_Entity):
     """Represents a BrickSet minifig."""
     
@@ -259,3 +393,151 @@ class Minifig(_Entity):
             owned_loose = data['ownedLoose'],
             owned_total = data['ownedTotal'],
             wanted = data['wanted'])
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_instructions(descr):
+    """
+    Parses instructions description. Results are cached, so that repeated
+    descriptions are parsed only once.
+    
+    Args:
+        descr: str or None
+            Instructions description.
+    
+    Returns:
+        (str or None, str or None, int or None, int or None)
+            Version (e.g. 'V29'), region ('IN' or 'NA'), part and number of
+            parts.
+    """
+    
+    version = None
+    region = None
+    part = None
+    parts = None
+    
+    if not descr:
+        return version, region, part, parts
+    
+    # get version
+    match = INSTRUCTIONS_VERSION_PATTERN.search(descr)
+    if match:
+        version = f"V{match.group(1)}"
+    
+    # get region
+    if descr[-3:] in (" IN", " NA"):
+        region = descr[-2:]
+    
+    # get parts
+    match = INSTRUCTIONS_PARTS_PATTERN.search(descr)
+    if match:
+        part = int(match.group(1))
+        parts = int(match.group(2))
+    
+    return version, region, part, parts
+
+
+def intern_string(value):
+    """
+    Gets shared instance of given string, so that values repeating across
+    many entities (e.g. themes or categories) are kept in memory only once.
+    The intern table is bounded by config.INTERN_SIZE, new values are not
+    shared once it is full.
+    
+    Args:
+        value: str or None
+            Value to intern.
+    
+    Returns:
+        str or None
+            Shared value.
+    """
+    
+    if value is None:
+        return None
+    
+    shared = _interned.get(value, None)
+    if shared is not None:
+        return shared
+    
+    if len(_interned) >= config.INTERN_SIZE:
+        return value
+    
+    return _interned.setdefault(value, value)
+
+
+def clear_interned():
+    """Removes all values from the intern table."""
+    
+    _interned.clear()
+
+
+def entity_fields(cls):
+    """
+    Gets attributes names of given entity class in definition order. New
+    attributes must always be added at the end, so that previously serialized
+    values remain valid.
+    
+    Args:
+        cls: type
+            Entity class.
+    
+    Returns:
+        (str,)
+            Attributes names.
+    """
+    
+    fields = _fields.get(cls, None)
+    if fields is None:
+        fields = _fields.setdefault(cls, tuple(vars(cls())))
+    
+    return fields
+
+
+def entity_values(entity):
+    """
+    Gets attributes values of given entity ordered by entity_fields.
+    
+    Args:
+        entity: brickse.objects._Entity
+            Entity to serialize.
+    
+    Returns:
+        tuple
+            Attributes values.
+    """
+    
+    attrs = entity.__dict__
+    fields = entity_fields(entity.__class__)
+    
+    return tuple(attrs.get(f, None) for f in fields)
+
+
+def restore_entity(cls, values):
+    """
+    Creates entity from attributes values without re-validating them. Values
+    missing at the end (e.g. serialized by older version) are set to None.
+    
+    Args:
+        cls: type
+            Entity class.
+        
+        values: tuple
+            Attributes values ordered by entity_fields.
+    
+    Returns:
+        brickse.objects._Entity
+            Restored entity.
+    """
+    
+    fields = entity_fields(cls)
+    
+    entity = cls.__new__(cls)
+    
+    if len(values) == len(fields):
+        entity.__dict__ = dict(zip(fields, values))
+    else:
+        entity.__dict__ = dict.fromkeys(fields)
+        entity.__dict__.update(zip(fields, values))
+    
+    return entity
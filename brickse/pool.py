@@ -0,0 +1,218 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import ssl
+import time
+import threading
+from . import config
+
+# init pool
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ConnectionPool(object):
+    """
+    Keeps idle keep-alive connections per host, so that subsequent requests
+    skip DNS lookup, TCP connect and TLS handshake. At most config.POOL_SIZE
+    connections are kept per host and connections idle for longer than
+    config.POOL_IDLE are closed, as the server has most likely dropped them.
+    
+    The pool also remembers last TLS session of every host, so that new
+    connections can resume it with an abbreviated handshake.
+    """
+    
+    
+    def __init__(self):
+        """Initializes a new instance of brickse.pool.ConnectionPool."""
+        
+        super().__init__()
+        
+        self._connections = {}
+        self._sessions = {}
+        self._lock = threading.Lock()
+        
+        self.opened = 0
+        self.resumed = 0
+        self.reused = 0
+    
+    
+    def stats(self):
+        """
+        Gets pool statistics.
+        
+        Returns:
+            dict
+                Numbers of opened, resumed and reused connections and
+                currently idle connections.
+        """
+        
+        with self._lock:
+            return {
+                'opened': self.opened,
+                'resumed': self.resumed,
+                'reused': self.reused,
+                'idle': sum(len(x) for x in self._connections.values())}
+    
+    
+    def idle(self, key):
+        """
+        Gets number of idle connections of given host.
+        
+        Args:
+            key: (str, str)
+                URL scheme and host.
+        
+        Returns:
+            int
+                Number of idle connections.
+        """
+        
+        with self._lock:
+            return len(self._connections.get(key, ()))
+    
+    
+    def get(self, key):
+        """
+        Gets idle connection of given host.
+        
+        Args:
+            key: (str, str)
+                URL scheme and host.
+        
+        Returns:
+            http.client.HTTPConnection or None
+                Idle connection or None if not available.
+        """
+        
+        expired = []
+        conn = None
+        
+        with self._lock:
+            
+            idle = self._connections.get(key, None)
+            limit = time.monotonic() - config.POOL_IDLE
+            
+            while idle:
+                
+                conn, released = idle.pop()
+                if released >= limit:
+                    self.reused += 1
+                    break
+                
+                expired.append(conn)
+                conn = None
+        
+        for item in expired:
+            item.close()
+        
+        return conn
+    
+    
+    def put(self, key, conn):
+        """
+        Returns connection into the pool to be reused.
+        
+        Args:
+            key: (str, str)
+                URL scheme and host.
+            
+            conn: http.client.HTTPConnection
+                Connection with completely read response.
+        """
+        
+        # remember TLS session
+        if isinstance(conn.sock, ssl.SSLSocket):
+            self.set_session((conn.host, conn.port), conn.sock.session)
+        
+        with self._lock:
+            
+            idle = self._connections.setdefault(key, [])
+            
+            if len(idle) < config.POOL_SIZE:
+                idle.append((conn, time.monotonic()))
+                return
+        
+        conn.close()
+    
+    
+    def get_session(self, key):
+        """
+        Gets last TLS session of given host.
+        
+        Args:
+            key: (str, int)
+                Host name and port.
+        
+        Returns:
+            ssl.SSLSession or None
+                TLS session.
+        """
+        
+        with self._lock:
+            return self._sessions.get(key, None)
+    
+    
+    def set_session(self, key, session):
+        """
+        Stores TLS session of given host.
+        
+        Args:
+            key: (str, int)
+                Host name and port.
+            
+            session: ssl.SSLSession or None
+                TLS session.
+        """
+        
+        if session is None:
+            return
+        
+        with self._lock:
+            self._sessions[key] = session
+    
+    
+    def connected(self, resumed=False):
+        """
+        Records new connection.
+        
+        Args:
+            resumed: bool
+                True if TLS session was resumed.
+        """
+        
+        with self._lock:
+            self.opened += 1
+            if resumed:
+                self.resumed += 1
+    
+    
+    def clear(self):
+        """Closes all idle connections and forgets TLS sessions."""
+        
+        with self._lock:
+            connections = [c for x in self._connections.values() for c, r in x]
+            self._connections.clear()
+            self._sessions.clear()
+        
+        for conn in connections:
+            conn.close()
+
+
+def get_pool():
+    """
+    Gets shared connection pool.
+    
+    Returns:
+        brickse.pool.ConnectionPool
+            Connection pool.
+    """
+    
+    global _pool
+    
+    with _pool_lock:
+        
+        if _pool is None:
+            _pool = ConnectionPool()
+        
+        return _pool
@@ -0,0 +1,227 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import io
+import os
+import json
+import threading
+import email.message
+import urllib.error
+import urllib.parse
+from . cache import CachedResponse, make_key, redact_parameters
+from . request import urlopen
+
+
+class Recorder(object):
+    """Provides a transport recording all responses into files."""
+    
+    
+    def __init__(self, path, transport=None):
+        """
+        Initializes a new instance of brickse.Recorder.
+        
+        Args:
+            path: str
+                Recordings folder path.
+            
+            transport: object or None
+                Underlying transport used to send requests. If set to None,
+                requests are sent directly by urllib.
+        """
+        
+        super().__init__()
+        
+        self._path = path
+        self._transport = transport
+        
+        # init folder
+        os.makedirs(path, exist_ok=True)
+    
+    
+    def open(self, request):
+        """
+        Sends given request and records the response.
+        
+        Args:
+            request: urllib.request.Request
+                Request to send.
+        
+        Returns:
+            brickse.cache.CachedResponse
+                Server response.
+        """
+        
+        # send request
+        try:
+            
+            if self._transport is not None:
+                handle = self._transport.open(request)
+            else:
+                handle = urlopen(request)
+        
+        except urllib.error.HTTPError as e:
+            body = e.read()
+            self._save(request, e.code, dict(e.headers or {}), body)
+            raise urllib.error.HTTPError(e.url, e.code, e.msg, e.headers, io.BytesIO(body))
+        
+        # record response
+        body = handle.read()
+        headers = dict(handle.headers)
+        
+        self._save(request, handle.status, headers, body)
+        
+        return CachedResponse(request.full_url, body, handle.status, headers)
+    
+    
+    def _save(self, request, status, headers, body):
+        """Saves response into file."""
+        
+        url, parameters = parse_request(request)
+        body = body.decode('utf8', errors='replace')
+        
+        # redact retrieved user token
+        if url.rsplit("/", 1)[-1] == "login":
+            body = redact_token(body)
+        
+        data = {
+            'url': url,
+            'method': request.get_method(),
+            'parameters': parameters,
+            'status': status,
+            'headers': headers,
+            'body': body}
+        
+        path = os.path.join(self._path, make_recording_key(url, parameters) + ".json")
+        temp = "%s.%d.tmp" % (path, threading.get_ident())
+        
+        with open(temp, 'w', encoding='utf8') as f:
+            json.dump(data, f, indent=2)
+        
+        os.replace(temp, path)
+
+
+class Player(object):
+    """Provides a transport replaying previously recorded responses."""
+    
+    
+    def __init__(self, path):
+        """
+        Initializes a new instance of brickse.Player.
+        
+        Args:
+            path: str
+                Recordings folder path.
+        """
+        
+        super().__init__()
+        
+        self._path = path
+    
+    
+    def open(self, request):
+        """
+        Gets recorded response for given request.
+        
+        Args:
+            request: urllib.request.Request
+                Request to replay.
+        
+        Returns:
+            brickse.cache.CachedResponse
+                Recorded response.
+        """
+        
+        url, parameters = parse_request(request)
+        
+        # load recording
+        path = os.path.join(self._path, make_recording_key(url, parameters) + ".json")
+        if not os.path.exists(path):
+            raise urllib.error.URLError("Response not recorded: %s %s" % (url, parameters))
+        
+        with open(path, 'r', encoding='utf8') as f:
+            data = json.load(f)
+        
+        body = data['body'].encode('utf8')
+        
+        # raise recorded error
+        if data['status'] >= 400:
+            
+            headers = email.message.Message()
+            for name, value in data['headers'].items():
+                headers[name] = value
+            
+            raise urllib.error.HTTPError(request.full_url, data['status'], "Recorded error", headers, io.BytesIO(body))
+        
+        return CachedResponse(request.full_url, body, data['status'], data['headers'])
+
+
+def make_recording_key(url, parameters):
+    """
+    Creates recording key for given request. Only the endpoint name is used
+    from the URL, so that recordings can be replayed against any server.
+    
+    Args:
+        url: str
+            Request URL.
+        
+        parameters: dict
+            Request parameters.
+    
+    Returns:
+        str
+            Recording key.
+    """
+    
+    return make_key(url.rsplit("/", 1)[-1], parameters)
+
+
+def parse_request(request):
+    """
+    Gets base URL and parameters of given request without API key and with
+    credentials redacted (see brickse.cache.redact_parameters), so that
+    recordings can be shared safely.
+    
+    Args:
+        request: urllib.request.Request
+            Request to parse.
+    
+    Returns:
+        (str, dict)
+            Base URL and request parameters.
+    """
+    
+    url, _, query = request.full_url.partition("?")
+    items = urllib.parse.parse_qsl(query)
+    
+    if request.data:
+        items += urllib.parse.parse_qsl(request.data.decode('utf8'))
+    
+    return url, redact_parameters(dict(items))
+
+
+def redact_token(body):
+    """
+    Replaces user token in login response body by the same placeholder used
+    for 'userHash' parameter, so that replayed login leads to recorded user
+    requests.
+    
+    Args:
+        body: str
+            Login response body.
+    
+    Returns:
+        str
+            Redacted body.
+    """
+    
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    
+    if not isinstance(data, dict) or not data.get('hash', None):
+        return body
+    
+    data['hash'] = redact_parameters({'userHash': data['hash']})['userHash']
+    
+    return json.dumps(data)
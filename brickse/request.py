@@ -3,25 +3,165 @@
 
 import ssl
 import re
+import json
 import time
+import socket
+import functools
+import threading
+import contextlib
+import contextvars
+import http.client
+import urllib.error
 import urllib.parse
 import urllib.request
 from . import config
-
-# init last request time
-_last_request_time = 0
+from . import metrics
+from . tracing import span
+from . scheduler import get_scheduler
+from . breaker import CircuitOpen, get_breaker, mark_stale
+from . pool import get_pool
+from . cache import CacheEntry, CachedResponse, is_cacheable, is_success
 
 # define page pattern
 _PAGE_PATTERN = re.compile("page=([0-9]+)")
 
-# handle SSL certificate
-_SSL_CONTEXT = ssl._create_unverified_context()
+# init current deadline
+_deadline = contextvars.ContextVar("brickse_deadline", default=None)
+
+# init URL opener
+_opener = None
+_ssl_context = None
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when time budget of a call is exhausted."""
+    
+    
+    def __init__(self, message="Deadline exceeded.", partial=None):
+        """
+        Initializes a new instance of brickse.DeadlineExceeded.
+        
+        Args:
+            message: str
+                Error message.
+            
+            partial: any
+                Partial results retrieved before the deadline.
+        """
+        
+        super().__init__(message)
+        self.partial = partial
+
+
+class _HTTPConnection(http.client.HTTPConnection):
+    """HTTP connection with separate connect and read timeouts."""
+    
+    
+    def __init__(self, *args, read_timeout=None, **kwargs):
+        """Initializes a new instance of connection."""
+        
+        super().__init__(*args, **kwargs)
+        self._read_timeout = read_timeout
+    
+    
+    def connect(self):
+        """Connects to the host and sets read timeout."""
+        
+        super().connect()
+        get_pool().connected()
+        
+        if self._read_timeout is not None:
+            self.sock.settimeout(self._read_timeout)
+
+
+class _HTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS connection with separate connect and read timeouts."""
+    
+    
+    def __init__(self, *args, read_timeout=None, **kwargs):
+        """Initializes a new instance of connection."""
+        
+        super().__init__(*args, **kwargs)
+        self._read_timeout = read_timeout
+    
+    
+    def connect(self):
+        """
+        Connects to the host resuming last TLS session of the host if
+        available and sets read timeout.
+        """
+        
+        http.client.HTTPConnection.connect(self)
+        
+        pool = get_pool()
+        hostname = self._tunnel_host or self.host
+        session = pool.get_session((self.host, self.port))
+        
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=hostname, session=session)
+        
+        pool.connected(self.sock.session_reused)
+        pool.set_session((self.host, self.port), self.sock.session)
+        
+        if self._read_timeout is not None:
+            self.sock.settimeout(self._read_timeout)
 
 
-def request(url, parameters={}, post=False):
+class _PooledResponse(http.client.HTTPResponse):
+    """HTTP response returning its connection into the pool once read."""
+    
+    _pooled = None
+    
+    
+    def _close_conn(self):
+        """Closes response stream and releases connection."""
+        
+        super()._close_conn()
+        
+        pooled, self._pooled = self._pooled, None
+        if pooled is not None:
+            pool, key, conn = pooled
+            pool.put(key, conn)
+    
+    
+    def close(self):
+        """Closes response, dropping its connection if not completely read."""
+        
+        pooled, self._pooled = self._pooled, None
+        if pooled is not None:
+            pooled[2].close()
+        
+        super().close()
+
+
+class _HTTPHandler(urllib.request.HTTPHandler):
+    """HTTP handler applying read timeout and keeping connections alive."""
+    
+    
+    def http_open(self, req):
+        """Opens HTTP request."""
+        
+        return _open(self, _HTTPConnection, req)
+
+
+class _HTTPSHandler(urllib.request.HTTPSHandler):
+    """HTTPS handler applying read timeout and keeping connections alive."""
+    
+    
+    def https_open(self, req):
+        """Opens HTTPS request."""
+        
+        return _open(self, _HTTPSConnection, req, context=self._context)
+
+
+def request(url, parameters={}, post=False, headers=None, refresh=False):
     """
     Builds the final URL and opens handler.
     
+    If response cache is set by config.CACHE and the endpoint is cacheable,
+    fresh cached response is returned without contacting the server. Expired
+    entries are refreshed by conditional request, so that unchanged data are
+    not downloaded again.
+    
     Args:
         url: str
             Request URL.
@@ -31,9 +171,16 @@ def request(url, parameters={}, post=False):
         
         post: bool
             If set to True, request will be sent as POST.
+        
+        headers: dict or None
+            Additional request headers.
+        
+        refresh: bool
+            If set to True, cached entry is refreshed even if still fresh and
+            the access is not counted into cache statistics.
     
     Returns:
-        http.client.HTTPResponse
+        http.client.HTTPResponse or brickse.cache.CachedResponse
             Server response.
     """
     
@@ -47,27 +194,627 @@ def request(url, parameters={}, post=False):
     if 'page' in parameters and parameters['page'].startswith("http"):
         parameters['page'] = _PAGE_PATTERN.findall(parameters['page'])[0]
     
+    # send request
+    with span("brickse.request", endpoint=url.rsplit("/", 1)[-1], post=post):
+        return _request(url, parameters, post, dict(headers or {}), refresh)
+
+
+def _request(url, parameters, post, headers, refresh=False):
+    """Sends prepared request using cache if possible."""
+    
     # prepare options
     options = urllib.parse.urlencode(parameters, doseq=True)
     
+    # start instrumentation
+    event = metrics.begin(url, parameters)
+    
+    # check cache
+    cache = config.CACHE
+    entry = None
+    
+    if cache is not None and is_cacheable(url, parameters):
+        
+        with span("brickse.cache") as cache_span:
+            key, entry = cache.lookup(url, parameters, track=not refresh)
+            cache_span.set_attribute("hit", entry is not None and not entry.expired)
+        
+        # use fresh entry
+        if entry is not None and not entry.expired and not refresh:
+            metrics.end(event, 200, cached=True, size=len(entry.body))
+            return entry.response()
+        
+        # set validators
+        if entry is not None:
+            headers.update(entry.validators())
+    
+    else:
+        cache = None
+    
+    # check circuit
+    endpoint = metrics.get_endpoint(url)
+    breaker = get_breaker(endpoint)
+    
+    if breaker is not None and not breaker.allow():
+        return _serve_stale(event, endpoint, entry, CircuitOpen(endpoint))
+    
     # assert time restrictions
-    global _last_request_time
+    start = time.perf_counter()
+    
+    with span("brickse.wait"):
+        try:
+            wait()
+        except DeadlineExceeded:
+            if breaker is not None:
+                breaker.cancel()
+            raise
+    
+    if event is not None:
+        event.wait = time.perf_counter() - start
+    
+    # make request
+    if post:
+        request = urllib.request.Request(url, options.encode('utf8'), headers=headers)
+    else:
+        request = urllib.request.Request("%s?%s" % (url, options), headers=headers)
+    
+    # send request
+    start = time.perf_counter()
+    
+    try:
+        handle = send(request)
+        body = handle.read() if cache is not None else None
+    
+    except urllib.error.HTTPError as e:
+        
+        if event is not None:
+            event.network = time.perf_counter() - start
+        
+        # release connection
+        _release(e)
+        
+        # server failed
+        if e.code >= 500:
+            
+            if breaker is not None:
+                breaker.failure()
+            
+            return _serve_stale(event, endpoint, entry, e)
+        
+        if breaker is not None:
+            breaker.success()
+        
+        # use unchanged entry
+        if e.code == 304 and entry is not None:
+            cache.revalidate(key, entry)
+            metrics.end(event, 304, cached=True)
+            return entry.response()
+        
+        metrics.end(event, e.code, error=e)
+        raise
+    
+    except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+        
+        if event is not None:
+            event.network = time.perf_counter() - start
+        
+        # deadline is not server failure
+        if isinstance(e, DeadlineExceeded):
+            
+            if breaker is not None:
+                breaker.cancel()
+            
+            metrics.end(event, error=e)
+            raise
+        
+        if breaker is not None:
+            breaker.failure()
+        
+        return _serve_stale(event, endpoint, entry, e)
+    
+    except Exception as e:
+        
+        if event is not None:
+            event.network = time.perf_counter() - start
+        
+        if breaker is not None:
+            breaker.cancel()
+        
+        metrics.end(event, error=e)
+        raise
+    
+    if event is not None:
+        event.network = time.perf_counter() - start
+    
+    if breaker is not None:
+        breaker.success()
+    
+    # no caching
+    if cache is None:
+        metrics.end(event, handle.status)
+        handle.event = event
+        return handle
+    
+    # do not cache API error
+    if not is_success(body):
+        metrics.end(event, handle.status, size=len(body))
+        return CachedResponse(url, body, handle.status, dict(handle.headers))
+    
+    # store response
+    entry = CacheEntry(
+        url = url,
+        parameters = {k: v for k, v in parameters.items() if k != 'apiKey'},
+        post = post,
+        body = body,
+        etag = handle.headers.get('ETag', None),
+        modified = handle.headers.get('Last-Modified', None),
+        expires = time.time() + cache.ttl)
+    
+    cache.set(key, entry)
+    metrics.end(event, handle.status, size=len(body))
+    
+    return CachedResponse(url, body, handle.status, dict(handle.headers))
+
+
+def _release(response):
+    """Reads remaining error response, so that its connection can be reused."""
+    
+    try:
+        response.read()
+    except (OSError, http.client.HTTPException):
+        pass
+    finally:
+        response.close()
+
+
+def _serve_stale(event, endpoint, entry, error):
+    """Serves last known cached data instead of failed request if allowed."""
+    
+    if entry is None or not config.SERVE_STALE:
+        metrics.end(event, getattr(error, 'code', None), error=error)
+        raise error
+    
+    metrics.end(event, 200, cached=True, stale=True, size=len(entry.body))
+    mark_stale(endpoint)
+    
+    return entry.response(stale=True)
+
+
+def decode(response):
+    """
+    Reads and decodes JSON response. Decoding time is recorded if metrics are
+    enabled by config.METRICS.
+    
+    Args:
+        response: http.client.HTTPResponse or brickse.cache.CachedResponse
+            Server response.
+    
+    Returns:
+        dict
+            Response data.
+    """
+    
+    try:
+        body = response.read()
+    except OSError as e:
+        _raise_deadline(e)
+        raise
+    
+    # count streamed bytes
+    metrics.add_size(getattr(response, 'event', None), len(body))
+    
+    if not config.METRICS:
+        return json.loads(body)
+    
+    start = time.perf_counter()
+    data = json.loads(body)
+    
+    metrics.get_metrics().record_decode(metrics.get_endpoint(response.url), time.perf_counter() - start)
+    
+    return data
+
+
+def send(request):
+    """
+    Sends prepared request using transport set by config.TRANSPORT or
+    directly by urllib if not set.
+    
+    Args:
+        request: urllib.request.Request
+            Request to send.
+    
+    Returns:
+        http.client.HTTPResponse or brickse.cache.CachedResponse
+            Server response.
+    """
+    
+    if config.TRANSPORT is not None:
+        return config.TRANSPORT.open(request)
+    
+    return urlopen(request)
+
+
+def urlopen(request):
+    """
+    Sends prepared request directly by urllib. Connection and read timeouts
+    are set by config.CONNECT_TIMEOUT and config.READ_TIMEOUT and limited by
+    current deadline.
+    
+    Args:
+        request: urllib.request.Request
+            Request to send.
+    
+    Returns:
+        http.client.HTTPResponse
+            Server response.
+    """
+    
+    # get timeouts
+    connect_timeout = config.CONNECT_TIMEOUT
+    read_timeout = config.READ_TIMEOUT
+    
+    left = check_deadline()
+    if left is not None:
+        connect_timeout = left if connect_timeout is None else min(connect_timeout, left)
+        read_timeout = left if read_timeout is None else min(read_timeout, left)
+    
+    if connect_timeout is None:
+        connect_timeout = socket._GLOBAL_DEFAULT_TIMEOUT
+    
+    # send request
+    request.read_timeout = read_timeout
+    
+    try:
+        return _get_opener().open(request, timeout=connect_timeout)
+    except urllib.error.HTTPError:
+        raise
+    except OSError as e:
+        _raise_deadline(e)
+        raise
+
+
+def prewarm(url=None, count=None):
+    """
+    Opens connections to API host in background thread, so that DNS lookup,
+    TCP connect and TLS handshake are done before the first request needs
+    them. The connections are put into the connection pool, already opened
+    idle connections are counted. Connection errors are ignored and reported
+    by actual requests.
+    
+    Args:
+        url: str or None
+            Any URL of the host. If set to None, the value of config.API_URL
+            is used.
+        
+        count: int or None
+            Number of connections to open. If set to None, the value of
+            config.PREWARM is used.
+    
+    Returns:
+        threading.Thread or None
+            Started background thread or None if nothing to open.
+    """
+    
+    # get defaults
+    url = urllib.parse.urlsplit(url or config.API_URL)
+    count = min(count or config.PREWARM, config.POOL_SIZE)
+    
+    # check transport
+    if config.TRANSPORT is not None or url.scheme not in ("http", "https"):
+        return None
+    
+    # check idle connections
+    key = (url.scheme, url.netloc)
+    count -= get_pool().idle(key)
+    
+    if count <= 0:
+        return None
+    
+    # init connection
+    if url.scheme == "https":
+        _get_opener()
+        conn_class = functools.partial(_HTTPSConnection, context=_ssl_context)
+    else:
+        conn_class = _HTTPConnection
+    
+    def connect():
+        for i in range(count):
+            conn = conn_class(url.netloc, timeout=config.CONNECT_TIMEOUT, read_timeout=config.READ_TIMEOUT)
+            conn.response_class = _PooledResponse
+            try:
+                conn.connect()
+            except OSError:
+                conn.close()
+                return
+            get_pool().put(key, conn)
+    
+    # start connecting
+    thread = threading.Thread(target=connect, name="brickse-prewarm", daemon=True)
+    thread.start()
+    
+    return thread
+
+
+def wait():
+    """
+    Waits until next request can be sent according to config.REQUEST_DELAY.
+    Free slots are distributed by the request scheduler according to current
+    priority class (see brickse.priority), so that interactive calls are not
+    stuck behind batch work. If no slot is available before current deadline,
+    brickse.DeadlineExceeded is raised.
+    """
+    
+    # no limit
+    if config.REQUEST_DELAY <= 0:
+        return
+    
+    # wait for slot
+    if not get_scheduler().acquire(limit=_deadline.get()):
+        raise DeadlineExceeded("Deadline exceeded while waiting for rate limit.")
+
+
+def download(url, stream, offset=0, chunk_size=None, retries=None):
+    """
+    Downloads a file from given URL and writes it into given stream in chunks.
+    If the connection fails, the download is resumed from the last received
+    byte by HTTP Range request.
+    
+    Args:
+        url: str
+            File URL.
+        
+        stream: file
+            Binary file-like object to write into.
+        
+        offset: int
+            Number of bytes already available in the stream. If greater than
+            zero, only the remaining part of the file is requested.
+        
+        chunk_size: int or None
+            Number of bytes to read at once. If set to None, the value of
+            config.DOWNLOAD_CHUNK_SIZE is used.
+        
+        retries: int or None
+            Maximum number of resume attempts. If set to None, the value of
+            config.DOWNLOAD_RETRIES is used. Attempts are delayed by
+            config.DOWNLOAD_RETRY_DELAY, doubled after each attempt.
+    
+    Returns:
+        int
+            Total number of bytes in the stream.
+    """
+    
+    # get defaults
+    if chunk_size is None:
+        chunk_size = config.DOWNLOAD_CHUNK_SIZE
+    
+    if retries is None:
+        retries = config.DOWNLOAD_RETRIES
+    
+    attempt = 0
+    
     while True:
-        delay = _last_request_time + config.REQUEST_DELAY - time.time()
-        if delay <= 0:
-            _last_request_time = time.time()
-            break
-        else:
+        
+        # make request
+        headers = {'User-Agent': 'Brickse Tool'}
+        if offset:
+            headers['Range'] = "bytes=%d-" % offset
+        
+        request = urllib.request.Request(url, headers=headers)
+        
+        try:
+            
+            # trace attempt
+            with span("brickse.retry" if attempt else "brickse.download", attempt=attempt, offset=offset):
+                
+                # send request
+                handle = urlopen(request)
+                
+                # restart if range is not supported
+                if offset and handle.status != 206:
+                    stream.seek(0)
+                    stream.truncate()
+                    offset = 0
+                
+                # read data
+                while True:
+                    
+                    chunk = handle.read(chunk_size)
+                    if not chunk:
+                        break
+                    
+                    stream.write(chunk)
+                    offset += len(chunk)
+                
+                # check connection closed prematurely
+                if handle.length:
+                    raise http.client.IncompleteRead(b"", handle.length)
+                
+                return offset
+        
+        except DeadlineExceeded:
+            raise
+        
+        except urllib.error.HTTPError as e:
+            
+            # file already complete
+            if e.code == 416 and offset:
+                return offset
+            
+            raise
+        
+        except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+            
+            _raise_deadline(e)
+            
+            attempt += 1
+            if attempt > retries:
+                raise
+            
+            # wait before next attempt
+            delay = config.DOWNLOAD_RETRY_DELAY * 2 ** (attempt - 1)
+            left = check_deadline()
+            if left is not None and left <= delay:
+                raise DeadlineExceeded("Deadline exceeded while waiting for download retry.")
+            
             time.sleep(delay)
+
+
+@contextlib.contextmanager
+def deadline(timeout):
+    """
+    Sets time budget for all the requests sent within the context, including
+    pagination, retries and rate limit waiting. Nested deadlines can only
+    shorten the budget. When the budget is exhausted, brickse.DeadlineExceeded
+    is raised.
+    
+    Args:
+        timeout: float or None
+            Time budget in seconds. If set to None, current deadline is kept.
+    
+    Yields:
+        float or None
+            Deadline timestamp.
+    """
+    
+    current = _deadline.get()
+    
+    # keep current
+    if timeout is None:
+        yield current
+        return
+    
+    # set deadline
+    value = time.time() + timeout
+    if current is not None:
+        value = min(value, current)
+    
+    token = _deadline.set(value)
+    
+    try:
+        yield value
+    finally:
+        _deadline.reset(token)
+
+
+def check_deadline():
+    """
+    Checks current deadline.
+    
+    Returns:
+        float or None
+            Remaining time in seconds or None if no deadline is set.
+    """
+    
+    value = _deadline.get()
+    if value is None:
+        return None
+    
+    left = value - time.time()
+    if left <= 0:
+        raise DeadlineExceeded()
+    
+    return left
+
+
+def _raise_deadline(error):
+    """Raises brickse.DeadlineExceeded if given error was caused by deadline."""
+    
+    value = _deadline.get()
+    if value is not None and value - time.time() < 0.01:
+        raise DeadlineExceeded() from error
+
+
+def _get_opener():
+    """Gets URL opener."""
+    
+    global _opener, _ssl_context
+    
+    # init opener on first request (handle SSL certificate)
+    if _opener is None:
+        _ssl_context = ssl._create_unverified_context()
+        _opener = urllib.request.build_opener(_HTTPHandler, _HTTPSHandler(context=_ssl_context))
+    
+    return _opener
+
+
+def _open(handler, conn_class, req, **kwargs):
+    """Sends request using pooled keep-alive connection."""
+    
+    read_timeout = getattr(req, 'read_timeout', None)
+    
+    # use single-use connection for proxy tunnel
+    if req._tunnel_host:
+        return handler.do_open(conn_class, req, read_timeout=read_timeout, **kwargs)
+    
+    # prepare headers
+    headers = dict(req.unredirected_hdrs)
+    headers.update({k: v for k, v in req.headers.items() if k not in headers})
+    headers = {k.title(): v for k, v in headers.items()}
     
     # send request
-    if post:
-        handle = urllib.request.urlopen(url, options.encode('utf8'), context=_SSL_CONTEXT)
-    else:
-        url = "%s?%s" % (url, options)
-        handle = urllib.request.urlopen(url, context=_SSL_CONTEXT)
+    pool = get_pool()
+    key = (req.type, req.host)
+    conn = pool.get(key)
+    
+    while True:
+        
+        reused = conn is not None
+        
+        # init connection
+        if conn is None:
+            conn = conn_class(req.host, timeout=req.timeout, read_timeout=read_timeout, **kwargs)
+            conn.response_class = _PooledResponse
+        
+        # update timeouts (left from previous request otherwise)
+        else:
+            conn.timeout = req.timeout
+            conn._read_timeout = read_timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(_socket_timeout(req.timeout, read_timeout))
+        
+        try:
+            
+            try:
+                conn.request(req.get_method(), req.selector, req.data, headers, encode_chunked=req.has_header('Transfer-encoding'))
+            except OSError as e:
+                raise urllib.error.URLError(e)
+            
+            response = conn.getresponse()
+        
+        except Exception as e:
+            conn.close()
+            
+            # retry connection closed by server while idle
+            reason = e.reason if isinstance(e, urllib.error.URLError) else e
+            if reused and isinstance(reason, (ConnectionResetError, BrokenPipeError)):
+                conn = None
+                continue
+            
+            raise
+        
+        break
+    
+    # release connection once read
+    response._pooled = (pool, key, conn)
+    if response.length == 0:
+        response._close_conn()
+    
+    response.url = req.get_full_url()
+    response.msg = response.reason
+    
+    return response
+
+
+def _socket_timeout(timeout, read_timeout):
+    """Gets timeout of opened socket as set for new connection."""
+    
+    if read_timeout is not None:
+        return read_timeout
+    
+    if timeout is socket._GLOBAL_DEFAULT_TIMEOUT:
+        return socket.getdefaulttimeout()
     
-    return handle
+    return timeout
 
 
 def assert_api_key(api_key):
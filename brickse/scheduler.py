@@ -0,0 +1,220 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import time
+import itertools
+import threading
+import contextlib
+import contextvars
+from collections import OrderedDict, deque
+from . import config
+
+# define priority classes from the highest
+PRIORITIES = ("interactive", "batch", "idle")
+
+# init current priority and flow
+_priority = contextvars.ContextVar("brickse_priority", default=None)
+_flow = contextvars.ContextVar("brickse_flow", default=None)
+_flow_ids = itertools.count(1)
+
+# init default scheduler
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+class Scheduler(object):
+    """
+    Distributes rate limited request slots between waiting callers. Slots are
+    always given to the highest priority class having any waiting request, so
+    that interactive calls get the next free slot and batch work only uses
+    remaining capacity. Within a class, the slots are assigned by round-robin
+    between flows (typically individual tool calls), so that a long crawl
+    cannot starve other calls of the same class.
+    
+    Unlike simple reservation, the slot is only assigned when it is due, so
+    that a request arriving later with higher priority can still overtake
+    queued requests.
+    """
+    
+    
+    def __init__(self):
+        """Initializes a new instance of brickse.scheduler.Scheduler."""
+        
+        super().__init__()
+        
+        self._cond = threading.Condition()
+        self._queues = {p: OrderedDict() for p in PRIORITIES}
+        self._last = 0
+        
+        self.granted = {p: 0 for p in PRIORITIES}
+    
+    
+    def pending(self):
+        """
+        Gets number of waiting requests by priority class.
+        
+        Returns:
+            {str: int}
+                Waiting requests.
+        """
+        
+        with self._cond:
+            return {p: sum(len(x) for x in q.values()) for p, q in self._queues.items()}
+    
+    
+    def acquire(self, priority=None, flow=None, limit=None):
+        """
+        Waits for next free request slot according to config.REQUEST_DELAY.
+        
+        Args:
+            priority: str or None
+                Priority class. If set to None, current priority is used.
+            
+            flow: any
+                Flow identifier. If set to None, current flow is used.
+            
+            limit: float or None
+                Timestamp after which the waiting is abandoned.
+        
+        Returns:
+            bool
+                True if the slot was acquired, False if the limit was reached.
+        """
+        
+        # get defaults
+        if priority is None:
+            priority = get_priority()
+        
+        if priority not in self._queues:
+            raise ValueError("Unknown priority class: %s" % priority)
+        
+        if flow is None:
+            flow = get_flow()
+        
+        ticket = object()
+        
+        with self._cond:
+            
+            # enqueue request
+            self._queues[priority].setdefault(flow, deque()).append(ticket)
+            self._cond.notify_all()
+            
+            try:
+                
+                while True:
+                    
+                    now = time.time()
+                    slot = max(now, self._last + config.REQUEST_DELAY)
+                    
+                    # check limit
+                    if limit is not None and slot >= limit:
+                        return False
+                    
+                    # grant slot
+                    if self._head() is ticket and slot <= now:
+                        self._last = slot
+                        self.granted[priority] += 1
+                        return True
+                    
+                    # wait for slot or queue change
+                    timeout = slot - now if self._head() is ticket else None
+                    if limit is not None:
+                        timeout = min(timeout, limit - now) if timeout is not None else limit - now
+                    
+                    self._cond.wait(timeout)
+            
+            finally:
+                self._dequeue(priority, flow, ticket)
+                self._cond.notify_all()
+    
+    
+    def _head(self):
+        """Gets the request to be served next."""
+        
+        for priority in PRIORITIES:
+            for tickets in self._queues[priority].values():
+                return tickets[0]
+        
+        return None
+    
+    
+    def _dequeue(self, priority, flow, ticket):
+        """Removes given request and rotates its flow."""
+        
+        flows = self._queues[priority]
+        tickets = flows[flow]
+        
+        served = tickets[0] is ticket
+        tickets.remove(ticket)
+        
+        if not tickets:
+            del flows[flow]
+        
+        elif served:
+            flows.move_to_end(flow)
+
+
+@contextlib.contextmanager
+def priority(name):
+    """
+    Sets priority class for all the requests sent within the context. Unless
+    already set, new flow is started as well, so that concurrent calls of the
+    same class are served fairly.
+    
+    Args:
+        name: str or None
+            Priority class name ('interactive', 'batch' or 'idle'). If set to
+            None, current priority is kept.
+    """
+    
+    if name is not None and name not in PRIORITIES:
+        raise ValueError("Unknown priority class: %s" % name)
+    
+    tokens = []
+    
+    if name is not None:
+        tokens.append((_priority, _priority.set(name)))
+    
+    if _flow.get() is None:
+        tokens.append((_flow, _flow.set(next(_flow_ids))))
+    
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def get_priority():
+    """Gets current priority class or config.PRIORITY if not set."""
+    
+    return _priority.get() or config.PRIORITY
+
+
+def get_flow():
+    """Gets current flow identifier or current thread ID if not set."""
+    
+    flow = _flow.get()
+    if flow is None:
+        return "thread-%d" % threading.get_ident()
+    
+    return flow
+
+
+def get_scheduler():
+    """
+    Gets default request scheduler.
+    
+    Returns:
+        brickse.scheduler.Scheduler
+            Default scheduler.
+    """
+    
+    global _scheduler
+    
+    with _scheduler_lock:
+        
+        if _scheduler is None:
+            _scheduler = Scheduler()
+        
+        return _scheduler
@@ -0,0 +1,532 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# define fixtures names
+FIXTURES = ("sets", "themes", "subthemes", "years", "instructions", "images", "reviews", "users", "logins")
+
+# define page size limits
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 500
+
+
+class MockServer(object):
+    """
+    Provides a local HTTP server mimicking the BrickSet API using fixtures
+    data. Set config.API_URL to server url to use it instead of the real
+    service.
+    
+    Fixtures can be given as a dict or a folder of JSON files named by the
+    fixture (e.g. sets.json) and may contain following items:
+        
+        sets: [dict,]
+            Raw sets data as returned by getSets.
+        
+        themes: [dict,]
+            Raw themes data. Derived from sets if not given.
+        
+        subthemes: [dict,]
+            Raw sub-themes data. Derived from sets if not given.
+        
+        years: [dict,]
+            Raw years data. Derived from sets if not given.
+        
+        instructions: {str: [dict,]}
+            Raw instructions data by set ID.
+        
+        images: {str: [dict,]}
+            Raw additional images data by set ID.
+        
+        reviews: {str: [dict,]}
+            Raw reviews data by set ID.
+        
+        users: {str: {'sets': [dict,], 'minifigs': [dict,]}}
+            Raw user collections by user token.
+        
+        logins: {str: {'password': str, 'hash': str}}
+            User credentials by username.
+    """
+    
+    
+    def __init__(self, fixtures=None, latency=0, host="127.0.0.1", port=0):
+        """
+        Initializes a new instance of brickse.MockServer.
+        
+        Args:
+            fixtures: dict, str or None
+                Fixtures data or folder path.
+            
+            latency: float
+                Artificial delay in seconds added to every response.
+            
+            host: str
+                Server host.
+            
+            port: int
+                Server port. If set to 0, any free port is used.
+        """
+        
+        super().__init__()
+        
+        self.latency = latency
+        self._data = load_fixtures(fixtures)
+        self._thread = None
+        
+        # derive missing data
+        sets = self._data.get('sets', [])
+        
+        if 'themes' not in self._data:
+            self._data['themes'] = derive_themes(sets)
+        
+        if 'subthemes' not in self._data:
+            self._data['subthemes'] = derive_subthemes(sets)
+        
+        if 'years' not in self._data:
+            self._data['years'] = derive_years(sets)
+        
+        # init server
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        
+        # init endpoints
+        self._endpoints = {
+            'getSets': self._get_sets,
+            'getThemes': self._get_themes,
+            'getSubthemes': self._get_subthemes,
+            'getYears': self._get_years,
+            'getInstructions': self._get_instructions,
+            'getAdditionalImages': self._get_images,
+            'getReviews': self._get_reviews,
+            'getMinifigCollection': self._get_minifigs,
+            'login': self._login,
+            'checkUserHash': self._check_user_hash}
+    
+    
+    def __enter__(self):
+        """Starts server within context."""
+        
+        self.start()
+        return self
+    
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Stops server at the end of context."""
+        
+        self.stop()
+    
+    
+    @property
+    def url(self):
+        """Gets API url to be used as config.API_URL."""
+        
+        host, port = self._server.server_address[:2]
+        return "http://%s:%d/api/v3.asmx/" % (host, port)
+    
+    
+    def start(self):
+        """Starts serving requests in background thread."""
+        
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+    
+    
+    def stop(self):
+        """Stops the server."""
+        
+        self._server.shutdown()
+        self._server.server_close()
+        
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    
+    def serve(self):
+        """Serves requests until interrupted."""
+        
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+    
+    
+    def handle(self, endpoint, parameters):
+        """
+        Creates response data for given endpoint.
+        
+        Args:
+            endpoint: str
+                API endpoint name.
+            
+            parameters: dict
+                Request parameters.
+        
+        Returns:
+            (int, dict)
+                HTTP status code and response data.
+        """
+        
+        # check endpoint
+        if endpoint not in self._endpoints:
+            return 404, {'status': 'error', 'message': "Unknown method: %s" % endpoint}
+        
+        # check API key
+        if not parameters.get('apiKey', None):
+            return 200, {'status': 'error', 'message': "Invalid API key"}
+        
+        return 200, self._endpoints[endpoint](parameters)
+    
+    
+    def _get_sets(self, parameters):
+        """Creates getSets response."""
+        
+        params = json.loads(parameters.get('params', None) or "{}")
+        token = parameters.get('userHash', None)
+        
+        # get sets
+        if token:
+            
+            user = self._data.get('users', {}).get(token, None)
+            if user is None:
+                return {'status': 'error', 'message': "Invalid user hash"}
+            
+            sets = user.get('sets', [])
+            
+            if int(params.get('owned', 0)):
+                sets = [x for x in sets if x.get('collection', {}).get('owned', False)]
+            
+            if int(params.get('wanted', 0)):
+                sets = [x for x in sets if x.get('collection', {}).get('wanted', False)]
+        
+        else:
+            sets = self._data.get('sets', [])
+        
+        # apply filters
+        sets = filter_sets(sets, params)
+        
+        # get page
+        size = min(int(params.get('pageSize', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        page = max(int(params.get('pageNumber', 1)), 1)
+        items = sets[(page - 1) * size:page * size]
+        
+        return {'status': 'success', 'matches': len(sets), 'sets': items}
+    
+    
+    def _get_themes(self, parameters):
+        """Creates getThemes response."""
+        
+        themes = self._data['themes']
+        return {'status': 'success', 'matches': len(themes), 'themes': themes}
+    
+    
+    def _get_subthemes(self, parameters):
+        """Creates getSubthemes response."""
+        
+        theme = parameters.get('Theme', "")
+        subthemes = [x for x in self._data['subthemes'] if x['theme'] == theme]
+        
+        return {'status': 'success', 'matches': len(subthemes), 'subthemes': subthemes}
+    
+    
+    def _get_years(self, parameters):
+        """Creates getYears response."""
+        
+        theme = parameters.get('Theme', "")
+        years = [x for x in self._data['years'] if x['theme'] == theme]
+        
+        return {'status': 'success', 'matches': len(years), 'years': years}
+    
+    
+    def _get_instructions(self, parameters):
+        """Creates getInstructions response."""
+        
+        items = self._data.get('instructions', {}).get(str(parameters.get('setID', "")), [])
+        return {'status': 'success', 'matches': len(items), 'instructions': items}
+    
+    
+    def _get_images(self, parameters):
+        """Creates getAdditionalImages response."""
+        
+        items = self._data.get('images', {}).get(str(parameters.get('setID', "")), [])
+        return {'status': 'success', 'matches': len(items), 'additionalImages': items}
+    
+    
+    def _get_reviews(self, parameters):
+        """Creates getReviews response."""
+        
+        items = self._data.get('reviews', {}).get(str(parameters.get('setID', "")), [])
+        return {'status': 'success', 'matches': len(items), 'reviews': items}
+    
+    
+    def _get_minifigs(self, parameters):
+        """Creates getMinifigCollection response."""
+        
+        user = self._data.get('users', {}).get(parameters.get('userHash', ""), None)
+        if user is None:
+            return {'status': 'error', 'message': "Invalid user hash"}
+        
+        params = json.loads(parameters.get('params', None) or "{}")
+        items = user.get('minifigs', [])
+        
+        if int(params.get('owned', 0)):
+            items = [x for x in items if x.get('ownedTotal', 0)]
+        
+        if int(params.get('wanted', 0)):
+            items = [x for x in items if x.get('wanted', False)]
+        
+        return {'status': 'success', 'matches': len(items), 'minifigs': items}
+    
+    
+    def _login(self, parameters):
+        """Creates login response."""
+        
+        login = self._data.get('logins', {}).get(parameters.get('username', ""), None)
+        
+        if login is None or login.get('password', None) != parameters.get('password', None):
+            return {'status': 'error', 'message': "Invalid username or password"}
+        
+        return {'status': 'success', 'hash': login['hash']}
+    
+    
+    def _check_user_hash(self, parameters):
+        """Creates checkUserHash response."""
+        
+        token = parameters.get('userHash', "")
+        tokens = set(self._data.get('users', {}))
+        tokens.update(x['hash'] for x in self._data.get('logins', {}).values())
+        
+        if token not in tokens:
+            return {'status': 'error', 'message': "Invalid user hash"}
+        
+        return {'status': 'success'}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Handles mock server requests."""
+    
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    
+    
+    def do_GET(self):
+        """Handles GET request."""
+        
+        query = urllib.parse.urlparse(self.path).query
+        self._respond(dict(urllib.parse.parse_qsl(query)))
+    
+    
+    def do_POST(self):
+        """Handles POST request."""
+        
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length).decode('utf8')
+        self._respond(dict(urllib.parse.parse_qsl(body)))
+    
+    
+    def log_message(self, format, *args):
+        """Disables request logging."""
+        
+        pass
+    
+    
+    def _respond(self, parameters):
+        """Sends response."""
+        
+        mock = self.server.mock
+        
+        # apply latency
+        if mock.latency:
+            time.sleep(mock.latency)
+        
+        # get data
+        endpoint = urllib.parse.urlparse(self.path).path.rsplit("/", 1)[-1]
+        status, data = mock.handle(endpoint, parameters)
+        
+        body = json.dumps(data).encode('utf8')
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        
+        # check validator
+        if status == 200 and self.headers.get('If-None-Match', None) == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', "0")
+            self.end_headers()
+            return
+        
+        # send data
+        self.send_response(status)
+        self.send_header('Content-Type', "application/json; charset=utf-8")
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def load_fixtures(fixtures):
+    """
+    Loads fixtures data.
+    
+    Args:
+        fixtures: dict, str or None
+            Fixtures data or folder path.
+    
+    Returns:
+        dict
+            Fixtures data.
+    """
+    
+    if fixtures is None:
+        return {}
+    
+    if isinstance(fixtures, dict):
+        return dict(fixtures)
+    
+    data = {}
+    
+    for name in FIXTURES:
+        path = os.path.join(fixtures, name + ".json")
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf8') as f:
+                data[name] = json.load(f)
+    
+    return data
+
+
+def filter_sets(sets, params):
+    """
+    Filters raw sets data according to getSets parameters.
+    
+    Args:
+        sets: [dict,]
+            Raw sets data.
+        
+        params: dict
+            getSets parameters.
+    
+    Returns:
+        [dict,]
+            Matching sets.
+    """
+    
+    def split(value):
+        return set(str(value).lower().split(","))
+    
+    if params.get('setID', None):
+        ids = split(params['setID'])
+        sets = [x for x in sets if str(x['setID']) in ids]
+    
+    if params.get('setNumber', None):
+        numbers = split(params['setNumber'])
+        sets = [x for x in sets if ("%s-%s" % (x['number'], x['numberVariant'])).lower() in numbers]
+    
+    if params.get('theme', None):
+        themes = split(params['theme'])
+        sets = [x for x in sets if str(x['theme']).lower() in themes]
+    
+    if params.get('subtheme', None):
+        subthemes = split(params['subtheme'])
+        sets = [x for x in sets if str(x.get('subtheme', "")).lower() in subthemes]
+    
+    if params.get('year', None):
+        years = split(params['year'])
+        sets = [x for x in sets if str(x['year']) in years]
+    
+    if params.get('query', None):
+        query = str(params['query']).lower()
+        sets = [x for x in sets if query in x['name'].lower() or query in str(x['number']).lower()]
+    
+    return sets
+
+
+def derive_themes(sets):
+    """Creates raw themes data from raw sets data."""
+    
+    themes = {}
+    subthemes = {}
+    
+    for item in sets:
+        
+        theme = themes.setdefault(item['theme'], {
+            'theme': item['theme'],
+            'setCount': 0,
+            'subthemeCount': 0,
+            'yearFrom': item['year'],
+            'yearTo': item['year']})
+        
+        theme['setCount'] += 1
+        theme['yearFrom'] = min(theme['yearFrom'], item['year'])
+        theme['yearTo'] = max(theme['yearTo'], item['year'])
+        
+        if item.get('subtheme', None):
+            subthemes.setdefault(item['theme'], set()).add(item['subtheme'])
+    
+    for name, theme in themes.items():
+        theme['subthemeCount'] = len(subthemes.get(name, ()))
+    
+    return sorted(themes.values(), key=lambda x: x['theme'])
+
+
+def derive_subthemes(sets):
+    """Creates raw sub-themes data from raw sets data."""
+    
+    subthemes = {}
+    
+    for item in sets:
+        
+        key = (item['theme'], item.get('subtheme', None) or "{None}")
+        
+        subtheme = subthemes.setdefault(key, {
+            'theme': key[0],
+            'subtheme': key[1],
+            'setCount': 0,
+            'yearFrom': item['year'],
+            'yearTo': item['year']})
+        
+        subtheme['setCount'] += 1
+        subtheme['yearFrom'] = min(subtheme['yearFrom'], item['year'])
+        subtheme['yearTo'] = max(subtheme['yearTo'], item['year'])
+    
+    return [subthemes[k] for k in sorted(subthemes)]
+
+
+def derive_years(sets):
+    """Creates raw years data from raw sets data."""
+    
+    years = {}
+    
+    for item in sets:
+        for theme in (item['theme'], ""):
+            key = (theme, item['year'])
+            years[key] = years.get(key, 0) + 1
+    
+    return [{'theme': k[0], 'year': str(k[1]), 'setCount': v} for k, v in sorted(years.items())]
+
+
+def main():
+    """Runs mock server from command line."""
+    
+    parser = argparse.ArgumentParser(description="Local mock of the BrickSet API.")
+    parser.add_argument("fixtures", nargs="?", default=None, help="fixtures folder path")
+    parser.add_argument("--host", default="127.0.0.1", help="server host")
+    parser.add_argument("--port", type=int, default=8080, help="server port")
+    parser.add_argument("--latency", type=float, default=0, help="response delay in seconds")
+    args = parser.parse_args()
+    
+    server = MockServer(args.fixtures, latency=args.latency, host=args.host, port=args.port)
+    print("Serving BrickSet API mock at %s" % server.url)
+    server.serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import os
+import json
+import time
+import hashlib
+import threading
+from . import config
+
+# init default store
+_store = None
+_store_lock = threading.Lock()
+
+
+class SnapshotStore(object):
+    """Provides a storage of the last known user collections."""
+    
+    
+    def __init__(self, path=None):
+        """
+        Initializes a new instance of brickse.SnapshotStore.
+        
+        Args:
+            path: str or None
+                Snapshots folder path. If set to None, snapshots are kept in
+                memory only.
+        """
+        
+        super().__init__()
+        
+        self._path = path
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        
+        # init folder
+        if path:
+            os.makedirs(path, exist_ok=True)
+    
+    
+    @property
+    def path(self):
+        """Gets snapshots folder path."""
+        
+        return self._path
+    
+    
+    def load(self, user_token, kind):
+        """
+        Gets last snapshot of given collection.
+        
+        Args:
+            user_token: str
+                BrickSet user token.
+            
+            kind: str
+                Collection kind identifier.
+        
+        Returns:
+            dict or None
+                Snapshot containing 'time', 'count' and raw 'items' by key.
+        """
+        
+        key = make_key(user_token, kind)
+        
+        # check memory
+        with self._lock:
+            snapshot = self._snapshots.get(key, None)
+        
+        if snapshot is not None or not self._path:
+            return snapshot
+        
+        # load from disk
+        path = os.path.join(self._path, key + ".json")
+        if not os.path.exists(path):
+            return None
+        
+        with open(path, 'r', encoding='utf8') as f:
+            snapshot = json.load(f)
+        
+        with self._lock:
+            self._snapshots[key] = snapshot
+        
+        return snapshot
+    
+    
+    def save(self, user_token, kind, snapshot):
+        """
+        Stores given snapshot.
+        
+        Args:
+            user_token: str
+                BrickSet user token.
+            
+            kind: str
+                Collection kind identifier.
+            
+            snapshot: dict
+                Snapshot containing 'time', 'count' and raw 'items' by key.
+        """
+        
+        key = make_key(user_token, kind)
+        
+        with self._lock:
+            self._snapshots[key] = snapshot
+        
+        if not self._path:
+            return
+        
+        path = os.path.join(self._path, key + ".json")
+        temp = "%s.%d.tmp" % (path, threading.get_ident())
+        
+        with open(temp, 'w', encoding='utf8') as f:
+            json.dump(snapshot, f)
+        
+        os.replace(temp, path)
+
+
+class SyncResult(object):
+    """Represents changes of user collection since the last sync."""
+    
+    
+    def __init__(self, added=(), removed=(), changed=(), changes=(), checked=False):
+        """
+        Initializes a new instance of brickse.SyncResult.
+        
+        Args:
+            added: (brickse.Collection,) or (brickse.Minifig,)
+                Newly added items.
+            
+            removed: (brickse.Collection,) or (brickse.Minifig,)
+                Removed items as known from the last snapshot.
+            
+            changed: (brickse.Collection,) or (brickse.Minifig,)
+                Changed items.
+            
+            changes: ((dict, dict),)
+                Raw data of changed items as (old, new) pairs in the same
+                order as changed items, showing what actually changed (e.g.
+                user collection fields).
+            
+            checked: bool
+                Specifies whether the collection was only checked to be
+                unchanged without downloading it.
+        """
+        
+        super().__init__()
+        
+        self.added = list(added)
+        self.removed = list(removed)
+        self.changed = list(changed)
+        self.changes = list(changes)
+        self.checked = checked
+    
+    
+    def __str__(self):
+        """Gets standard string representation."""
+        
+        return "Added: %d, Removed: %d, Changed: %d" % (len(self.added), len(self.removed), len(self.changed))
+    
+    
+    def __repr__(self):
+        """Gets debug string representation."""
+        
+        return "%s(%s)" % (self.__class__.__name__, self.__str__())
+    
+    
+    def __bool__(self):
+        """Checks whether there are any changes."""
+        
+        return bool(self.added or self.removed or self.changed)
+
+
+def diff(old, new):
+    """
+    Compares raw items of two snapshots.
+    
+    Args:
+        old: dict
+            Previous raw items by key.
+        
+        new: dict
+            Current raw items by key.
+    
+    Returns:
+        ((dict,), (dict,), ((dict, dict),))
+            Added and removed raw items and changed raw items as (old, new)
+            pairs.
+    """
+    
+    added = [v for k, v in new.items() if k not in old]
+    removed = [v for k, v in old.items() if k not in new]
+    changed = [(old[k], v) for k, v in new.items() if k in old and old[k] != v]
+    
+    return added, removed, changed
+
+
+def make_key(user_token, kind):
+    """Creates snapshot key without exposing the token."""
+    
+    token = hashlib.sha1(user_token.encode('utf8')).hexdigest()
+    
+    return "%s-%s" % (token, kind)
+
+
+def get_store():
+    """
+    Gets default snapshot store located at config.SYNC_PATH.
+    
+    Returns:
+        brickse.SnapshotStore
+            Default snapshot store.
+    """
+    
+    global _store
+    
+    with _store_lock:
+        
+        if _store is None or _store.path != config.SYNC_PATH:
+            _store = SnapshotStore(config.SYNC_PATH)
+        
+        return _store
+
+
+def make_snapshot(items, key, count=None):
+    """
+    Creates snapshot from raw items.
+    
+    Args:
+        items: (dict,)
+            Raw items.
+        
+        key: str
+            Name of the item field used as key.
+        
+        count: int or None
+            Total number of items reported by server.
+    
+    Returns:
+        dict
+            Snapshot containing 'time', 'count' and raw 'items' by key.
+    """
+    
+    return {
+        'time': time.time(),
+        'count': len(items) if count is None else count,
+        'items': {str(item[key]): item for item in items}}
@@ -0,0 +1,86 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import functools
+from . import config
+
+
+class _NullSpan(object):
+    """Provides a span doing nothing, used when no tracer is set."""
+    
+    
+    def __enter__(self):
+        """Enters span context."""
+        
+        return self
+    
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Exits span context."""
+        
+        return False
+    
+    
+    def set_attribute(self, key, value):
+        """Ignores given attribute."""
+        
+        pass
+
+
+# init null span
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **attributes):
+    """
+    Creates a child span of current span using tracer set by config.TRACER.
+    The tracer is expected to provide OpenTelemetry-like
+    start_as_current_span(name, attributes=None) method. If no tracer is set,
+    shared no-op span is returned.
+    
+    Args:
+        name: str
+            Span name.
+        
+        attributes: {str: any}
+            Span attributes.
+    
+    Returns:
+        context manager
+            Span context.
+    """
+    
+    tracer = config.TRACER
+    if tracer is None:
+        return _NULL_SPAN
+    
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+def traced(func):
+    """
+    Decorates a method to run within its own span named by the method
+    qualified name.
+    
+    Args:
+        func: callable
+            Method to decorate.
+    
+    Returns:
+        callable
+            Decorated method.
+    """
+    
+    name = "brickse.%s" % func.__qualname__
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        
+        tracer = config.TRACER
+        if tracer is None:
+            return func(*args, **kwargs)
+        
+        with tracer.start_as_current_span(name):
+            return func(*args, **kwargs)
+    
+    return wrapper
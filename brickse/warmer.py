@@ -0,0 +1,201 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import time
+import logging
+import threading
+import http.client
+import urllib.error
+from . import config
+from . import request
+from . breaker import CircuitOpen
+from . scheduler import priority
+
+# init logger
+_log = logging.getLogger(__name__)
+
+
+class CacheWarmer(object):
+    """
+    Keeps the most frequently accessed cache entries fresh. A background
+    thread periodically re-fetches the hottest entries of config.WARM_ENDPOINTS
+    shortly before they expire, so that popular requests keep hitting the
+    cache. Refreshing runs with 'idle' priority, therefore it only uses rate
+    limit capacity not needed by other requests. Conditional validators are
+    sent, so unchanged entries are just revalidated.
+    
+    The warmer uses current config.CACHE. Access counts are halved every
+    config.WARM_HALF_LIFE, so that the popularity follows recent traffic.
+    """
+    
+    
+    def __init__(self, api_key=None, count=None, interval=None, margin=None, endpoints=None):
+        """
+        Initializes a new instance of brickse.CacheWarmer.
+        
+        Args:
+            api_key: str or None
+                BrickSet API key used to refresh the entries (cached entries
+                do not keep the key). If set to None, module global API key is
+                used.
+            
+            count: int or None
+                Maximum number of most accessed entries to keep warm. If set
+                to None, the value of config.WARM_COUNT is used.
+            
+            interval: float or None
+                Time in seconds between cycles. If set to None, the value of
+                config.WARM_INTERVAL is used.
+            
+            margin: float or None
+                Time in seconds before expiration at which entry is refreshed.
+                If set to None, the value of config.WARM_MARGIN is used.
+            
+            endpoints: (str,) or None
+                Endpoints to keep warm. If set to None, the value of
+                config.WARM_ENDPOINTS is used.
+        """
+        
+        super().__init__()
+        
+        self._api_key = api_key
+        self._count = count
+        self._interval = interval
+        self._margin = margin
+        self._endpoints = endpoints
+        
+        self._thread = None
+        self._stop = threading.Event()
+        self._decayed = time.time()
+        
+        self.cycles = 0
+        self.refreshed = 0
+        self.failed = 0
+    
+    
+    def __enter__(self):
+        """Starts warming within context."""
+        
+        self.start()
+        return self
+    
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Stops warming."""
+        
+        self.stop()
+    
+    
+    @property
+    def running(self):
+        """Checks whether background warming is running."""
+        
+        return self._thread is not None and self._thread.is_alive()
+    
+    
+    def start(self):
+        """Starts background warming."""
+        
+        if self.running:
+            return
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="brickse-warmer", daemon=True)
+        self._thread.start()
+    
+    
+    def stop(self, timeout=None):
+        """
+        Stops background warming.
+        
+        Args:
+            timeout: float or None
+                Maximum time in seconds to wait for current request to finish.
+        """
+        
+        self._stop.set()
+        
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    
+    def warm(self):
+        """
+        Runs single warming cycle.
+        
+        Returns:
+            int
+                Number of refreshed entries.
+        """
+        
+        cache = config.CACHE
+        if cache is None:
+            return 0
+        
+        api_key = request.assert_api_key(self._api_key)
+        
+        # get defaults
+        count = self._count if self._count is not None else config.WARM_COUNT
+        margin = self._margin if self._margin is not None else config.WARM_MARGIN
+        endpoints = self._endpoints or config.WARM_ENDPOINTS
+        
+        refreshed = 0
+        
+        for key in cache.popular(count, endpoints):
+            
+            if self._stop.is_set():
+                break
+            
+            # check expiration
+            entry = cache.get(key)
+            if entry is None or entry.expires - time.time() > margin:
+                continue
+            
+            # refresh entry
+            parameters = dict(entry.parameters)
+            parameters['apiKey'] = api_key
+            
+            try:
+                with priority("idle"):
+                    response = request.request(entry.url, parameters, entry.post, refresh=True)
+                    response.read()
+                
+                # stale data served instead of failed request
+                if getattr(response, 'stale', False):
+                    self.failed += 1
+                    continue
+                
+                refreshed += 1
+            
+            except CircuitOpen:
+                self.failed += 1
+                break
+            
+            except (urllib.error.URLError, http.client.HTTPException, OSError):
+                self.failed += 1
+        
+        # forget old traffic
+        now = time.time()
+        cache.decay(0.5 ** ((now - self._decayed) / config.WARM_HALF_LIFE))
+        cache.save_popularity()
+        self._decayed = now
+        
+        self.cycles += 1
+        self.refreshed += refreshed
+        
+        return refreshed
+    
+    
+    def _run(self):
+        """Runs warming cycles until stopped."""
+        
+        while not self._stop.is_set():
+            
+            try:
+                self.warm()
+            except Exception:
+                _log.exception("Cache warming failed.")
+            
+            interval = self._interval if self._interval is not None else config.WARM_INTERVAL
+            self._stop.wait(interval)
@@ -32,6 +32,21 @@ data = bs.get_set_instructions(set_number=79003)
 print(data)
 print()
 
+print("Get set images:")
+data = bs.get_set_images(9752)
+print(data)
+print()
+
+print("Get set reviews:")
+data = bs.get_set_reviews(9752)
+print(data)
+print()
+
+print("Get reviews for multiple sets:")
+data = bs.get_sets_reviews([9752, 22667])
+print(data)
+print()
+
 print("Get themes:")
 data = bs.get_themes()
 print(data)
@@ -42,6 +57,11 @@ data = bs.get_subthemes("The Hobbit")
 print(data)
 print()
 
+print("Get theme years:")
+data = bs.get_theme_years("The Hobbit")
+print(data)
+print()
+
 print("Get user's sets:")
 data = bs.get_users_sets(year=2012, theme="The Hobbit", owned=True)
 print(data)
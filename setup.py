@@ -29,5 +29,7 @@ setup(
     author_email = '',
     license = 'MIT',
     packages = find_packages(),
+    extras_require = {'parquet': ['pyarrow'], 'msgpack': ['msgpack']},
+    entry_points = {'console_scripts': ['brickse = brickse.cli:main']},
     classifiers = classifiers,
     zip_safe = False)
@@ -0,0 +1,212 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import time
+import unittest
+import urllib.error
+
+from brickse import config, request, breaker, Cache, MockServer
+from brickse.breaker import CircuitBreaker, CircuitOpen, CLOSED, OPEN, HALF_OPEN
+from brickse.pool import get_pool
+
+# define configuration to restore
+SETTINGS = ("API_URL", "API_KEY", "REQUEST_DELAY", "CACHE", "TRANSPORT", "SERVE_STALE", "BREAKER_THRESHOLD", "BREAKER_TIMEOUT", "CONNECT_TIMEOUT", "READ_TIMEOUT")
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Tests circuit states transitions."""
+    
+    
+    def setUp(self):
+        """Sets breaker configuration."""
+        
+        self._settings = {k: getattr(config, k) for k in SETTINGS}
+        
+        config.BREAKER_THRESHOLD = 3
+        config.BREAKER_TIMEOUT = 60
+    
+    
+    def tearDown(self):
+        """Restores configuration."""
+        
+        for key, value in self._settings.items():
+            setattr(config, key, value)
+    
+    
+    def open(self):
+        """Creates breaker opened by consecutive failures."""
+        
+        circuit = CircuitBreaker()
+        
+        for i in range(3):
+            self.assertTrue(circuit.allow())
+            circuit.failure()
+        
+        self.assertEqual(circuit.state, OPEN)
+        
+        return circuit
+    
+    
+    def expire(self, circuit):
+        """Makes open circuit ready for probe."""
+        
+        circuit.opened = time.time() - config.BREAKER_TIMEOUT - 1
+    
+    
+    def test_closed(self):
+        """Tests success resets failures count."""
+        
+        circuit = CircuitBreaker()
+        
+        circuit.failure()
+        circuit.failure()
+        circuit.success()
+        circuit.failure()
+        circuit.failure()
+        
+        self.assertEqual(circuit.state, CLOSED)
+        self.assertTrue(circuit.allow())
+    
+    
+    def test_open(self):
+        """Tests open circuit rejects requests until timeout."""
+        
+        circuit = self.open()
+        
+        self.assertFalse(circuit.allow())
+        
+        self.expire(circuit)
+        self.assertTrue(circuit.allow())
+        self.assertEqual(circuit.state, HALF_OPEN)
+    
+    
+    def test_half_open(self):
+        """Tests half-open circuit allows single probe."""
+        
+        circuit = self.open()
+        self.expire(circuit)
+        
+        self.assertTrue(circuit.allow())
+        self.assertFalse(circuit.allow())
+        
+        # cancelled probe can be repeated
+        circuit.cancel()
+        self.assertEqual(circuit.state, HALF_OPEN)
+        self.assertTrue(circuit.allow())
+        
+        # successful probe closes circuit
+        circuit.success()
+        self.assertEqual(circuit.state, CLOSED)
+        self.assertEqual(circuit.failures, 0)
+        self.assertTrue(circuit.allow())
+    
+    
+    def test_probe_failure(self):
+        """Tests failed probe opens circuit again."""
+        
+        circuit = self.open()
+        self.expire(circuit)
+        
+        self.assertTrue(circuit.allow())
+        circuit.failure()
+        
+        self.assertEqual(circuit.state, OPEN)
+        self.assertFalse(circuit.allow())
+    
+    
+    def test_disabled(self):
+        """Tests breaker can be disabled."""
+        
+        config.BREAKER_THRESHOLD = 0
+        self.assertIsNone(breaker.get_breaker("getSets"))
+
+
+class TestRequests(unittest.TestCase):
+    """Tests circuit breaker of requests against mock server."""
+    
+    
+    def setUp(self):
+        """Starts mock server."""
+        
+        self._settings = {k: getattr(config, k) for k in SETTINGS}
+        
+        self.server = MockServer({'sets': []})
+        self.server.start()
+        
+        config.API_URL = self.server.url
+        config.API_KEY = "key"
+        config.REQUEST_DELAY = 0
+        config.CACHE = Cache()
+        config.TRANSPORT = None
+        config.SERVE_STALE = True
+        config.BREAKER_THRESHOLD = 2
+        config.BREAKER_TIMEOUT = 60
+        config.CONNECT_TIMEOUT = 1
+        config.READ_TIMEOUT = 1
+        
+        breaker.reset()
+        get_pool().clear()
+    
+    
+    def tearDown(self):
+        """Stops mock server and restores configuration."""
+        
+        self.server.stop()
+        get_pool().clear()
+        breaker.reset()
+        
+        for key, value in self._settings.items():
+            setattr(config, key, value)
+    
+    
+    def get_themes(self, refresh=False):
+        """Sends request and reads response."""
+        
+        response = request.request(config.API_URL + "getThemes", {}, refresh=refresh)
+        response.read()
+        
+        return response
+    
+    
+    def stop(self):
+        """Stops server and drops its connections."""
+        
+        self.server.stop()
+        get_pool().clear()
+    
+    
+    def test_open(self):
+        """Tests failing endpoint is opened."""
+        
+        config.CACHE = None
+        self.stop()
+        
+        for i in range(2):
+            with self.assertRaises(urllib.error.URLError) as context:
+                self.get_themes()
+            self.assertNotIsInstance(context.exception, CircuitOpen)
+        
+        self.assertEqual(breaker.get_states(), {'getThemes': OPEN})
+        
+        with self.assertRaises(CircuitOpen):
+            self.get_themes()
+    
+    
+    def test_stale(self):
+        """Tests stale data are served by failing endpoint."""
+        
+        self.get_themes()
+        self.stop()
+        
+        with breaker.track_stale() as tracker:
+            
+            for i in range(3):
+                response = self.get_themes(refresh=True)
+                self.assertTrue(response.stale)
+        
+        self.assertEqual(tracker.endpoints, {'getThemes'})
+        self.assertEqual(breaker.get_states(), {'getThemes': OPEN})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import time
+import shutil
+import tempfile
+import unittest
+
+from brickse import config, request, Cache, MockServer
+from brickse.cache import CacheEntry, is_success, make_key
+from brickse.pool import get_pool
+
+# define configuration to restore
+SETTINGS = ("API_URL", "API_KEY", "REQUEST_DELAY", "CACHE", "TRANSPORT")
+
+
+def make_set(i):
+    """Creates raw set."""
+    
+    return {
+        'setID': i,
+        'number': str(1000 + i),
+        'numberVariant': 1,
+        'name': "Set %d" % i,
+        'theme': "Theme",
+        'year': 2020}
+
+
+class TestCache(unittest.TestCase):
+    """Tests cache storage."""
+    
+    
+    def make_entry(self, body=b"{}", expires=None):
+        """Creates cache entry."""
+        
+        return CacheEntry("url", {}, False, body, etag='"tag"', expires=expires or time.time() + 60)
+    
+    
+    def test_size(self):
+        """Tests least recently used entries are dropped."""
+        
+        cache = Cache(size=2)
+        
+        cache.set("a", self.make_entry())
+        cache.set("b", self.make_entry())
+        cache.get("a")
+        cache.set("c", self.make_entry())
+        
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+    
+    
+    def test_disk(self):
+        """Tests entries are persisted on disk."""
+        
+        folder = tempfile.mkdtemp()
+        
+        try:
+            Cache(folder).set("a", self.make_entry(b'{"status": "success"}'))
+            entry = Cache(folder).get("a")
+        finally:
+            shutil.rmtree(folder)
+        
+        self.assertEqual(entry.body, b'{"status": "success"}')
+        self.assertEqual(entry.etag, '"tag"')
+        self.assertFalse(entry.expired)
+    
+    
+    def test_validators(self):
+        """Tests conditional headers."""
+        
+        entry = self.make_entry()
+        entry.modified = "Mon, 01 Jan 2024 00:00:00 GMT"
+        
+        self.assertEqual(entry.validators(), {
+            'If-None-Match': '"tag"',
+            'If-Modified-Since': "Mon, 01 Jan 2024 00:00:00 GMT"})
+    
+    
+    def test_success(self):
+        """Tests API status detection."""
+        
+        self.assertTrue(is_success(b'{"status": "success", "matches": 0, "sets": []}'))
+        self.assertTrue(is_success(b'{"status":"success"}'))
+        self.assertTrue(is_success(b'[]'))
+        self.assertFalse(is_success(b'{"status": "error", "message": "Invalid API key"}'))
+        self.assertFalse(is_success(b'<html></html>'))
+        self.assertFalse(is_success(b''))
+
+
+class TestRevalidation(unittest.TestCase):
+    """Tests cached requests against mock server."""
+    
+    
+    def setUp(self):
+        """Starts mock server."""
+        
+        self._settings = {k: getattr(config, k) for k in SETTINGS}
+        
+        self.sets = [make_set(1)]
+        self.server = MockServer({'sets': self.sets})
+        self.server.start()
+        
+        config.API_URL = self.server.url
+        config.API_KEY = "key"
+        config.REQUEST_DELAY = 0
+        config.CACHE = Cache(ttl=60)
+        config.TRANSPORT = None
+        
+        get_pool().clear()
+    
+    
+    def tearDown(self):
+        """Stops mock server and restores configuration."""
+        
+        self.server.stop()
+        get_pool().clear()
+        
+        for key, value in self._settings.items():
+            setattr(config, key, value)
+    
+    
+    def get_sets(self):
+        """Sends request and decodes response."""
+        
+        response = request.request(config.API_URL + "getSets", {'params': "{}"})
+        return response, request.decode(response)
+    
+    
+    def expire(self):
+        """Expires all cached entries."""
+        
+        for entry in config.CACHE._entries.values():
+            entry.expires = 0
+    
+    
+    def test_hit(self):
+        """Tests fresh entry is used without request."""
+        
+        self.get_sets()
+        response, data = self.get_sets()
+        
+        self.assertTrue(response.cached)
+        self.assertEqual(data['matches'], 1)
+        self.assertEqual(config.CACHE.stats(), {'hits': 1, 'misses': 1, 'refreshes': 0, 'revalidations': 0})
+    
+    
+    def test_not_modified(self):
+        """Tests expired entry is reused after 304 response."""
+        
+        self.get_sets()
+        self.expire()
+        
+        response, data = self.get_sets()
+        
+        self.assertTrue(response.cached)
+        self.assertEqual(data['matches'], 1)
+        self.assertEqual(config.CACHE.stats()['revalidations'], 1)
+        self.assertEqual(config.CACHE.stats()['refreshes'], 0)
+        
+        # entry is fresh again
+        key = make_key(config.API_URL + "getSets", {'params': "{}"})
+        self.assertFalse(config.CACHE.get(key).expired)
+    
+    
+    def test_modified(self):
+        """Tests expired entry is replaced by changed data."""
+        
+        self.get_sets()
+        self.expire()
+        self.sets.append(make_set(2))
+        
+        response, data = self.get_sets()
+        
+        self.assertFalse(getattr(response, 'cached', False))
+        self.assertEqual(data['matches'], 2)
+        self.assertEqual(config.CACHE.stats()['revalidations'], 0)
+        self.assertEqual(config.CACHE.stats()['refreshes'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
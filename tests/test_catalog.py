@@ -0,0 +1,144 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from brickse.catalog import Catalog, write_catalog
+from brickse.ingest import FIELDS
+from brickse.objects import Theme, Instructions
+
+# define number of sets
+COUNT = 1000
+
+
+def make_row(i):
+    """Creates set values."""
+    
+    return (
+        7 * i + 3,
+        str(10000 + i // 2),
+        1 + i % 2,
+        "Set %d é" % i,
+        None if i % 5 == 0 else 1990 + i % 30,
+        "Normal",
+        "Group %d" % (i % 3),
+        "Theme %d" % (i % 7),
+        None if i % 4 == 0 else "Subtheme %d" % (i % 11),
+        None if i % 6 == 0 else bool(i % 2),
+        "https://images.brickset.com/%d.jpg" % i)
+
+
+class TestCatalog(unittest.TestCase):
+    """Tests binary catalog snapshot."""
+    
+    
+    def setUp(self):
+        """Writes catalog."""
+        
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "catalog.bin")
+        
+        self.rows = [make_row(i) for i in range(COUNT)]
+        
+        self.themes = [
+            Theme(name="Theme 0", parent=None, subthemes=2, sets=10, year_from=1990, year_to=2020),
+            Theme(name="Subtheme 1", parent="Theme 0", subthemes=None, sets=3, year_from=None, year_to=None)]
+        
+        self.instructions = {
+            3: [Instructions(description="BI 1/2", url="a.pdf", version="V29", part=1, parts=2),
+                Instructions(description="BI 2/2", url="b.pdf", version=None, part=2, parts=2)]}
+        
+        count = write_catalog(self.path, self.rows + [(None,) * len(FIELDS)], self.themes, self.instructions)
+        self.assertEqual(count, COUNT)
+        
+        self.catalog = Catalog(self.path)
+    
+    
+    def tearDown(self):
+        """Closes and removes catalog."""
+        
+        self.catalog.close()
+        shutil.rmtree(self.folder)
+    
+    
+    def test_rows(self):
+        """Tests all values round-trip."""
+        
+        self.assertEqual(len(self.catalog), COUNT)
+        self.assertEqual(list(self.catalog.rows()), self.rows)
+    
+    
+    def test_get(self):
+        """Tests lookup by set ID."""
+        
+        for row in self.rows:
+            collection = self.catalog.get(row[0])
+            self.assertEqual(tuple(getattr(collection, f) for f in FIELDS), row)
+        
+        self.assertIsNone(self.catalog.get(1))
+        self.assertIsNone(self.catalog.get(-1))
+    
+    
+    def test_find(self):
+        """Tests lookup by set number."""
+        
+        for row in self.rows:
+            collection = self.catalog.find("%s-%d" % (row[1], row[2]))
+            self.assertEqual(collection.set_id, row[0])
+        
+        # default variant
+        self.assertEqual(self.catalog.find(self.rows[0][1]).set_id, self.rows[0][0])
+        self.assertEqual(self.catalog.find(int(self.rows[0][1])).set_id, self.rows[0][0])
+        
+        self.assertIsNone(self.catalog.find("10000-3"))
+        self.assertIsNone(self.catalog.find("99999"))
+    
+    
+    def test_themes(self):
+        """Tests themes round-trip."""
+        
+        themes = self.catalog.themes()
+        self.assertEqual([vars(x) for x in themes], [vars(x) for x in self.themes])
+    
+    
+    def test_instructions(self):
+        """Tests instructions round-trip."""
+        
+        instructions = self.catalog.instructions(3)
+        self.assertEqual([vars(x) for x in instructions], [vars(x) for x in self.instructions[3]])
+        
+        self.assertEqual(self.catalog.instructions(10), [])
+        self.assertIsNone(self.catalog.instructions(1))
+    
+    
+    def test_format(self):
+        """Tests unknown file is rejected."""
+        
+        path = os.path.join(self.folder, "other.bin")
+        
+        with open(path, 'wb') as f:
+            f.write(b"\x00" * 1024)
+        
+        with self.assertRaises(ValueError):
+            Catalog(path)
+    
+    
+    def test_empty(self):
+        """Tests catalog without sets."""
+        
+        path = os.path.join(self.folder, "empty.bin")
+        
+        self.assertEqual(write_catalog(path, []), 0)
+        
+        with Catalog(path) as catalog:
+            self.assertEqual(len(catalog), 0)
+            self.assertIsNone(catalog.get(3))
+            self.assertIsNone(catalog.find("10000"))
+            self.assertEqual(catalog.themes(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import io
+import os
+import tempfile
+import unittest
+import contextlib
+
+from brickse import config, cli
+
+# define configuration to restore
+SETTINGS = ("API_URL", "API_KEY", "CACHE", "REQUEST_DELAY")
+
+
+class TestCLI(unittest.TestCase):
+    """Tests command line errors handling."""
+    
+    
+    def setUp(self):
+        """Stores configuration."""
+        
+        self._settings = {k: getattr(config, k) for k in SETTINGS}
+    
+    
+    def tearDown(self):
+        """Restores configuration."""
+        
+        for key, value in self._settings.items():
+            setattr(config, key, value)
+    
+    
+    def run_cli(self, argv):
+        """Runs the tool and gets exit code and error output."""
+        
+        stderr = io.StringIO()
+        
+        with contextlib.redirect_stderr(stderr):
+            try:
+                code = cli.main(argv)
+            except SystemExit as e:
+                code = e.code
+        
+        return code, stderr.getvalue()
+    
+    
+    def test_rate(self):
+        """Tests zero rate is rejected."""
+        
+        code, output = self.run_cli(["--rate", "0", "sets", "--year", "2020", "-o", "sets.csv"])
+        
+        self.assertEqual(code, 2)
+        self.assertIn("--rate", output)
+    
+    
+    def test_cache_ttl(self):
+        """Tests cache lifetime without cache is rejected."""
+        
+        code, output = self.run_cli(["--cache-ttl", "10", "sets", "--year", "2020", "-o", "sets.csv"])
+        
+        self.assertEqual(code, 2)
+        self.assertIn("--cache-ttl", output)
+    
+    
+    def test_setup(self):
+        """Tests setup error is reported by exit code."""
+        
+        with tempfile.TemporaryDirectory() as folder:
+            
+            path = os.path.join(folder, "file")
+            open(path, 'w').close()
+            
+            code, output = self.run_cli(["--api-key", "key", "--cache", path, "sets", "--year", "2020", "-o", "sets.csv"])
+        
+        self.assertEqual(code, 1)
+        self.assertNotIn("Traceback", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import os
+import csv
+import json
+import shutil
+import tempfile
+import unittest
+
+from brickse.export import export
+from brickse.ingest import FIELDS
+from brickse.objects import Collection
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# define rows with first batch missing some values
+ROWS = [(i, str(1000 + i), 1, "Set %d" % i, 2020, "Normal", "Group", "Theme", None, True, None) for i in range(3)]
+ROWS += [(i, str(1000 + i), 1, "Set %d" % i, 2021, "Normal", "Group", "Theme", "Sub", False, "url") for i in range(3, 6)]
+
+
+class TestExport(unittest.TestCase):
+    """Tests streaming export."""
+    
+    
+    def setUp(self):
+        """Creates output folder."""
+        
+        self.folder = tempfile.mkdtemp()
+    
+    
+    def tearDown(self):
+        """Removes output folder."""
+        
+        shutil.rmtree(self.folder)
+    
+    
+    def test_jsonl(self):
+        """Tests JSON lines export."""
+        
+        path = os.path.join(self.folder, "sets.jsonl")
+        
+        self.assertEqual(export(ROWS, path, batch_size=3), len(ROWS))
+        
+        with open(path, encoding='utf8') as f:
+            data = [json.loads(x) for x in f]
+        
+        self.assertEqual(data, [dict(zip(FIELDS, x)) for x in ROWS])
+        self.assertEqual(os.listdir(self.folder), ["sets.jsonl"])
+    
+    
+    def test_csv(self):
+        """Tests CSV export of collections."""
+        
+        path = os.path.join(self.folder, "sets.csv")
+        items = [Collection(**dict(zip(FIELDS, x))) for x in ROWS]
+        
+        self.assertEqual(export(items, path, fields=('set_id', 'name')), len(ROWS))
+        
+        with open(path, encoding='utf8', newline="") as f:
+            data = list(csv.reader(f))
+        
+        self.assertEqual(data[0], ['set_id', 'name'])
+        self.assertEqual(data[1:], [[str(x[0]), x[3]] for x in ROWS])
+    
+    
+    def test_failure(self):
+        """Tests failed export keeps no output."""
+        
+        path = os.path.join(self.folder, "sets.jsonl")
+        
+        def items():
+            yield from ROWS
+            raise RuntimeError("failed")
+        
+        with self.assertRaises(RuntimeError):
+            export(items(), path, batch_size=2)
+        
+        self.assertEqual(os.listdir(self.folder), [])
+    
+    
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet(self):
+        """Tests Parquet export with missing values in first batch."""
+        
+        path = os.path.join(self.folder, "sets.parquet")
+        
+        self.assertEqual(export(ROWS, path, batch_size=3), len(ROWS))
+        
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.column_names, list(FIELDS))
+        self.assertEqual(str(table.schema.field('subtheme').type), "string")
+        self.assertEqual([tuple(x.values()) for x in table.to_pylist()], ROWS)
+    
+    
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_empty(self):
+        """Tests Parquet export without rows."""
+        
+        path = os.path.join(self.folder, "sets.parquet")
+        
+        self.assertEqual(export([], path), 0)
+        
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.num_rows, 0)
+        self.assertEqual(table.column_names, list(FIELDS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import unittest
+
+from brickse.index import InstructionsIndex
+from brickse.objects import Instructions
+
+
+def make_item(version, part=None, parts=None, region=None):
+    """Creates instructions item."""
+    
+    descr = "BI 3017 / 60 - 65/115 - 1234 V%d" % version
+    
+    if parts:
+        descr += " %d/%d" % (part, parts)
+    
+    if region:
+        descr += " " + region
+    
+    return Instructions(description=descr, url=descr)
+
+
+class TestInstructionsIndex(unittest.TestCase):
+    """Tests instructions index."""
+    
+    
+    def test_manual(self):
+        """Tests the latest complete manual is resolved."""
+        
+        part1 = make_item(29, 1, 2)
+        part2 = make_item(30, 2, 2)
+        old = make_item(28)
+        incomplete = make_item(31, 1, 3)
+        
+        index = InstructionsIndex()
+        index.add(1, [old, part1, part2, incomplete])
+        
+        self.assertEqual(index.get(1), (part1, part2))
+        self.assertEqual(index.regions(1), (None,))
+    
+    
+    def test_region(self):
+        """Tests region manual with global fallback."""
+        
+        item = make_item(29)
+        item_na = make_item(29, region="NA")
+        
+        index = InstructionsIndex()
+        index.add(1, [item, item_na])
+        
+        self.assertEqual(index.get(1, "NA"), (item_na,))
+        self.assertEqual(index.get(1, "IN"), (item,))
+        self.assertEqual(index.get(1), (item,))
+        self.assertEqual(set(index.regions(1)), {None, "NA"})
+    
+    
+    def test_replace(self):
+        """Tests set instructions are replaced."""
+        
+        index = InstructionsIndex()
+        index.add(1, [make_item(29, region="NA")])
+        index.add(1, [])
+        
+        self.assertIn(1, index)
+        self.assertIsNone(index.get(1, "NA"))
+        self.assertEqual(index.regions(1), ())
+    
+    
+    def test_size(self):
+        """Tests least recently used sets are dropped."""
+        
+        index = InstructionsIndex(size=2)
+        index.add(1, [make_item(1)])
+        index.add(2, [make_item(2)])
+        
+        index.get(1)
+        index.add(3, [make_item(3)])
+        
+        self.assertEqual(len(index), 2)
+        self.assertIn(1, index)
+        self.assertNotIn(2, index)
+        self.assertIsNone(index.get(2))
+        self.assertEqual(len(index._manuals), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
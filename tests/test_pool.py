@@ -0,0 +1,165 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import time
+import unittest
+import urllib.error
+import urllib.parse
+
+from brickse import config, request, MockServer
+from brickse.pool import get_pool
+from brickse.server import _Handler
+
+# define fixtures
+FIXTURES = {
+    'sets': [{
+        'setID': 1,
+        'number': "1234",
+        'numberVariant': 1,
+        'name': "Test",
+        'theme': "Test",
+        'year': 2020}]}
+
+# define configuration to restore
+SETTINGS = ("API_URL", "API_KEY", "REQUEST_DELAY", "CACHE", "TRANSPORT", "CONNECT_TIMEOUT", "READ_TIMEOUT")
+
+
+class _IdleHandler(_Handler):
+    """Handler closing idle keep-alive connections."""
+    
+    timeout = 0.2
+
+
+class TestPool(unittest.TestCase):
+    """Tests pooled keep-alive connections against mock server."""
+    
+    
+    def setUp(self):
+        """Starts mock server."""
+        
+        self._settings = {k: getattr(config, k) for k in SETTINGS}
+        
+        self.server = MockServer(FIXTURES)
+        self.server.start()
+        
+        config.API_URL = self.server.url
+        config.API_KEY = "key"
+        config.REQUEST_DELAY = 0
+        config.CACHE = None
+        config.TRANSPORT = None
+        
+        url = urllib.parse.urlsplit(config.API_URL)
+        self.key = (url.scheme, url.netloc)
+        
+        get_pool().clear()
+        self.stats = get_pool().stats()
+    
+    
+    def tearDown(self):
+        """Stops mock server and restores configuration."""
+        
+        get_pool().clear()
+        self.server.stop()
+        
+        for key, value in self._settings.items():
+            setattr(config, key, value)
+    
+    
+    def get_themes(self):
+        """Sends request and reads response."""
+        
+        data = request.decode(request.request(config.API_URL + "getThemes", {}))
+        self.assertEqual(data['status'], "success")
+        
+        return data
+    
+    
+    def get_stats(self):
+        """Gets pool statistics changes since setup."""
+        
+        stats = get_pool().stats()
+        return {k: stats[k] - self.stats[k] for k in ('opened', 'reused')}
+    
+    
+    def get_idle(self):
+        """Gets idle connection of the server."""
+        
+        conn = get_pool().get(self.key)
+        self.assertIsNotNone(conn)
+        
+        return conn
+    
+    
+    def test_reuse(self):
+        """Tests subsequent requests share single connection."""
+        
+        for i in range(3):
+            self.get_themes()
+        
+        self.assertEqual(self.get_stats(), {'opened': 1, 'reused': 2})
+        self.assertEqual(get_pool().stats()['idle'], 1)
+    
+    
+    def test_error(self):
+        """Tests connection of client error response is reused."""
+        
+        for i in range(2):
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                request.request(config.API_URL + "unknownEndpoint", {})
+            self.assertEqual(context.exception.code // 100, 4)
+        
+        self.get_themes()
+        
+        self.assertEqual(self.get_stats(), {'opened': 1, 'reused': 2})
+    
+    
+    def test_timeout(self):
+        """Tests reused connection gets timeout of current request."""
+        
+        config.READ_TIMEOUT = 5
+        self.get_themes()
+        
+        config.READ_TIMEOUT = 2
+        self.get_themes()
+        
+        conn = self.get_idle()
+        self.assertEqual(conn.sock.gettimeout(), 2)
+        get_pool().put(self.key, conn)
+        
+        config.READ_TIMEOUT = None
+        config.CONNECT_TIMEOUT = 7
+        self.get_themes()
+        
+        conn = self.get_idle()
+        self.assertEqual(conn.sock.gettimeout(), 7)
+        conn.close()
+    
+    
+    def test_stale(self):
+        """Tests connection closed by server while idle is retried."""
+        
+        self.server._server.RequestHandlerClass = _IdleHandler
+        
+        self.get_themes()
+        time.sleep(0.5)
+        self.get_themes()
+        
+        self.assertEqual(self.get_stats(), {'opened': 2, 'reused': 1})
+    
+    
+    def test_prewarm(self):
+        """Tests pre-opened connections are used by requests."""
+        
+        thread = request.prewarm(count=2)
+        self.assertIsNotNone(thread)
+        thread.join()
+        
+        self.assertEqual(get_pool().stats()['idle'], 2)
+        self.assertIsNone(request.prewarm(count=2))
+        
+        self.get_themes()
+        self.assertEqual(self.get_stats(), {'opened': 2, 'reused': 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
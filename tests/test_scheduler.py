@@ -0,0 +1,153 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import time
+import threading
+import unittest
+
+from brickse import config
+from brickse.scheduler import Scheduler, priority, get_priority, get_flow
+
+# define delay between slots
+DELAY = 0.1
+
+
+class TestScheduler(unittest.TestCase):
+    """Tests request slots distribution."""
+    
+    
+    def setUp(self):
+        """Sets request delay."""
+        
+        self._delay = config.REQUEST_DELAY
+        config.REQUEST_DELAY = DELAY
+        
+        self.scheduler = Scheduler()
+        self.order = []
+        self.threads = []
+        self.lock = threading.Lock()
+    
+    
+    def tearDown(self):
+        """Restores request delay."""
+        
+        for thread in self.threads:
+            thread.join()
+        
+        config.REQUEST_DELAY = self._delay
+    
+    
+    def enqueue(self, name, priority, flow):
+        """Starts waiting for slot in background."""
+        
+        def acquire():
+            self.scheduler.acquire(priority, flow)
+            with self.lock:
+                self.order.append(name)
+        
+        waiting = sum(self.scheduler.pending().values())
+        
+        thread = threading.Thread(target=acquire, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        
+        # wait until queued
+        while sum(self.scheduler.pending().values()) == waiting:
+            time.sleep(0.001)
+    
+    
+    def finish(self):
+        """Waits for all slots."""
+        
+        for thread in self.threads:
+            thread.join()
+        
+        self.threads = []
+    
+    
+    def test_delay(self):
+        """Tests slots are separated by request delay."""
+        
+        start = time.time()
+        
+        for i in range(3):
+            self.assertTrue(self.scheduler.acquire("batch", "flow"))
+        
+        self.assertGreaterEqual(time.time() - start, 2 * DELAY * 0.9)
+        self.assertEqual(self.scheduler.granted['batch'], 3)
+    
+    
+    def test_priority(self):
+        """Tests higher priority class is served first."""
+        
+        self.scheduler.acquire("batch", "main")
+        
+        self.enqueue("idle", "idle", "a")
+        self.enqueue("batch", "batch", "b")
+        self.enqueue("interactive", "interactive", "c")
+        self.finish()
+        
+        self.assertEqual(self.order, ["interactive", "batch", "idle"])
+    
+    
+    def test_flows(self):
+        """Tests flows of the same class are served by round-robin."""
+        
+        self.scheduler.acquire("batch", "main")
+        
+        for i in range(3):
+            self.enqueue("a%d" % i, "batch", "a")
+        
+        for i in range(2):
+            self.enqueue("b%d" % i, "batch", "b")
+        
+        self.finish()
+        
+        self.assertEqual(self.order, ["a0", "b0", "a1", "b1", "a2"])
+    
+    
+    def test_limit(self):
+        """Tests waiting is abandoned at limit."""
+        
+        self.scheduler.acquire("batch", "main")
+        
+        self.assertFalse(self.scheduler.acquire("batch", "main", limit=time.time() + DELAY / 2))
+        self.assertEqual(self.scheduler.pending(), {'interactive': 0, 'batch': 0, 'idle': 0})
+        
+        self.assertTrue(self.scheduler.acquire("batch", "main", limit=time.time() + 2 * DELAY))
+    
+    
+    def test_unknown(self):
+        """Tests unknown priority class is rejected."""
+        
+        with self.assertRaises(ValueError):
+            self.scheduler.acquire("urgent")
+        
+        with self.assertRaises(ValueError):
+            with priority("urgent"):
+                pass
+    
+    
+    def test_context(self):
+        """Tests priority context sets class and flow."""
+        
+        thread_flow = get_flow()
+        
+        with priority("idle"):
+            
+            flow = get_flow()
+            self.assertEqual(get_priority(), "idle")
+            self.assertNotEqual(flow, thread_flow)
+            
+            with priority("batch"):
+                self.assertEqual(get_priority(), "batch")
+                self.assertEqual(get_flow(), flow)
+            
+            self.assertEqual(get_priority(), "idle")
+        
+        self.assertEqual(get_priority(), config.PRIORITY)
+        self.assertEqual(get_flow(), thread_flow)
+
+
+if __name__ == "__main__":
+    unittest.main()
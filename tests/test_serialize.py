@@ -0,0 +1,191 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import pickle
+import unittest
+
+from brickse import codec
+from brickse.objects import _Entity, Collection, Theme, Year, Instructions, Image, Review, Minifig
+from brickse.objects import entity_fields
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# define entities classes
+ENTITIES = (
+    Collection,
+    Theme,
+    Year,
+    Instructions,
+    Image,
+    Review,
+    Minifig)
+
+
+def make_entity(cls, tag=""):
+    """Creates entity with unique value for every attribute."""
+    
+    attrs = {f: "%s.%s%s" % (cls.__name__, f, tag) for f in entity_fields(cls)}
+    return cls(**attrs)
+
+
+def assert_entity(test, entity, expected):
+    """Checks entity class and all attributes."""
+    
+    test.assertIs(entity.__class__, expected.__class__)
+    test.assertEqual(list(vars(entity)), list(entity_fields(expected.__class__)))
+    
+    for name in entity_fields(expected.__class__):
+        value = getattr(entity, name)
+        other = getattr(expected, name)
+        
+        if isinstance(other, _Entity):
+            assert_entity(test, value, other)
+        
+        elif isinstance(other, (list, tuple)):
+            test.assertEqual(len(value), len(other))
+            for item, exp in zip(value, other):
+                assert_entity(test, item, exp)
+        
+        else:
+            test.assertEqual(value, other)
+
+
+class TestPickle(unittest.TestCase):
+    """Tests compact pickle round-trip of all entities."""
+    
+    
+    def test_default(self):
+        """Tests default pickling is kept."""
+        
+        for cls in ENTITIES:
+            with self.subTest(cls=cls.__name__):
+                entity = make_entity(cls)
+                data = pickle.dumps(entity)
+                
+                self.assertNotIn(b"restore_entity", data)
+                assert_entity(self, pickle.loads(data), entity)
+    
+    
+    def test_entities(self):
+        """Tests every entity class."""
+        
+        for cls in ENTITIES:
+            with self.subTest(cls=cls.__name__):
+                entity = make_entity(cls)
+                data = codec.pickle_dumps(entity)
+                
+                self.assertLess(len(data), len(pickle.dumps(entity, pickle.HIGHEST_PROTOCOL)))
+                assert_entity(self, pickle.loads(data), entity)
+    
+    
+    def test_nested(self):
+        """Tests theme with children."""
+        
+        theme = make_entity(Theme)
+        theme.children = [make_entity(Theme, str(i)) for i in range(3)]
+        
+        assert_entity(self, pickle.loads(codec.pickle_dumps(theme)), theme)
+    
+    
+    def test_missing(self):
+        """Tests entity with deleted attribute."""
+        
+        entity = make_entity(Collection)
+        del entity.name
+        
+        restored = pickle.loads(codec.pickle_dumps(entity))
+        self.assertEqual(list(vars(restored)), list(entity_fields(Collection)))
+        self.assertIsNone(restored.name)
+        self.assertEqual(restored.number, entity.number)
+    
+    
+    def test_reordered(self):
+        """Tests entity with re-assigned attribute."""
+        
+        entity = make_entity(Collection)
+        del entity.set_id
+        entity.set_id = "1234-1"
+        
+        assert_entity(self, pickle.loads(codec.pickle_dumps(entity)), entity)
+        
+        if msgpack is not None:
+            assert_entity(self, codec.loads(codec.dumps(entity)), entity)
+
+
+@unittest.skipIf(msgpack is None, "msgpack is not installed")
+class TestCodec(unittest.TestCase):
+    """Tests msgpack round-trip of all entities."""
+    
+    
+    def test_entities(self):
+        """Tests every entity class."""
+        
+        for cls in ENTITIES:
+            with self.subTest(cls=cls.__name__):
+                entity = make_entity(cls)
+                assert_entity(self, codec.loads(codec.dumps(entity)), entity)
+    
+    
+    def test_list(self):
+        """Tests list of all entities."""
+        
+        entities = [make_entity(cls) for cls in ENTITIES]
+        restored = codec.loads(codec.dumps(entities))
+        
+        self.assertEqual(len(restored), len(entities))
+        for entity, expected in zip(restored, entities):
+            assert_entity(self, entity, expected)
+    
+    
+    def test_nested(self):
+        """Tests theme with children."""
+        
+        theme = make_entity(Theme)
+        theme.children = [make_entity(Theme, str(i)) for i in range(3)]
+        
+        assert_entity(self, codec.loads(codec.dumps(theme)), theme)
+    
+    
+    def test_older_schema(self):
+        """Tests values missing at the end are set to None."""
+        
+        cls = Collection
+        fields = entity_fields(cls)
+        values = [codec.SCHEMA_VERSION, "1234-1"]
+        
+        payload = msgpack.packb(values)
+        data = msgpack.packb(msgpack.ExtType(codec.CODES[cls], payload))
+        restored = codec.loads(data)
+        
+        self.assertIs(restored.__class__, cls)
+        self.assertEqual(list(vars(restored)), list(fields))
+        self.assertEqual(getattr(restored, fields[0]), "1234-1")
+        for name in fields[1:]:
+            self.assertIsNone(getattr(restored, name))
+    
+    
+    def test_newer_schema(self):
+        """Tests newer schema version is rejected."""
+        
+        for cls in ENTITIES:
+            with self.subTest(cls=cls.__name__):
+                values = (codec.SCHEMA_VERSION + 1,) + tuple(range(len(entity_fields(cls))))
+                payload = msgpack.packb(values)
+                data = msgpack.packb(msgpack.ExtType(codec.CODES[cls], payload))
+                
+                with self.assertRaises(ValueError):
+                    codec.loads(data)
+    
+    
+    def test_unsupported(self):
+        """Tests unsupported type is rejected."""
+        
+        with self.assertRaises(TypeError):
+            codec.dumps(object())
+
+
+if __name__ == "__main__":
+    unittest.main()
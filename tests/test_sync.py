@@ -0,0 +1,154 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import copy
+import unittest
+
+import brickse
+from brickse import config, MockServer
+from brickse.sync import diff, get_store
+
+# define user token
+TOKEN = "user-token"
+
+# define configuration to restore
+SETTINGS = ("API_URL", "API_KEY", "USER_TOKEN", "REQUEST_DELAY", "CACHE", "TRANSPORT", "SYNC_PATH")
+
+
+def make_set(i, qty=1):
+    """Creates raw user set."""
+    
+    return {
+        'setID': i,
+        'number': str(1000 + i),
+        'numberVariant': 1,
+        'name': "Set %d" % i,
+        'year': 2020,
+        'category': "Normal",
+        'theme': "Theme",
+        'themeGroup': "Group",
+        'released': True,
+        'image': {},
+        'collection': {'owned': True, 'qtyOwned': qty, 'wanted': False}}
+
+
+class TestDiff(unittest.TestCase):
+    """Tests snapshots comparison."""
+    
+    
+    def test_diff(self):
+        """Tests added, removed and changed items."""
+        
+        old = {'1': {'id': 1, 'qty': 1}, '2': {'id': 2, 'qty': 1}, '3': {'id': 3, 'qty': 1}}
+        new = {'1': {'id': 1, 'qty': 1}, '2': {'id': 2, 'qty': 2}, '4': {'id': 4, 'qty': 1}}
+        
+        added, removed, changed = diff(old, new)
+        
+        self.assertEqual(added, [new['4']])
+        self.assertEqual(removed, [old['3']])
+        self.assertEqual(changed, [(old['2'], new['2'])])
+    
+    
+    def test_empty(self):
+        """Tests comparison with missing snapshot."""
+        
+        new = {'1': {'id': 1}}
+        
+        self.assertEqual(diff({}, new), ([new['1']], [], []))
+        self.assertEqual(diff(new, new), ([], [], []))
+
+
+class TestSync(unittest.TestCase):
+    """Tests user sets sync against mock server."""
+    
+    
+    def setUp(self):
+        """Stores configuration."""
+        
+        self._settings = {k: getattr(config, k) for k in SETTINGS}
+        self.server = None
+        
+        config.API_KEY = "key"
+        config.USER_TOKEN = TOKEN
+        config.REQUEST_DELAY = 0
+        config.CACHE = None
+        config.TRANSPORT = None
+        config.SYNC_PATH = None
+        
+        get_store()._snapshots.clear()
+    
+    
+    def tearDown(self):
+        """Stops mock server and restores configuration."""
+        
+        if self.server is not None:
+            self.server.stop()
+        
+        for key, value in self._settings.items():
+            setattr(config, key, value)
+    
+    
+    def serve(self, sets):
+        """Starts mock server with given user sets."""
+        
+        if self.server is not None:
+            self.server.stop()
+        
+        self.server = MockServer({'users': {TOKEN: {'sets': copy.deepcopy(sets), 'minifigs': []}}})
+        self.server.start()
+        
+        config.API_URL = self.server.url
+    
+    
+    def test_sync(self):
+        """Tests changes keeping number of sets are found."""
+        
+        tool = brickse.Brickse()
+        
+        self.serve([make_set(1), make_set(2), make_set(3)])
+        result = tool.sync_users_sets()
+        self.assertEqual(sorted(x.set_id for x in result.added), [1, 2, 3])
+        
+        # add, remove and change keeping count
+        self.serve([make_set(1), make_set(2, qty=2), make_set(4)])
+        result = tool.sync_users_sets()
+        
+        self.assertFalse(result.checked)
+        self.assertEqual([x.set_id for x in result.added], [4])
+        self.assertEqual([x.set_id for x in result.removed], [3])
+        
+        self.assertEqual([x.set_id for x in result.changed], [2])
+        
+        old, new = result.changes[0]
+        self.assertEqual(old['collection']['qtyOwned'], 1)
+        self.assertEqual(new['collection']['qtyOwned'], 2)
+        
+        # nothing changed
+        result = tool.sync_users_sets()
+        self.assertFalse(result)
+    
+    
+    def test_quick(self):
+        """Tests quick sync checks number of sets only."""
+        
+        tool = brickse.Brickse()
+        
+        self.serve([make_set(1), make_set(2)])
+        tool.sync_users_sets()
+        
+        # same count is considered unchanged
+        self.serve([make_set(1), make_set(3)])
+        result = tool.sync_users_sets(quick=True)
+        self.assertTrue(result.checked)
+        self.assertFalse(result)
+        
+        # different count is synced
+        self.serve([make_set(1), make_set(3), make_set(4)])
+        result = tool.sync_users_sets(quick=True)
+        self.assertFalse(result.checked)
+        self.assertEqual(sorted(x.set_id for x in result.added), [3, 4])
+        self.assertEqual([x.set_id for x in result.removed], [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
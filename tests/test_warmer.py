@@ -0,0 +1,80 @@
+# Created byMartin.cz
+# Copyright (c) Martin Strohalm. All rights reserved.
+
+import unittest
+
+from brickse import config, request, Cache, CacheWarmer, MockServer
+from brickse.pool import get_pool
+
+# define fixtures
+FIXTURES = {
+    'sets': [{
+        'setID': 1,
+        'number': "1234",
+        'numberVariant': 1,
+        'name': "Test",
+        'theme': "Test",
+        'year': 2020}]}
+
+# define configuration to restore
+SETTINGS = ("API_URL", "API_KEY", "REQUEST_DELAY", "CACHE", "TRANSPORT", "SERVE_STALE", "CONNECT_TIMEOUT", "READ_TIMEOUT")
+
+
+class TestWarmer(unittest.TestCase):
+    """Tests cache warming against mock server."""
+    
+    
+    def setUp(self):
+        """Starts mock server and fills the cache."""
+        
+        self._settings = {k: getattr(config, k) for k in SETTINGS}
+        
+        self.server = MockServer(FIXTURES)
+        self.server.start()
+        
+        config.API_URL = self.server.url
+        config.API_KEY = None
+        config.REQUEST_DELAY = 0
+        config.CACHE = Cache(ttl=60)
+        config.TRANSPORT = None
+        config.SERVE_STALE = True
+        config.CONNECT_TIMEOUT = 1
+        config.READ_TIMEOUT = 1
+        
+        get_pool().clear()
+        request.request(config.API_URL + "getThemes", {'apiKey': "key"}).read()
+    
+    
+    def tearDown(self):
+        """Stops mock server and restores configuration."""
+        
+        self.server.stop()
+        get_pool().clear()
+        
+        for key, value in self._settings.items():
+            setattr(config, key, value)
+    
+    
+    def test_warm(self):
+        """Tests expiring entry is refreshed using given API key."""
+        
+        warmer = CacheWarmer(api_key="key", margin=3600)
+        
+        self.assertEqual(warmer.warm(), 1)
+        self.assertEqual(warmer.failed, 0)
+    
+    
+    def test_stale(self):
+        """Tests stale data served while server is down count as failure."""
+        
+        self.server.stop()
+        get_pool().clear()
+        
+        warmer = CacheWarmer(api_key="key", margin=3600)
+        
+        self.assertEqual(warmer.warm(), 0)
+        self.assertEqual(warmer.failed, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()